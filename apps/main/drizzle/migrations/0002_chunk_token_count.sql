@@ -0,0 +1 @@
+ALTER TABLE "document_chunk" ADD COLUMN "token_count" integer;
\ No newline at end of file
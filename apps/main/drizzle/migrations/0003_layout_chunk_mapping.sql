@@ -0,0 +1,6 @@
+ALTER TABLE "document_chunk" ADD COLUMN "page_start" integer;--> statement-breakpoint
+ALTER TABLE "document_chunk" ADD COLUMN "page_end" integer;--> statement-breakpoint
+ALTER TABLE "document_chunk" ADD COLUMN "block_ids" text[];--> statement-breakpoint
+ALTER TABLE "document_chunk" ADD COLUMN "bboxes" jsonb;--> statement-breakpoint
+CREATE INDEX "document_chunk_content_page_idx" ON "document_chunk" USING btree ("document_content_id","page_start","page_end");--> statement-breakpoint
+CREATE INDEX "document_chunk_block_ids_gin_idx" ON "document_chunk" USING gin ("block_ids");
\ No newline at end of file
@@ -0,0 +1,31 @@
+ALTER TABLE "document_chunk" ALTER COLUMN "chunk_content" DROP NOT NULL;--> statement-breakpoint
+ALTER TABLE "document_chunk" ADD COLUMN "chunk_start" integer;--> statement-breakpoint
+ALTER TABLE "document_chunk" ADD COLUMN "chunk_end" integer;--> statement-breakpoint
+ALTER TABLE "document_chunk" ADD COLUMN "chunk_preview" text;--> statement-breakpoint
+ALTER TABLE "document_chunk" ADD COLUMN "chunk_tsv" "tsvector";--> statement-breakpoint
+ALTER TABLE "document_chunk" ADD CONSTRAINT "document_chunk_text_or_offsets_check" CHECK (chunk_content IS NOT NULL OR (chunk_start IS NOT NULL AND chunk_end IS NOT NULL));--> statement-breakpoint
+-- chunk_tsv 는 generated column 으로 만들 수 없으므로(오프셋 저장 청크는 document_content 의 markdown 을 참조) 트리거로 유지한다.
+CREATE OR REPLACE FUNCTION document_chunk_tsv_refresh() RETURNS trigger AS $$
+BEGIN
+  IF NEW.chunk_content IS NOT NULL THEN
+    NEW.chunk_tsv := to_tsvector('simple', NEW.chunk_content);
+  ELSIF NEW.chunk_start IS NOT NULL AND NEW.chunk_end IS NOT NULL THEN
+    SELECT to_tsvector(
+             'simple',
+             coalesce(substr(dct.contents->>'markdown', NEW.chunk_start + 1, NEW.chunk_end - NEW.chunk_start), '')
+           )
+      INTO NEW.chunk_tsv
+      FROM document_content AS dct
+     WHERE dct.document_content_id = NEW.document_content_id;
+  ELSE
+    NEW.chunk_tsv := to_tsvector('simple', coalesce(NEW.chunk_preview, ''));
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;--> statement-breakpoint
+CREATE TRIGGER "document_chunk_tsv_refresh_trg"
+  BEFORE INSERT OR UPDATE OF "chunk_content", "chunk_start", "chunk_end", "document_content_id"
+  ON "document_chunk"
+  FOR EACH ROW EXECUTE FUNCTION document_chunk_tsv_refresh();--> statement-breakpoint
+UPDATE "document_chunk" SET "chunk_tsv" = to_tsvector('simple', coalesce("chunk_content", ''));--> statement-breakpoint
+CREATE INDEX "document_chunk_tsv_gin_idx" ON "document_chunk" USING gin ("chunk_tsv");
\ No newline at end of file
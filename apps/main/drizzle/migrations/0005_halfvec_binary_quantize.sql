@@ -0,0 +1,3 @@
+DROP INDEX IF EXISTS "document_chunk_embedding_ivfflat_idx";--> statement-breakpoint
+ALTER TABLE "document_chunk" ALTER COLUMN "chunk_embedding" SET DATA TYPE halfvec(256) USING "chunk_embedding"::halfvec(256);--> statement-breakpoint
+CREATE INDEX "document_chunk_embedding_bq_hnsw_idx" ON "document_chunk" USING hnsw ((binary_quantize("chunk_embedding")::bit(256)) bit_hamming_ops);
\ No newline at end of file
@@ -0,0 +1,79 @@
+ALTER TABLE "document_chunk" ADD COLUMN "user_id" uuid;--> statement-breakpoint
+ALTER TABLE "document_chunk" ADD COLUMN "document_path" "ltree";--> statement-breakpoint
+ALTER TABLE "document_chunk" ADD COLUMN "is_live" boolean DEFAULT true NOT NULL;--> statement-breakpoint
+UPDATE "document_chunk" AS dc
+   SET "user_id" = d."user_id",
+       "document_path" = d."path",
+       "is_live" = (d."deleted_at" IS NULL AND dct."deleted_at" IS NULL AND dc."deleted_at" IS NULL)
+  FROM "document_content" AS dct
+  JOIN "document" AS d ON d."document_id" = dct."document_id"
+ WHERE dct."document_content_id" = dc."document_content_id";--> statement-breakpoint
+ALTER TABLE "document_chunk" ALTER COLUMN "user_id" SET NOT NULL;--> statement-breakpoint
+ALTER TABLE "document_chunk" ALTER COLUMN "document_path" SET NOT NULL;--> statement-breakpoint
+-- 검색 필터용 비정규화 컬럼(user_id / document_path / is_live)은 트리거로 document / document_content 와 동기화한다.
+-- 1) 청크 INSERT / content 변경 / 청크 soft delete 시 소유 문서 기준으로 채운다.
+CREATE OR REPLACE FUNCTION document_chunk_denorm_fill() RETURNS trigger AS $$
+BEGIN
+  SELECT d.user_id,
+         d.path,
+         (d.deleted_at IS NULL AND dct.deleted_at IS NULL AND NEW.deleted_at IS NULL)
+    INTO NEW.user_id, NEW.document_path, NEW.is_live
+    FROM document_content AS dct
+    JOIN document AS d ON d.document_id = dct.document_id
+   WHERE dct.document_content_id = NEW.document_content_id;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;--> statement-breakpoint
+CREATE TRIGGER "document_chunk_denorm_fill_trg"
+  BEFORE INSERT OR UPDATE OF "document_content_id", "deleted_at"
+  ON "document_chunk"
+  FOR EACH ROW EXECUTE FUNCTION document_chunk_denorm_fill();--> statement-breakpoint
+-- 2) 문서 이동(path) / 소유자 변경 / soft delete 시 해당 문서의 모든 버전 청크에 전파한다.
+CREATE OR REPLACE FUNCTION document_chunk_denorm_sync_document() RETURNS trigger AS $$
+BEGIN
+  UPDATE document_chunk AS dc
+     SET user_id = NEW.user_id,
+         document_path = NEW.path,
+         is_live = (NEW.deleted_at IS NULL AND dct.deleted_at IS NULL AND dc.deleted_at IS NULL)
+    FROM document_content AS dct
+   WHERE dct.document_id = NEW.document_id
+     AND dc.document_content_id = dct.document_content_id;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;--> statement-breakpoint
+CREATE TRIGGER "document_chunk_denorm_sync_document_trg"
+  AFTER UPDATE OF "user_id", "path", "deleted_at"
+  ON "document"
+  FOR EACH ROW
+  WHEN (
+    OLD.user_id IS DISTINCT FROM NEW.user_id
+    OR OLD.path IS DISTINCT FROM NEW.path
+    OR OLD.deleted_at IS DISTINCT FROM NEW.deleted_at
+  )
+  EXECUTE FUNCTION document_chunk_denorm_sync_document();--> statement-breakpoint
+-- 3) content 버전 soft delete / 문서 재배정 시 해당 버전 청크에 전파한다.
+CREATE OR REPLACE FUNCTION document_chunk_denorm_sync_content() RETURNS trigger AS $$
+BEGIN
+  UPDATE document_chunk AS dc
+     SET user_id = d.user_id,
+         document_path = d.path,
+         is_live = (d.deleted_at IS NULL AND NEW.deleted_at IS NULL AND dc.deleted_at IS NULL)
+    FROM document AS d
+   WHERE d.document_id = NEW.document_id
+     AND dc.document_content_id = NEW.document_content_id;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;--> statement-breakpoint
+CREATE TRIGGER "document_chunk_denorm_sync_content_trg"
+  AFTER UPDATE OF "document_id", "deleted_at"
+  ON "document_content"
+  FOR EACH ROW
+  WHEN (
+    OLD.document_id IS DISTINCT FROM NEW.document_id
+    OR OLD.deleted_at IS DISTINCT FROM NEW.deleted_at
+  )
+  EXECUTE FUNCTION document_chunk_denorm_sync_content();--> statement-breakpoint
+DROP INDEX IF EXISTS "document_chunk_embedding_bq_hnsw_idx";--> statement-breakpoint
+CREATE INDEX "document_chunk_embedding_bq_hnsw_idx" ON "document_chunk" USING hnsw ((binary_quantize("chunk_embedding")::bit(256)) bit_hamming_ops) WHERE is_live;--> statement-breakpoint
+CREATE INDEX "document_chunk_user_live_idx" ON "document_chunk" USING btree ("user_id","document_content_id") WHERE is_live;--> statement-breakpoint
+CREATE INDEX "document_chunk_path_live_gist_idx" ON "document_chunk" USING gist ("document_path") WHERE is_live;
\ No newline at end of file
@@ -0,0 +1,27 @@
+-- document_chunk 를 user_id 기준 HASH 파티션 테이블로 전환하기 위한 shadow 테이블 (빈 테이블, 쓰기 동기화 없음).
+-- 기존 테이블 → shadow 동기화 트리거는 backfill 명령이 설치하고 swap 이 제거하므로, 이 migration 만으로는 청크 쓰기가 늘지 않는다.
+-- 배포 후 전환 절차 (src/schema/document_chunk_partitioning.py, 진행 상태는 status 명령 / GET / 의 indexes.partitioning):
+--   backfill -> swap -> drop-legacy
+CREATE TABLE "document_chunk_partitioned" (
+  LIKE "document_chunk" INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+) PARTITION BY HASH ("user_id");--> statement-breakpoint
+ALTER TABLE "document_chunk_partitioned" ADD CONSTRAINT "document_chunk_partitioned_document_chunk_id_user_id_pk" PRIMARY KEY("document_chunk_id","user_id");--> statement-breakpoint
+ALTER TABLE "document_chunk_partitioned" ADD CONSTRAINT "document_chunk_document_content_id_document_content_document_content_id_fk" FOREIGN KEY ("document_content_id") REFERENCES "public"."document_content"("document_content_id") ON DELETE cascade ON UPDATE no action;--> statement-breakpoint
+DO $$
+BEGIN
+  FOR i IN 0..15 LOOP
+    EXECUTE format(
+      'CREATE TABLE %I PARTITION OF "document_chunk_partitioned" FOR VALUES WITH (MODULUS 16, REMAINDER %s)',
+      'document_chunk_p' || lpad(i::text, 2, '0'),
+      i
+    );
+  END LOOP;
+END;
+$$;--> statement-breakpoint
+-- 파티션별 인덱스 (부모에 생성하면 각 파티션에 동일 인덱스가 만들어진다). swap 시 "_part" 접미사를 제거한다.
+CREATE INDEX "document_chunk_embedding_bq_hnsw_idx_part" ON "document_chunk_partitioned" USING hnsw ((binary_quantize("chunk_embedding")::bit(256)) bit_hamming_ops) WHERE is_live;--> statement-breakpoint
+CREATE INDEX "document_chunk_content_page_idx_part" ON "document_chunk_partitioned" USING btree ("document_content_id","page_start","page_end");--> statement-breakpoint
+CREATE INDEX "document_chunk_block_ids_gin_idx_part" ON "document_chunk_partitioned" USING gin ("block_ids");--> statement-breakpoint
+CREATE INDEX "document_chunk_tsv_gin_idx_part" ON "document_chunk_partitioned" USING gin ("chunk_tsv");--> statement-breakpoint
+CREATE INDEX "document_chunk_user_live_idx_part" ON "document_chunk_partitioned" USING btree ("user_id","document_content_id") WHERE is_live;--> statement-breakpoint
+CREATE INDEX "document_chunk_path_live_gist_idx_part" ON "document_chunk_partitioned" USING gist ("document_path") WHERE is_live;
\ No newline at end of file
@@ -0,0 +1,12 @@
+ALTER TABLE "document_content" ADD COLUMN "content_embedding" halfvec(256);--> statement-breakpoint
+-- 기존 content 버전은 살아 있는 청크 임베딩의 평균(L2 정규화)으로 채운다. (이후에는 파이프라인이 저장)
+UPDATE "document_content" AS dct
+   SET "content_embedding" = l2_normalize(s."mean_embedding")
+  FROM (
+    SELECT "document_content_id", avg("chunk_embedding") AS "mean_embedding"
+      FROM "document_chunk"
+     WHERE "deleted_at" IS NULL
+     GROUP BY "document_content_id"
+  ) AS s
+ WHERE s."document_content_id" = dct."document_content_id";--> statement-breakpoint
+CREATE INDEX "document_content_embedding_hnsw_idx" ON "document_content" USING hnsw ("content_embedding" halfvec_cosine_ops) WHERE content_embedding IS NOT NULL;
\ No newline at end of file
@@ -0,0 +1,17 @@
+-- 문서 트리 변경(생성/이동/이름 변경/soft delete/삭제)을 사용자 단위로 알린다. (사이드카 트리 캐시 무효화용)
+-- 같은 트랜잭션 안의 동일 payload NOTIFY 는 PostgreSQL 이 하나로 합친다.
+CREATE OR REPLACE FUNCTION document_tree_notify() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM pg_notify('document_tree_changed', OLD.user_id::text);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND (TG_OP = 'INSERT' OR NEW.user_id IS DISTINCT FROM OLD.user_id) THEN
+    PERFORM pg_notify('document_tree_changed', NEW.user_id::text);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;--> statement-breakpoint
+CREATE TRIGGER "document_tree_notify_trg"
+  AFTER INSERT OR DELETE OR UPDATE OF "user_id", "path", "name", "kind", "deleted_at"
+  ON "document"
+  FOR EACH ROW EXECUTE FUNCTION document_tree_notify();
\ No newline at end of file
@@ -0,0 +1,18 @@
+CREATE TABLE "vector_index_maintenance_run" (
+	"id" bigserial PRIMARY KEY NOT NULL,
+	"index_name" text NOT NULL,
+	"actions" jsonb DEFAULT '[]'::jsonb NOT NULL,
+	"relations" jsonb DEFAULT '{}'::jsonb NOT NULL,
+	"probe_queries" integer DEFAULT 0 NOT NULL,
+	"recall_before" real,
+	"recall_after" real,
+	"latency_ms_p50_before" real,
+	"latency_ms_p50_after" real,
+	"latency_ms_p95_before" real,
+	"latency_ms_p95_after" real,
+	"error" text,
+	"started_at" timestamp with time zone DEFAULT NOW() NOT NULL,
+	"finished_at" timestamp with time zone
+);
+--> statement-breakpoint
+CREATE INDEX "vector_index_maintenance_run_index_started_idx" ON "vector_index_maintenance_run" USING btree ("index_name","started_at");
\ No newline at end of file
@@ -1,17 +1,22 @@
 import { sql } from 'drizzle-orm';
 import {
+  type AnyPgColumn,
   bigint,
+  boolean,
+  check,
   customType,
+  foreignKey,
+  halfvec,
   index,
   integer,
   jsonb,
   pgEnum,
   pgTable,
+  primaryKey,
   text,
   timestamp,
   uniqueIndex,
   uuid,
-  vector,
 } from 'drizzle-orm/pg-core';
 
 // ltree custom type for hierarchical document paths
@@ -21,6 +26,13 @@ const ltree = customType<{ data: string }>({
   },
 });
 
+// tsvector custom type for full-text search columns
+const tsvector = customType<{ data: string }>({
+  dataType() {
+    return 'tsvector';
+  },
+});
+
 /**
  * document.kind
  *
@@ -158,6 +170,9 @@ export const documentContents = pgTable(
     // monotonically increasing version per document (1, 2, 3, ...)
     version: integer('version').notNull(),
 
+    // document-level vector (L2-normalized mean of chunk embeddings) for document-then-chunk search
+    contentEmbedding: halfvec('content_embedding', { dimensions: 256 }),
+
     createdAt: timestamp('created_at', { withTimezone: true })
       .defaultNow()
       .notNull(),
@@ -173,6 +188,11 @@ export const documentContents = pgTable(
     )
       .on(table.documentId, table.version)
       .where(sql`deleted_at IS NULL`),
+
+    // coarse stage of hierarchical search: top documents by cosine distance
+    contentEmbeddingHnswIdx: index('document_content_embedding_hnsw_idx')
+      .using('hnsw', table.contentEmbedding.op('halfvec_cosine_ops'))
+      .where(sql`content_embedding IS NOT NULL`),
   })
 );
 
@@ -212,6 +232,120 @@ export const documentRelations = pgTable(
   })
 );
 
+// document_chunk 와 shadow 테이블(document_chunk_partitioned)이 공유하는 컬럼 (PK / FK 컬럼 제외)
+const documentChunkColumns = () => ({
+  /**
+   * 검색 필터용 비정규화 컬럼 (document / document_content 에서 트리거로 동기화, see migration)
+   * - userId: 소유 문서의 user_id
+   * - documentPath: 소유 문서의 path (문서 이동 시 갱신)
+   * - isLive: 문서 / content 버전 / 청크가 모두 soft delete 되지 않았는지 여부
+   */
+  userId: uuid('user_id').notNull(),
+  documentPath: ltree('document_path').notNull(),
+  isLive: boolean('is_live').default(true).notNull(),
+
+  // optional position of the chunk within the original content
+  position: integer('position'),
+
+  // full chunk text; null when the chunk is stored as offsets into the content markdown
+  chunkContent: text('chunk_content'),
+
+  // [chunkStart, chunkEnd) character offsets into document_content.contents->>'markdown'
+  chunkStart: integer('chunk_start'),
+  chunkEnd: integer('chunk_end'),
+
+  // short preview kept for offset-stored chunks (chunkContent is null)
+  chunkPreview: text('chunk_preview'),
+
+  // full-text search vector; maintained by the document_chunk_tsv_refresh trigger (see migration)
+  chunkTsv: tsvector('chunk_tsv'),
+
+  // token count of chunk_content measured by the chunking tokenizer (nullable for legacy rows)
+  tokenCount: integer('token_count'),
+
+  // layout-aware chunking: source page range (layout pageId, 1-based) and block ids
+  pageStart: integer('page_start'),
+  pageEnd: integer('page_end'),
+  blockIds: text('block_ids').array(),
+
+  // [{ page, bbox: [x0, y0, x1, y1] }] aligned with blockIds (citation highlight)
+  bboxes: jsonb('bboxes'),
+
+  // pgvector column for semantic search; half precision storage (configure dimensions as needed)
+  chunkEmbedding: halfvec('chunk_embedding', { dimensions: 256 }).notNull(),
+
+  createdAt: timestamp('created_at', { withTimezone: true })
+    .defaultNow()
+    .notNull(),
+  updatedAt: timestamp('updated_at', { withTimezone: true })
+    .defaultNow()
+    .notNull(),
+  deletedAt: timestamp('deleted_at', { withTimezone: true }),
+});
+
+type DocumentChunkIndexColumns = Record<
+  | 'chunkEmbedding'
+  | 'userId'
+  | 'documentContentId'
+  | 'documentPath'
+  | 'pageStart'
+  | 'pageEnd'
+  | 'blockIds'
+  | 'chunkTsv',
+  AnyPgColumn
+>;
+
+// document_chunk 인덱스 / check 정의; shadow 테이블은 인덱스 이름에 '_part' 접미사를 붙입니다 (migration 0007)
+const documentChunkIndexes = (
+  table: DocumentChunkIndexColumns,
+  suffix = ''
+) => ({
+  // coarse vector search: HNSW over the binary-quantized embedding (Hamming distance);
+  // candidates are reranked by exact cosine distance on chunkEmbedding.
+  // requires pgvector >= 0.8 (search sets hnsw.iterative_scan; binary_quantize alone needs 0.7)
+  chunkEmbeddingBqHnswIdx: index(`document_chunk_embedding_bq_hnsw_idx${suffix}`)
+    .using(
+      'hnsw',
+      sql`(binary_quantize(${table.chunkEmbedding})::bit(256)) bit_hamming_ops`
+    )
+    .where(sql`is_live`),
+
+  // hot search path: per-user live chunks
+  userLiveIdx: index(`document_chunk_user_live_idx${suffix}`)
+    .on(table.userId, table.documentContentId)
+    .where(sql`is_live`),
+
+  // subtree (path prefix) filters on live chunks
+  pathLiveGistIdx: index(`document_chunk_path_live_gist_idx${suffix}`)
+    .using('gist', table.documentPath)
+    .where(sql`is_live`),
+
+  // chunk -> page lookups within a content version (citations / viewer)
+  contentPageIdx: index(`document_chunk_content_page_idx${suffix}`).on(
+    table.documentContentId,
+    table.pageStart,
+    table.pageEnd
+  ),
+
+  // chunk lookup by layout block id
+  blockIdsGinIdx: index(`document_chunk_block_ids_gin_idx${suffix}`).using(
+    'gin',
+    table.blockIds
+  ),
+
+  // full-text search over chunkTsv
+  chunkTsvGinIdx: index(`document_chunk_tsv_gin_idx${suffix}`).using(
+    'gin',
+    table.chunkTsv
+  ),
+
+  // every chunk keeps either its text or offsets into the content markdown
+  textOrOffsetsCheck: check(
+    'document_chunk_text_or_offsets_check',
+    sql`chunk_content IS NOT NULL OR (chunk_start IS NOT NULL AND chunk_end IS NOT NULL)`
+  ),
+});
+
 export const documentChunks = pgTable(
   'document_chunk',
   {
@@ -226,27 +360,41 @@ export const documentChunks = pgTable(
         onDelete: 'cascade',
       }),
 
-    // optional position of the chunk within the original content
-    position: integer('position'),
-
-    chunkContent: text('chunk_content').notNull(),
+    ...documentChunkColumns(),
+  },
+  (table) => documentChunkIndexes(table)
+);
 
-    // pgvector column for semantic search (configure dimensions as needed)
-    chunkEmbedding: vector('chunk_embedding', { dimensions: 256 }).notNull(),
+/**
+ * document_chunk_partitioned
+ *
+ * - document_chunk 를 user_id 기준 HASH 파티션(16개, document_chunk_p00 ~ p15)으로 옮기기 위한 shadow 테이블
+ * - 파티션 구성 / 동기화 트리거는 drizzle 로 표현할 수 없으므로 migration(0007) + src/schema/document_chunk_partitioning.py 가 관리합니다.
+ * - 파티션 키가 PK 에 포함되어야 하므로 PK 는 (document_chunk_id, user_id) 입니다.
+ * - swap 이후에는 이 테이블이 document_chunk 이름을 이어받으므로, 그 시점에 두 정의를 합치는 migration 을 생성합니다.
+ */
+export const documentChunksPartitioned = pgTable(
+  'document_chunk_partitioned',
+  {
+    documentChunkId: uuid('document_chunk_id').notNull().defaultRandom(),
+    documentContentId: uuid('document_content_id').notNull(),
 
-    createdAt: timestamp('created_at', { withTimezone: true })
-      .defaultNow()
-      .notNull(),
-    updatedAt: timestamp('updated_at', { withTimezone: true })
-      .defaultNow()
-      .notNull(),
-    deletedAt: timestamp('deleted_at', { withTimezone: true }),
+    ...documentChunkColumns(),
   },
   (table) => ({
-    // vector similarity index; requires pgvector extension
-    chunkEmbeddingIvfflatIdx: index('document_chunk_embedding_ivfflat_idx')
-      .using('ivfflat', table.chunkEmbedding.op('vector_cosine_ops'))
-      .with({ lists: 100 }),
+    pk: primaryKey({
+      name: 'document_chunk_partitioned_document_chunk_id_user_id_pk',
+      columns: [table.documentChunkId, table.userId],
+    }),
+
+    // swap 후 이름이 그대로 이어지도록 document_chunk 의 FK 와 같은 이름을 씁니다
+    documentContentFk: foreignKey({
+      name: 'document_chunk_document_content_id_document_content_document_content_id_fk',
+      columns: [table.documentContentId],
+      foreignColumns: [documentContents.documentContentId],
+    }).onDelete('cascade'),
+
+    ...documentChunkIndexes(table, '_part'),
   })
 );
 
@@ -268,4 +416,7 @@ export type NewDocumentRelation = typeof documentRelations.$inferInsert;
 export type DocumentChunk = typeof documentChunks.$inferSelect;
 export type NewDocumentChunk = typeof documentChunks.$inferInsert;
 
+export type DocumentChunkPartitioned =
+  typeof documentChunksPartitioned.$inferSelect;
+
 
@@ -2,6 +2,7 @@ export * from './arcyou-chat-drizzle';
 export * from './auth-drizzle';
 export * from './document-ai-drizzle';
 export * from './document-drizzle';
+export * from './maintenance-drizzle';
 export * from './outbox-drizzle';
 export * from './user-drizzle';
 
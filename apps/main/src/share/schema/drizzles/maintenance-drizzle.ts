@@ -0,0 +1,45 @@
+import {
+  bigserial,
+  index,
+  integer,
+  jsonb,
+  pgTable,
+  real,
+  text,
+  timestamp,
+} from 'drizzle-orm/pg-core';
+import { sql } from 'drizzle-orm';
+
+// vector index maintenance runs (sidecar: src/processing/maintenance/vector_index_maintenance.py)
+// - actions: per-relation rebuild/analyze actions taken in this run
+// - relations: per-relation counters (live rows, insert/delete totals at last rebuild) used as the churn baseline
+export const vectorIndexMaintenanceRuns = pgTable(
+  'vector_index_maintenance_run',
+  {
+    id: bigserial('id', { mode: 'number' }).primaryKey().notNull(),
+    indexName: text('index_name').notNull(),
+    actions: jsonb('actions').default(sql`'[]'::jsonb`).notNull(),
+    relations: jsonb('relations').default(sql`'{}'::jsonb`).notNull(),
+    probeQueries: integer('probe_queries').default(0).notNull(),
+    recallBefore: real('recall_before'),
+    recallAfter: real('recall_after'),
+    latencyMsP50Before: real('latency_ms_p50_before'),
+    latencyMsP50After: real('latency_ms_p50_after'),
+    latencyMsP95Before: real('latency_ms_p95_before'),
+    latencyMsP95After: real('latency_ms_p95_after'),
+    error: text('error'),
+    startedAt: timestamp('started_at', { withTimezone: true })
+      .default(sql`NOW()`)
+      .notNull(),
+    finishedAt: timestamp('finished_at', { withTimezone: true }),
+  },
+  (table) => ({
+    indexStartedIdx: index('vector_index_maintenance_run_index_started_idx').on(
+      table.indexName,
+      table.startedAt
+    ),
+  })
+);
+
+export type VectorIndexMaintenanceRun = typeof vectorIndexMaintenanceRuns.$inferSelect;
+export type NewVectorIndexMaintenanceRun = typeof vectorIndexMaintenanceRuns.$inferInsert;
@@ -11,24 +11,51 @@ FastAPI 사이드카 서버 진입점.
 - POST /tools/embed-search  -> query_embed_search
 - POST /tools/text-search   -> query_text_search
 - POST /tools/tree-list     -> query_tree_list
+- POST /tools/tree-children -> query_tree_children
+- POST /rag/invoke / /rag/stream -> RAGAgent.ainvoke / astream (비동기)
 """
 
 import importlib
+import json
 import logging
+import time
 import uuid
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
+from src.processing.embedding.query_cache import get_query_cache_stats
+from src.processing.maintenance.prune_superseded_chunks import start_background_pruner
+from src.processing.maintenance.vector_index_maintenance import start_vector_index_maintainer
+from src.processing.rag.agent_timing import RunTrace, get_agent_timing_stats
+from src.processing.rag.answer_cache import get_answer_cache_stats
+from src.processing.rag.context_packer import get_packing_stats
+from src.processing.rag.speculation import get_speculation_stats
 from src.processing.storage.r2_client import download_to_temp
-from src.processing.tools.query_embed_search import query_embed_search
-from src.processing.tools.query_text_search import query_text_search
-from src.processing.tools.queyr_tree_list import query_tree_list
+from src.processing.tools.query_embed_search import (
+    query_embed_search,
+    query_embed_search_batch,
+    query_embed_search_page,
+)
+from src.processing.tools.query_text_search import (
+    query_text_search,
+    query_text_search_batch,
+    query_text_search_page,
+)
+from src.processing.tools.queyr_tree_list import (
+    query_tree_children,
+    query_tree_list,
+    query_tree_list_page,
+)
+from src.processing.tools.tree_cache import get_tree_cache_stats, start_tree_cache_listener
 from src.schema.db import get_session
+from src.schema.index_verifier import get_index_status, start_index_verifier
 from src.schema.document_schema import Document
 
 # ---------------------------------------------------------------------------
@@ -43,6 +70,16 @@ _UPLOAD_ROOT = _BASE_DIR / "uploads"
 # 전처리 파이프라인 모듈 (0_pipeline.py) 동적 로드
 _PIPELINE_MOD = importlib.import_module("src.preprocessing.0_pipeline")
 
+
+def _rag_agent_module() -> Any:
+    """
+    RAG 에이전트 모듈 지연 로드.
+
+    - langchain / langgraph 의존성은 /rag 엔드포인트를 쓸 때만 필요하므로 첫 요청 시 import 한다.
+    """
+    return importlib.import_module("src.processing.rag.rag_agent")
+
+
 # 로깅 설정
 logger = logging.getLogger(__name__)
 logging.basicConfig(
@@ -77,6 +114,60 @@ class EmbedSearchRequest(BaseModel):
         default=None,
         description="ltree 기반 Document.path prefix (예: 'root.demo')",
     )
+    oversample: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=100,
+        description="binary quantize 후보 배수 (top_k × oversample 개를 코사인 재정렬, 기본: EMBED_SEARCH_OVERSAMPLE)",
+    )
+    include_history: bool = Field(
+        default=False,
+        description="True 이면 최신 버전(latest_content_id)이 아닌 과거 content 버전 청크도 검색",
+    )
+    rerank: Optional[bool] = Field(
+        default=None,
+        description="cross-encoder 재순위화 사용 여부 (기본: RERANK_ENABLED)",
+    )
+    rerank_multiplier: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=20,
+        description="재순위화 후보 배수 (top_k × rerank_multiplier 개를 채점, 기본: RERANK_CANDIDATE_MULTIPLIER)",
+    )
+    rerank_budget_ms: Optional[float] = Field(
+        default=None,
+        ge=0,
+        le=10000,
+        description="재순위화 지연 예산(ms). 초과 시 남은 후보는 벡터 순서 유지 (0: 제한 없음, 기본: RERANK_BUDGET_MS)",
+    )
+    mode: Optional[Literal["flat", "hierarchical"]] = Field(
+        default=None,
+        description="검색 방식. hierarchical 은 문서 단위 벡터로 상위 문서를 고른 뒤 그 안에서 청크 검색 (기본: EMBED_SEARCH_MODE)",
+    )
+    doc_k: Optional[int] = Field(
+        default=None,
+        ge=1,
+        le=500,
+        description="hierarchical 모드에서 먼저 고를 문서 수 (기본: EMBED_SEARCH_DOC_K)",
+    )
+    context_window: int = Field(
+        default=0,
+        ge=0,
+        le=10,
+        description="히트 주변 position ± n 청크를 함께 반환 (같은 content 의 겹치는 창은 병합)",
+    )
+
+
+class ChunkContextItem(BaseModel):
+    """검색 히트 주변 청크를 병합한 context window."""
+
+    position_start: int
+    position_end: int
+    content: str
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    chunk_ids: List[str]
+    hit_chunk_ids: List[str]
 
 
 class EmbedSearchResultItem(BaseModel):
@@ -90,6 +181,12 @@ class EmbedSearchResultItem(BaseModel):
     position: Optional[int]
     chunk_content: str
     similarity: float
+    rerank_score: Optional[float] = None
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    block_ids: Optional[List[str]] = None
+    bboxes: Optional[List[Dict[str, Any]]] = None
+    context: Optional[ChunkContextItem] = None
 
 
 class TextSearchRequest(BaseModel):
@@ -102,6 +199,16 @@ class TextSearchRequest(BaseModel):
         default=None,
         description="ltree 기반 Document.path prefix (예: 'root.demo')",
     )
+    include_history: bool = Field(
+        default=False,
+        description="True 이면 최신 버전(latest_content_id)이 아닌 과거 content 버전 청크도 검색",
+    )
+    context_window: int = Field(
+        default=0,
+        ge=0,
+        le=10,
+        description="히트 주변 position ± n 청크를 함께 반환 (같은 content 의 겹치는 창은 병합)",
+    )
 
 
 class TextSearchResultItem(BaseModel):
@@ -115,6 +222,76 @@ class TextSearchResultItem(BaseModel):
     position: Optional[int]
     chunk_content: str
     rank: float
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
+    block_ids: Optional[List[str]] = None
+    bboxes: Optional[List[Dict[str, Any]]] = None
+    context: Optional[ChunkContextItem] = None
+
+
+class BatchSearchRequest(BaseModel):
+    """여러 질의 × 여러 path prefix 배치 검색 요청 바디 (embed / text 공통)."""
+
+    user_id: str = Field(..., description="검색 대상 사용자 UUID (문자열)")
+    queries: List[str] = Field(..., min_length=1, max_length=20, description="검색 질의 목록")
+    top_k: int = Field(5, ge=1, le=100, description="질의별 반환할 최대 청크 개수")
+    path_prefixes: List[str] = Field(
+        default_factory=list,
+        max_length=50,
+        description="ltree 기반 Document.path prefix 목록 (비어 있으면 전체, 있으면 어느 하나의 하위)",
+    )
+    include_history: bool = Field(
+        default=False,
+        description="True 이면 최신 버전(latest_content_id)이 아닌 과거 content 버전 청크도 검색",
+    )
+
+
+class EmbedSearchBatchResultItem(BaseModel):
+    """query_embed_search_batch 질의별 결과."""
+
+    query: str
+    results: List[EmbedSearchResultItem]
+
+
+class TextSearchBatchResultItem(BaseModel):
+    """query_text_search_batch 질의별 결과."""
+
+    query: str
+    results: List[TextSearchResultItem]
+
+
+class SearchPageRequest(BaseModel):
+    """keyset 커서 기반 검색 페이지 요청 바디 (embed / text 공통)."""
+
+    user_id: str = Field(..., description="검색 대상 사용자 UUID (문자열)")
+    query: str = Field(..., description="검색 질의 문자열")
+    page_size: int = Field(20, ge=1, le=100, description="페이지당 최대 청크 개수")
+    path_prefix: Optional[str] = Field(
+        default=None,
+        description="ltree 기반 Document.path prefix (예: 'root.demo')",
+    )
+    include_history: bool = Field(
+        default=False,
+        description="True 이면 최신 버전(latest_content_id)이 아닌 과거 content 버전 청크도 검색",
+    )
+    cursor: Optional[str] = Field(
+        default=None,
+        description="직전 응답의 next_cursor (없으면 첫 페이지). 같은 조건의 요청에만 사용할 수 있습니다.",
+    )
+
+
+class EmbedSearchPage(BaseModel):
+    """query_embed_search_page 응답."""
+
+    items: List[EmbedSearchResultItem]
+    next_cursor: Optional[str] = None
+
+
+class TextSearchPage(BaseModel):
+    """query_text_search_page 응답."""
+
+    items: List[TextSearchResultItem]
+    next_cursor: Optional[str] = None
 
 
 class TreeListRequest(BaseModel):
@@ -144,6 +321,86 @@ class TreeListItem(BaseModel):
     relative_path: str
 
 
+class TreeListPageRequest(TreeListRequest):
+    """path keyset 커서 기반 문서 트리 페이지 요청 바디."""
+
+    page_size: int = Field(200, ge=1, le=1000, description="페이지당 최대 문서 개수")
+    cursor: Optional[str] = Field(
+        default=None,
+        description="직전 응답의 next_cursor (없으면 첫 페이지). 같은 조건의 요청에만 사용할 수 있습니다.",
+    )
+
+
+class TreeListPage(BaseModel):
+    """query_tree_list_page 응답."""
+
+    items: List[TreeListItem]
+    next_cursor: Optional[str] = None
+
+
+class TreeChildrenRequest(BaseModel):
+    """문서 트리 한 단계(직속 자식) 펼침 요청 바디."""
+
+    user_id: str = Field(..., description="대상 사용자 UUID (문자열)")
+    parent_path: Optional[str] = Field(
+        default=None,
+        description="펼칠 부모 문서 경로. None이거나 빈 문자열이면 최상위 문서를 조회합니다.",
+    )
+    page_size: int = Field(100, ge=1, le=1000, description="페이지당 최대 자식 개수")
+    cursor: Optional[str] = Field(
+        default=None,
+        description="직전 응답의 next_cursor (없으면 첫 페이지). 같은 부모 경로 요청에만 사용할 수 있습니다.",
+    )
+
+
+class TreeChildItem(BaseModel):
+    """query_tree_children 결과 아이템 스키마."""
+
+    document_id: str
+    name: Optional[str]
+    path: str
+    kind: str
+    level: int
+    child_count: int = Field(..., description="직속 자식 문서 수")
+    descendant_count: int = Field(..., description="전체 하위 문서 수")
+
+
+class TreeChildrenPage(BaseModel):
+    """query_tree_children 응답."""
+
+    parent_path: Optional[str] = None
+    items: List[TreeChildItem]
+    next_cursor: Optional[str] = None
+
+
+class RagQueryRequest(BaseModel):
+    """RAG 에이전트 질의 요청 바디."""
+
+    user_id: str = Field(..., description="대상 사용자 UUID (문자열)")
+    query: str = Field(..., min_length=1, description="사용자 질문")
+    path_prefix: Optional[str] = Field(
+        default=None,
+        description="검색 범위를 제한할 ltree path prefix (예: 'root.demo')",
+    )
+    model_name: Optional[str] = Field(default=None, description="OpenAI 채팅 모델명 (없으면 기본 모델)")
+    speculative: Optional[bool] = Field(
+        default=None,
+        description="첫 LLM 호출과 동시에 원 질의 검색을 먼저 시작할지 여부 (없으면 RAG_SPECULATIVE_RETRIEVAL)",
+    )
+    use_cache: Optional[bool] = Field(
+        default=None,
+        description="비슷한 질문의 캐시 답변을 사용할지 여부 (없으면 RAG_ANSWER_CACHE)",
+    )
+
+
+class RagAnswer(BaseModel):
+    """RAG 에이전트 최종 답변."""
+
+    answer: str
+    cached: bool = False
+    timing: Optional[Dict[str, Any]] = Field(default=None, description="지연 시간 계측 요약 (TTFT/LLM/도구 시간, 토큰 수)")
+
+
 class DocumentParseRequest(BaseModel):
     """기존 Document에 대한 전처리(파싱/청킹/임베딩) 요청 바디."""
 
@@ -154,21 +411,82 @@ class DocumentParseRequest(BaseModel):
     )
 
 
+@app.on_event("startup")
+def start_maintenance_jobs() -> None:
+    """과거 content 버전 청크 정리 / 벡터 인덱스 유지보수 작업 + 트리 캐시 NOTIFY 리스너 + 인덱스 점검 시작."""
+    start_background_pruner()
+    start_vector_index_maintainer()
+    start_tree_cache_listener()
+    start_index_verifier()
+
+
 @app.get("/")
 async def health_check() -> Dict[str, Any]:
-    """헬스 체크 및 간단한 정보 제공."""
+    """헬스 체크 및 간단한 정보 제공. (인덱스 점검 결과가 비정상이면 status=degraded)"""
+    index_status = get_index_status()
     return {
-        "status": "ok",
+        "status": "degraded" if index_status is not None and not index_status["healthy"] else "ok",
+        "indexes": index_status,
         "service": "ArcYou Sidecar Tools API",
         "endpoints": [
             "/internal/documents/{documentId}/parse",
             "/tools/embed-search",
+            "/tools/embed-search/batch",
+            "/tools/embed-search/page",
             "/tools/text-search",
+            "/tools/text-search/batch",
+            "/tools/text-search/page",
             "/tools/tree-list",
+            "/tools/tree-list/page",
+            "/tools/tree-children",
+            "/rag/invoke",
+            "/rag/stream",
+            "/internal/metrics/query-embedding-cache",
+            "/internal/metrics/tree-cache",
+            "/internal/metrics/rag-speculation",
+            "/internal/metrics/rag-context-packing",
+            "/internal/metrics/rag-answer-cache",
+            "/internal/metrics/rag-agent-timing",
         ],
     }
 
 
+@app.get("/internal/metrics/query-embedding-cache")
+async def query_embedding_cache_metrics() -> Dict[str, Any]:
+    """질의 임베딩 캐시 지표 (현재 워커 프로세스 기준 히트/미스/히트율 등)."""
+    return get_query_cache_stats()
+
+
+@app.get("/internal/metrics/tree-cache")
+async def tree_cache_metrics() -> Dict[str, Any]:
+    """문서 트리 캐시 지표 (현재 워커 프로세스 기준 히트/미스/무효화/리스너 연결 상태 등)."""
+    return get_tree_cache_stats()
+
+
+@app.get("/internal/metrics/rag-speculation")
+async def rag_speculation_metrics() -> Dict[str, Any]:
+    """RAG 추측 검색 지표 (현재 워커 프로세스 기준 실행 수/적중률/버린 추측 검색 수 등)."""
+    return get_speculation_stats()
+
+
+@app.get("/internal/metrics/rag-context-packing")
+async def rag_context_packing_metrics() -> Dict[str, Any]:
+    """RAG 검색 결과 패킹 지표 (현재 워커 프로세스 기준 입력/출력/절감 토큰, 중복/병합/잘림 수 등)."""
+    return get_packing_stats()
+
+
+@app.get("/internal/metrics/rag-answer-cache")
+async def rag_answer_cache_metrics() -> Dict[str, Any]:
+    """RAG 답변 캐시 지표 (현재 워커 프로세스 기준 조회/적중/근거 변경 무효화/저장 수 등)."""
+    return get_answer_cache_stats()
+
+
+@app.get("/internal/metrics/rag-agent-timing")
+async def rag_agent_timing_metrics() -> Dict[str, Any]:
+    """RAG 에이전트 지연 시간 지표 (TTFT / LLM 호출 / 도구 호출의 embed·db 시간 p50·p95 등, 현재 워커 프로세스 기준)."""
+    return get_agent_timing_stats()
+
+
 @app.post(
     "/internal/documents/{document_id}/parse",
     status_code=200,
@@ -288,14 +606,24 @@ async def embed_search_endpoint(payload: EmbedSearchRequest) -> List[Dict[str, A
     """
     logger.info(
         f"[embed-search] 요청: user_id={payload.user_id}, query={payload.query[:100]}, "
-        f"top_k={payload.top_k}, path_prefix={payload.path_prefix}"
+        f"top_k={payload.top_k}, path_prefix={payload.path_prefix}, rerank={payload.rerank}"
     )
     try:
-        results = query_embed_search(
+        # 임베딩/DB 조회/cross-encoder 채점은 블로킹 작업이므로 이벤트 루프 밖(스레드풀)에서 실행
+        results = await run_in_threadpool(
+            query_embed_search,
             user_id=payload.user_id,
             query=payload.query,
             top_k=payload.top_k,
             path_prefix=payload.path_prefix,
+            oversample=payload.oversample,
+            include_history=payload.include_history,
+            rerank=payload.rerank,
+            rerank_multiplier=payload.rerank_multiplier,
+            rerank_budget_ms=payload.rerank_budget_ms,
+            mode=payload.mode,
+            doc_k=payload.doc_k,
+            context_window=payload.context_window,
         )
         result_count = len(results)
         if result_count > 0:
@@ -309,6 +637,8 @@ async def embed_search_endpoint(payload: EmbedSearchRequest) -> List[Dict[str, A
         else:
             logger.info("[embed-search] 응답: 결과 없음")
         return results
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:  # pragma: no cover - FastAPI에서 공통 에러로 처리
         logger.error(f"[embed-search] 오류: {exc}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(exc)) from exc
@@ -331,6 +661,8 @@ async def text_search_endpoint(payload: TextSearchRequest) -> List[Dict[str, Any
             query=payload.query,
             top_k=payload.top_k,
             path_prefix=payload.path_prefix,
+            include_history=payload.include_history,
+            context_window=payload.context_window,
         )
         result_count = len(results)
         if result_count > 0:
@@ -349,6 +681,67 @@ async def text_search_endpoint(payload: TextSearchRequest) -> List[Dict[str, Any
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
+@app.post("/tools/embed-search/batch", response_model=List[EmbedSearchBatchResultItem])
+async def embed_search_batch_endpoint(payload: BatchSearchRequest) -> List[Dict[str, Any]]:
+    """
+    여러 질의 × 여러 path prefix 임베딩 검색을 한 번에 수행하는 엔드포인트.
+
+    - 질의 임베딩은 한 번의 forward pass, 검색은 단일 SQL (unnest + LATERAL top-k)
+    - 결과는 질의별로 묶어 반환합니다.
+    """
+    logger.info(
+        f"[embed-search/batch] 요청: user_id={payload.user_id}, queries={len(payload.queries)}, "
+        f"path_prefixes={len(payload.path_prefixes)}, top_k={payload.top_k}"
+    )
+    try:
+        results = await run_in_threadpool(
+            query_embed_search_batch,
+            user_id=payload.user_id,
+            queries=payload.queries,
+            top_k=payload.top_k,
+            path_prefixes=payload.path_prefixes,
+            include_history=payload.include_history,
+        )
+        logger.info(
+            f"[embed-search/batch] 응답: 질의 {len(results)}개, "
+            f"결과 {sum(len(group['results']) for group in results)}개"
+        )
+        return results
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:  # pragma: no cover
+        logger.error(f"[embed-search/batch] 오류: {exc}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@app.post("/tools/text-search/batch", response_model=List[TextSearchBatchResultItem])
+async def text_search_batch_endpoint(payload: BatchSearchRequest) -> List[Dict[str, Any]]:
+    """
+    여러 질의 × 여러 path prefix 텍스트 검색을 단일 SQL (unnest + LATERAL top-k) 로 수행하는 엔드포인트.
+    """
+    logger.info(
+        f"[text-search/batch] 요청: user_id={payload.user_id}, queries={len(payload.queries)}, "
+        f"path_prefixes={len(payload.path_prefixes)}, top_k={payload.top_k}"
+    )
+    try:
+        results = await run_in_threadpool(
+            query_text_search_batch,
+            user_id=payload.user_id,
+            queries=payload.queries,
+            top_k=payload.top_k,
+            path_prefixes=payload.path_prefixes,
+            include_history=payload.include_history,
+        )
+        logger.info(
+            f"[text-search/batch] 응답: 질의 {len(results)}개, "
+            f"결과 {sum(len(group['results']) for group in results)}개"
+        )
+        return results
+    except Exception as exc:  # pragma: no cover
+        logger.error(f"[text-search/batch] 오류: {exc}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
 @app.post("/tools/tree-list", response_model=List[TreeListItem])
 async def tree_list_endpoint(payload: TreeListRequest) -> List[Dict[str, Any]]:
     """
@@ -383,6 +776,184 @@ async def tree_list_endpoint(payload: TreeListRequest) -> List[Dict[str, Any]]:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
+@app.post("/tools/embed-search/page", response_model=EmbedSearchPage)
+async def embed_search_page_endpoint(payload: SearchPageRequest) -> Dict[str, Any]:
+    """
+    임베딩 검색 결과를 (distance, chunk_id) keyset 커서로 페이지 단위 조회하는 엔드포인트.
+    """
+    logger.info(
+        f"[embed-search/page] 요청: user_id={payload.user_id}, query={payload.query[:100]}, "
+        f"page_size={payload.page_size}, cursor={'yes' if payload.cursor else 'no'}"
+    )
+    try:
+        page = await run_in_threadpool(
+            query_embed_search_page,
+            user_id=payload.user_id,
+            query=payload.query,
+            page_size=payload.page_size,
+            path_prefix=payload.path_prefix,
+            include_history=payload.include_history,
+            cursor=payload.cursor,
+        )
+        logger.info(f"[embed-search/page] 응답: 결과 {len(page['items'])}개, 다음 페이지={page['next_cursor'] is not None}")
+        return page
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:  # pragma: no cover
+        logger.error(f"[embed-search/page] 오류: {exc}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@app.post("/tools/text-search/page", response_model=TextSearchPage)
+async def text_search_page_endpoint(payload: SearchPageRequest) -> Dict[str, Any]:
+    """
+    텍스트 검색 결과를 (rank, chunk_id) keyset 커서로 페이지 단위 조회하는 엔드포인트.
+    """
+    logger.info(
+        f"[text-search/page] 요청: user_id={payload.user_id}, query={payload.query[:100]}, "
+        f"page_size={payload.page_size}, cursor={'yes' if payload.cursor else 'no'}"
+    )
+    try:
+        page = await run_in_threadpool(
+            query_text_search_page,
+            user_id=payload.user_id,
+            query=payload.query,
+            page_size=payload.page_size,
+            path_prefix=payload.path_prefix,
+            include_history=payload.include_history,
+            cursor=payload.cursor,
+        )
+        logger.info(f"[text-search/page] 응답: 결과 {len(page['items'])}개, 다음 페이지={page['next_cursor'] is not None}")
+        return page
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:  # pragma: no cover
+        logger.error(f"[text-search/page] 오류: {exc}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@app.post("/tools/tree-list/page", response_model=TreeListPage)
+async def tree_list_page_endpoint(payload: TreeListPageRequest) -> Dict[str, Any]:
+    """
+    문서 트리를 ltree path keyset 커서로 페이지 단위 조회하는 엔드포인트.
+    """
+    logger.info(
+        f"[tree-list/page] 요청: user_id={payload.user_id}, root_path={payload.root_path}, "
+        f"max_depth={payload.max_depth}, page_size={payload.page_size}, cursor={'yes' if payload.cursor else 'no'}"
+    )
+    try:
+        page = await run_in_threadpool(
+            query_tree_list_page,
+            user_id=payload.user_id,
+            root_path=payload.root_path,
+            max_depth=payload.max_depth,
+            page_size=payload.page_size,
+            cursor=payload.cursor,
+        )
+        logger.info(f"[tree-list/page] 응답: 결과 {len(page['items'])}개, 다음 페이지={page['next_cursor'] is not None}")
+        return page
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:  # pragma: no cover
+        logger.error(f"[tree-list/page] 오류: {exc}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@app.post("/tools/tree-children", response_model=TreeChildrenPage)
+async def tree_children_endpoint(payload: TreeChildrenRequest) -> Dict[str, Any]:
+    """
+    문서 트리를 한 단계씩 펼치는 엔드포인트. (직속 자식 + 자식/하위 문서 수, path keyset 커서 페이지)
+    """
+    logger.info(
+        f"[tree-children] 요청: user_id={payload.user_id}, parent_path={payload.parent_path}, "
+        f"page_size={payload.page_size}, cursor={'yes' if payload.cursor else 'no'}"
+    )
+    try:
+        page = await run_in_threadpool(
+            query_tree_children,
+            user_id=payload.user_id,
+            parent_path=payload.parent_path,
+            page_size=payload.page_size,
+            cursor=payload.cursor,
+        )
+        logger.info(f"[tree-children] 응답: 결과 {len(page['items'])}개, 다음 페이지={page['next_cursor'] is not None}")
+        return page
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:  # pragma: no cover
+        logger.error(f"[tree-children] 오류: {exc}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+def _get_request_agent(payload: RagQueryRequest) -> Any:
+    rag = _rag_agent_module()
+    try:
+        return rag.get_rag_agent(
+            payload.user_id,
+            path_prefix=payload.path_prefix,
+            model_name=payload.model_name or rag.DEFAULT_MODEL,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="user_id는 UUID 문자열이어야 합니다.") from exc
+
+
+@app.post("/rag/invoke", response_model=RagAnswer)
+async def rag_invoke_endpoint(payload: RagQueryRequest) -> Dict[str, Any]:
+    """
+    RAG 에이전트로 질문에 답하는 엔드포인트.
+
+    - RAGAgent.ainvoke 로 실행되므로 LLM/도구 대기 중 워커 스레드를 점유하지 않는다.
+    """
+    logger.info(f"[rag/invoke] 요청: user_id={payload.user_id}, query={payload.query[:100]}, path_prefix={payload.path_prefix}")
+    agent = _get_request_agent(payload)
+    try:
+        result = await agent.ainvoke(payload.query, speculative=payload.speculative, use_cache=payload.use_cache)
+        logger.info(
+            f"[rag/invoke] 응답: answer_len={len(result['answer'])}, messages={len(result['messages'])}, "
+            f"cached={result['cached']}, total_ms={result['timing']['total_ms']}"
+        )
+        return {"answer": result["answer"], "cached": result["cached"], "timing": result["timing"]}
+    except Exception as exc:  # pragma: no cover
+        logger.error(f"[rag/invoke] 오류: {exc}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@app.post("/rag/stream")
+async def rag_stream_endpoint(payload: RagQueryRequest) -> StreamingResponse:
+    """
+    RAG 에이전트 메시지를 SSE(text/event-stream)로 스트리밍하는 엔드포인트.
+
+    - 이벤트 data: {"type": 메시지 타입, "node": LangGraph 노드명, "content": 내용}
+    - 답변 후 {"type": "timing", ...} (지연 시간 계측 요약), 마지막 이벤트: {"type": "done"}
+      (오류 시 {"type": "error", "message": ...})
+    """
+    logger.info(f"[rag/stream] 요청: user_id={payload.user_id}, query={payload.query[:100]}, path_prefix={payload.path_prefix}")
+    agent = _get_request_agent(payload)
+
+    async def _events():
+        trace = RunTrace("astream")
+        try:
+            async for message, metadata in agent.astream(
+                payload.query, speculative=payload.speculative, use_cache=payload.use_cache, trace=trace
+            ):
+                started = time.perf_counter()
+                event = {
+                    "type": getattr(message, "type", "unknown"),
+                    "node": (metadata or {}).get("langgraph_node"),
+                    "content": getattr(message, "content", ""),
+                }
+                data = f"data: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+                trace.add_serialization((time.perf_counter() - started) * 1000.0)
+                yield data
+            yield f"data: {json.dumps({'type': 'timing', **(trace.summary or {})}, ensure_ascii=False)}\n\n"
+            yield f"data: {json.dumps({'type': 'done'})}\n\n"
+        except Exception as exc:  # pragma: no cover
+            logger.error(f"[rag/stream] 오류: {exc}", exc_info=True)
+            yield f"data: {json.dumps({'type': 'error', 'message': str(exc)}, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(_events(), media_type="text/event-stream")
+
+
 if __name__ == "__main__":
     # 개발 편의를 위한 직접 실행 진입점
     import uvicorn
@@ -12,9 +12,13 @@
 from __future__ import annotations
 
 import importlib
+import os
 import uuid
 from typing import Any, Dict
 
+# 청킹 전략: "markdown"(기본, 마크다운 재귀 분할) | "layout"(레이아웃 블록 경계 기준 + 페이지/블록 매핑)
+CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "markdown").strip().lower() or "markdown"
+
 
 def run_pipeline_for_file(
     file_path: str,
@@ -42,11 +46,23 @@ def run_pipeline_for_file(
     # 1) 파싱
     parsed = parse_mod.parse_document_step(file_path)
 
-    # 2) 청킹
-    chunks = chunk_mod.chunk_markdown_step(parsed["markdown"], chunk_size=300, chunk_overlap=0)
+    # 2) 청킹 (청크별 token_count 포함, tokenizer 는 CHUNK_TOKENIZER 환경변수 기준)
+    chunks = chunk_mod.chunk_markdown_step(
+        parsed["markdown"],
+        chunk_size=300,
+        chunk_overlap=0,
+        with_metadata=True,
+        layout=parsed.get("layout") if CHUNK_STRATEGY == "layout" else None,
+    )
 
-    # 3) 임베딩
-    embeddings = embed_mod.embed_chunks_step(chunks)
+    # 3) 임베딩 (토큰 예산 배치)
+    # 청크 token_count 는 임베딩 토크나이저(CHUNK_TOKENIZER=embed)로 센 경우에만 재사용한다.
+    # tiktoken(gpt-4o) 기준 값이면 3_embed 가 Arctic Embed 토크나이저로 다시 센다.
+    token_counts = [chunk["token_count"] for chunk in chunks] if chunk_mod.DEFAULT_TOKENIZER == "embed" else None
+    embeddings = embed_mod.embed_chunks_step(
+        [chunk["text"] for chunk in chunks],
+        token_counts=token_counts,
+    )
 
     # 4) 저장
     result = save_mod.save_to_pg_step(parsed, chunks, embeddings, user_id, document_id)
@@ -43,6 +43,19 @@ _RE_EXCESSIVE_NEWLINES = re.compile(r"\n{3,}")
 _RE_HTML_TAG = re.compile(r"<[^>]+>")
 _RE_SPACES = re.compile(r"\s+")
 
+# Marker 모델(artifact dict)은 프로세스당 1회만 로딩한다.
+# 모델 위치는 MODEL_CACHE_DIR 환경변수(모델 스토어: MODEL_STORE_DIR/marker)를 따른다.
+_marker_models: Optional[Dict[str, Any]] = None
+
+
+def _get_marker_models() -> Dict[str, Any]:
+    """Marker create_model_dict() 결과를 1회 생성 후 캐시."""
+    global _marker_models
+
+    if _marker_models is None:
+        _marker_models = create_model_dict()
+    return _marker_models
+
 
 def parse_document_step(file_path: str) -> Dict[str, Any]:
     """
@@ -134,7 +147,7 @@ def parse_document_step(file_path: str) -> Dict[str, Any]:
         적절한 Provider를 선택해 처리한다.
         """
         converter = PdfConverter(
-            artifact_dict=create_model_dict(),
+            artifact_dict=_get_marker_models(),
         )
         document_local = converter.build_document(pdf_path_str)  # type: ignore[attr-defined]
         return document_local
@@ -4,33 +4,232 @@
 역할:
 - LangChain RecursiveCharacterTextSplitter를 사용해 마크다운 텍스트를
   약 300 토큰 단위로 재귀적 청킹한다.
+- 토큰 길이 측정 기준(tokenizer)을 선택할 수 있다.
+  - "tiktoken": gpt-4o tiktoken 인코딩 (기존 동작)
+  - "embed"   : 3단계 임베딩 모델(Arctic Embed)과 동일한 토크나이저
+- layout 이 주어지면 1단계 레이아웃 블록(헤딩/문단/표)을 순서대로 따라가며
+  블록 경계를 지키는 청크를 만들고, 청크별 페이지 범위/블록 id 를 함께 반환한다.
 
-반환 형식(list[str]):
-- 각 원소는 하나의 청크 텍스트이다.
+반환 형식:
+- 기본(list[str]): 각 원소는 하나의 청크 텍스트이다.
+- with_metadata=True (list[dict]):
+  {
+    "text": str,                   # 청크 텍스트
+    "token_count": int,            # 선택한 tokenizer 기준 토큰 수
+    "page_start": int | None,      # layout 청킹 시 시작 페이지 (layout pageId, 1-based)
+    "page_end": int | None,        # layout 청킹 시 끝 페이지
+    "block_ids": list[str] | None, # layout 청킹 시 포함된 블록 id
+    "bboxes": list[dict] | None,   # layout 청킹 시 [{"page": int, "bbox": [x0, y0, x1, y1]}] (block_ids 와 같은 순서)
+    "start": int | None,           # 마크다운 청킹 시 입력 markdown 내 시작 문자 오프셋
+    "end": int | None,             # 마크다운 청킹 시 끝 문자 오프셋 (markdown[start:end] == text)
+  }
 """
 
 from __future__ import annotations
 
-from typing import List
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+# 3_embed.EMBED_MODEL_ID 와 동일하게 유지 (임베딩 단계와 같은 토크나이저로 길이를 측정)
+EMBED_TOKENIZER_ID = "Snowflake/snowflake-arctic-embed-m-v2.0"
+TIKTOKEN_MODEL_NAME = "gpt-4o"  # 또는 cl100k_base
 
-def chunk_markdown_step(markdown: str, chunk_size: int = 300, chunk_overlap: int = 0) -> List[str]:
+# 파이프라인 기본 길이 측정 기준 ("tiktoken" | "embed")
+DEFAULT_TOKENIZER = os.getenv("CHUNK_TOKENIZER", "tiktoken").strip().lower() or "tiktoken"
+
+# layout 청킹 시 블록 타입별 처리 규칙 (Marker block_type 기준)
+_HEADING_BLOCK_TYPES = {"SectionHeader", "Title"}
+_STANDALONE_BLOCK_TYPES = {"Table", "TableGroup", "Form"}
+_SKIPPED_BLOCK_TYPES = {"Page", "PageHeader", "PageFooter"}
+
+_embed_tokenizer: Any | None = None
+
+
+def _load_embed_tokenizer() -> Any:
+    """임베딩 모델 토크나이저를 1회 로딩 후 캐시."""
+    global _embed_tokenizer
+
+    if _embed_tokenizer is None:
+        from src.processing.storage.model_store import load_tokenizer
+
+        _embed_tokenizer = load_tokenizer(EMBED_TOKENIZER_ID)
+    return _embed_tokenizer
+
+
+def _build_splitter(
+    mode: str,
+    chunk_size: int,
+    chunk_overlap: int,
+) -> Tuple[RecursiveCharacterTextSplitter, Callable[[str], int]]:
+    """tokenizer 모드에 맞는 splitter 와 토큰 길이 함수를 생성한다."""
+    if mode == "embed":
+        hf_tokenizer = _load_embed_tokenizer()
+        splitter = RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+            hf_tokenizer,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+
+        def length_fn(text: str) -> int:
+            return len(hf_tokenizer.encode(text, add_special_tokens=False))
+
+        return splitter, length_fn
+
+    if mode == "tiktoken":
+        import tiktoken
+
+        splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+            model_name=TIKTOKEN_MODEL_NAME,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+        encoding = tiktoken.encoding_for_model(TIKTOKEN_MODEL_NAME)
+
+        def length_fn(text: str) -> int:
+            return len(encoding.encode(text, disallowed_special=()))
+
+        return splitter, length_fn
+
+    raise ValueError(f"지원하지 않는 tokenizer 입니다: {mode} (tiktoken | embed)")
+
+
+def _chunk_layout_blocks(
+    layout: Dict[str, Any],
+    chunk_size: int,
+    splitter: RecursiveCharacterTextSplitter,
+    length_fn: Callable[[str], int],
+) -> List[Dict[str, Any]]:
+    """
+    레이아웃 블록을 순서대로 따라가며 블록 경계를 지키는 청크를 만든다.
+
+    - 헤딩(SectionHeader/Title)은 새 청크를 시작하고, 뒤따르는 본문과 함께 묶인다.
+    - 표(Table 등)는 항상 단독 청크로 분리한다.
+    - 그 외 블록은 chunk_size 를 넘지 않는 범위에서 이어 붙인다.
+    - chunk_size 보다 긴 단일 블록만 splitter 로 분할하며, 조각은 같은 블록 정보를 공유한다.
+    """
+    records: List[Dict[str, Any]] = []
+    parts: List[str] = []
+    refs: List[Dict[str, Any]] = []
+    tokens = 0
+    only_headings = False
+
+    def _flush() -> None:
+        nonlocal parts, refs, tokens, only_headings
+        if parts:
+            text = "\n\n".join(parts)
+            pages = [ref["page"] for ref in refs if isinstance(ref["page"], int)]
+            records.append(
+                {
+                    "text": text,
+                    "token_count": length_fn(text),
+                    "page_start": min(pages) if pages else None,
+                    "page_end": max(pages) if pages else None,
+                    "block_ids": [ref["id"] for ref in refs],
+                    "bboxes": [{"page": ref["page"], "bbox": ref["bbox"]} for ref in refs],
+                    "start": None,
+                    "end": None,
+                }
+            )
+        parts, refs, tokens, only_headings = [], [], 0, False
+
+    pages_val = layout.get("pages") if isinstance(layout, dict) else None
+    for page in pages_val if isinstance(pages_val, list) else []:
+        if not isinstance(page, dict):
+            continue
+        page_id = page.get("pageId")
+        for block in page.get("blocks") or []:
+            if not isinstance(block, dict):
+                continue
+            block_type = str(block.get("type") or "")
+            text = str(block.get("text") or "").strip()
+            if block_type in _SKIPPED_BLOCK_TYPES or not text:
+                continue
+
+            ref = {"id": str(block.get("id")), "page": page_id, "bbox": block.get("bbox")}
+            block_tokens = length_fn(text)
+
+            # 현재 청크가 헤딩뿐이면 본문을 붙여 헤딩만 남는 청크를 피한다.
+            if block_type in _STANDALONE_BLOCK_TYPES or (
+                block_type in _HEADING_BLOCK_TYPES and not only_headings
+            ):
+                _flush()
+
+            if block_tokens > chunk_size:
+                if not only_headings:
+                    _flush()
+                for piece in splitter.split_text(text):
+                    parts.append(piece)
+                    refs.append(ref)
+                    _flush()
+                continue
+
+            if parts and not only_headings and tokens + block_tokens > chunk_size:
+                _flush()
+
+            only_headings = block_type in _HEADING_BLOCK_TYPES and (not parts or only_headings)
+            parts.append(text)
+            refs.append(ref)
+            tokens += block_tokens
+
+            if block_type in _STANDALONE_BLOCK_TYPES:
+                _flush()
+
+    _flush()
+    return records
+
+
+def chunk_markdown_step(
+    markdown: str,
+    chunk_size: int = 300,
+    chunk_overlap: int = 0,
+    tokenizer: str | None = None,
+    with_metadata: bool = False,
+    layout: Optional[Dict[str, Any]] = None,
+) -> List[str] | List[Dict[str, Any]]:
     """
     마크다운 문자열을 토큰 기준으로 청킹한다.
 
-    - chunk_size: 목표 토큰 수(대략적인 기준, tiktoken 기반)
-    - chunk_overlap: 청크 간 중첩 토큰 수
+    - chunk_size: 목표 토큰 수 (tokenizer 기준)
+    - chunk_overlap: 청크 간 중첩 토큰 수 (마크다운 청킹에만 적용)
+    - tokenizer: "tiktoken"(기본, gpt-4o 인코딩) 또는 "embed"(Arctic Embed 토크나이저).
+      None이면 CHUNK_TOKENIZER 환경변수 값을 사용한다.
+    - with_metadata: True이면 청크별 token_count 등 메타데이터를 포함한 dict 리스트를 반환한다.
+      token_count 는 special token(CLS/SEP 등)을 제외한 순수 텍스트 토큰 수이다.
+    - layout: 1단계 레이아웃(dict). 블록이 하나라도 있으면 레이아웃 블록 기준으로 청킹하고
+      페이지 범위/블록 id 를 함께 반환한다. 블록이 없으면 마크다운 청킹으로 폴백한다.
     """
     if not isinstance(markdown, str) or not markdown:
         return []
 
-    splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-        model_name="gpt-4o",  # 또는 cl100k_base
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-    )
-    return splitter.split_text(markdown)
+    mode = (tokenizer or DEFAULT_TOKENIZER).strip().lower()
+    splitter, length_fn = _build_splitter(mode, chunk_size, chunk_overlap)
+
+    records: List[Dict[str, Any]] = []
+    if layout:
+        records = _chunk_layout_blocks(layout, chunk_size, splitter, length_fn)
 
+    if not records:
+        search_from = 0
+        for text in splitter.split_text(markdown):
+            # 청크는 원문 부분 문자열이므로 순서대로 찾아 문자 오프셋을 기록한다.
+            start = markdown.find(text, search_from)
+            if start >= 0:
+                search_from = start + 1
+            records.append(
+                {
+                    "text": text,
+                    "token_count": length_fn(text),
+                    "page_start": None,
+                    "page_end": None,
+                    "block_ids": None,
+                    "bboxes": None,
+                    "start": start if start >= 0 else None,
+                    "end": start + len(text) if start >= 0 else None,
+                }
+            )
 
+    if not with_metadata:
+        return [record["text"] for record in records]
+    return records
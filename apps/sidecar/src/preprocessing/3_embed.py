@@ -4,9 +4,13 @@
 역할:
 - Snowflake Arctic Embed v2.0 (Medium)을 사용해 청킹된 텍스트를 임베딩한다.
 - Matryoshka Representation Learning을 활용해 256차원으로 슬라이싱 후 정규화한다.
+- EMBED_BACKEND 환경변수로 추론 백엔드를 선택한다.
+  - "torch": HF PyTorch 모델 (기본, CUDA/MPS/CPU)
+  - "onnx" : int8 양자화 ONNX Runtime 세션 (CPU 노드용, src.processing.embedding.onnx_backend)
 
 입력:
 - chunks: list[str]
+- token_counts: list[int] | None  # 2단계(tokenizer="embed")에서 계산한 청크별 토큰 수
 
 출력:
 - embeddings: list[list[float]]  # 각 청크당 256차원 정규화 벡터
@@ -14,39 +18,40 @@
 
 from __future__ import annotations
 
-from typing import List
+import os
+from typing import Any, Callable, List, Optional, Tuple
 
 import torch
 import torch.nn.functional as F
-from transformers import AutoModel, AutoTokenizer
+
+from src.processing.storage.model_store import load_model, load_tokenizer
 
 # Snowflake Arctic Embed Model 설정
 EMBED_MODEL_ID = "Snowflake/snowflake-arctic-embed-m-v2.0"  # 로컬 테스트용 Medium 권장
 MATRYOSHKA_DIM = 256
+MAX_SEQ_LENGTH = 8192
 
+# 배치당 (패딩 포함) 최대 토큰 수. 길이가 비슷한 청크끼리 묶어 패딩 낭비를 줄인다.
+EMBED_BATCH_TOKEN_BUDGET = int(os.getenv("EMBED_BATCH_TOKEN_BUDGET", "16384"))
+# 토크나이저가 추가하는 special token(CLS/SEP) 수
+_SPECIAL_TOKENS = 2
 
-def embed_chunks_step(chunks: List[str], model_id: str = EMBED_MODEL_ID, dim: int = MATRYOSHKA_DIM) -> List[List[float]]:
-    """
-    청킹된 텍스트 리스트를 Arctic Embed v2.0으로 임베딩한다.
+# 임베딩 추론 백엔드 ("torch" | "onnx")
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").strip().lower() or "torch"
 
-    - chunks: 마크다운 청크 문자열 리스트
-    - model_id: 사용할 Hugging Face 모델 ID
-    - dim: Matryoshka 슬라이싱 후 사용할 차원 수
-    """
-    if not chunks:
-        return []
 
+def _load_torch_embedder(model_id: str, dim: int) -> Tuple[Any, Callable[[List[str]], List[List[float]]]]:
+    """HF PyTorch 모델을 로딩하고 (tokenizer, encode_batch) 를 반환한다."""
     print(f"[embed] 모델 로딩: {model_id}")
     device = "mps" if torch.backends.mps.is_available() else "cpu"
     if torch.cuda.is_available():
         device = "cuda"
     print(f"[embed] Device: {device}")
 
-    # 토크나이저/모델 로드 (trust_remote_code=True 필요)
-    tokenizer = AutoTokenizer.from_pretrained(model_id, trust_remote_code=True)
-    model = AutoModel.from_pretrained(
+    # 토크나이저/모델 로드 (모델 스토어에 고정된 스냅샷이 있으면 오프라인 로딩)
+    tokenizer = load_tokenizer(model_id)
+    model = load_model(
         model_id,
-        trust_remote_code=True,
         add_pooling_layer=False,
         # xformers 의존성을 비활성화하기 위한 설정
         use_memory_efficient_attention=False,
@@ -56,25 +61,106 @@ def embed_chunks_step(chunks: List[str], model_id: str = EMBED_MODEL_ID, dim: in
     model.to(device)
     model.eval()
 
-    with torch.no_grad():
-        inputs = tokenizer(
-            chunks,
-            padding=True,
-            truncation=True,
-            return_tensors="pt",
-            max_length=8192,
-        ).to(device)
+    def encode_batch(texts: List[str]) -> List[List[float]]:
+        with torch.no_grad():
+            inputs = tokenizer(
+                texts,
+                padding=True,
+                truncation=True,
+                return_tensors="pt",
+                max_length=MAX_SEQ_LENGTH,
+            ).to(device)
+
+            outputs = model(**inputs)
+            # CLS 토큰 벡터 사용
+            full_embeddings = outputs.last_hidden_state[:, 0]
+
+            # Matryoshka 슬라이싱
+            compressed_embeddings = full_embeddings[:, :dim]
+
+            # 정규화
+            compressed_embeddings = F.normalize(compressed_embeddings, p=2, dim=1)
+        return compressed_embeddings.tolist()
+
+    return tokenizer, encode_batch
+
+
+def _load_embedder(model_id: str, dim: int) -> Tuple[Any, Callable[[List[str]], List[List[float]]]]:
+    """EMBED_BACKEND 에 맞는 (tokenizer, encode_batch) 를 반환한다."""
+    if EMBED_BACKEND == "onnx":
+        from src.processing.embedding.onnx_backend import load_onnx_embedder
+
+        print(f"[embed] 백엔드: onnx ({model_id})")
+        return load_onnx_embedder(model_id, dim)
+    if EMBED_BACKEND == "torch":
+        return _load_torch_embedder(model_id, dim)
+    raise ValueError(f"지원하지 않는 EMBED_BACKEND 입니다: {EMBED_BACKEND} (torch | onnx)")
+
+
+def _pack_batches(token_counts: List[int], max_batch_tokens: int) -> List[List[int]]:
+    """
+    청크 인덱스를 토큰 예산 단위 배치로 묶는다.
+
+    - 토큰 수 내림차순으로 정렬한 뒤, (배치 크기 × 배치 내 최대 길이)가
+      max_batch_tokens 를 넘지 않도록 순서대로 채운다.
+    - 단일 청크가 예산보다 길면 해당 청크만 단독 배치로 구성한다.
+    """
+    order = sorted(range(len(token_counts)), key=lambda i: token_counts[i], reverse=True)
+
+    batches: List[List[int]] = []
+    current: List[int] = []
+    current_max = 0
+    for idx in order:
+        length = min(token_counts[idx] + _SPECIAL_TOKENS, MAX_SEQ_LENGTH)
+        padded_max = max(current_max, length)
+        if current and padded_max * (len(current) + 1) > max_batch_tokens:
+            batches.append(current)
+            current, padded_max = [], length
+        current.append(idx)
+        current_max = padded_max
+    if current:
+        batches.append(current)
+    return batches
+
+
+def embed_chunks_step(
+    chunks: List[str],
+    model_id: str = EMBED_MODEL_ID,
+    dim: int = MATRYOSHKA_DIM,
+    token_counts: Optional[List[int]] = None,
+    max_batch_tokens: int = EMBED_BATCH_TOKEN_BUDGET,
+) -> List[List[float]]:
+    """
+    청킹된 텍스트 리스트를 Arctic Embed v2.0으로 임베딩한다.
+
+    - chunks: 마크다운 청크 문자열 리스트
+    - model_id: 사용할 Hugging Face 모델 ID
+    - dim: Matryoshka 슬라이싱 후 사용할 차원 수
+    - token_counts: 청크별 임베딩 토크나이저 기준 토큰 수 (없으면 토크나이저로 직접 계산)
+      다른 토크나이저(tiktoken 등)로 센 값을 넘기면 배치 구성/잘림 경고가 어긋난다.
+    - max_batch_tokens: 배치당 패딩 포함 최대 토큰 수
+
+    반환 순서는 항상 입력 chunks 순서와 동일하다.
+    """
+    if not chunks:
+        return []
 
-        outputs = model(**inputs)
-        # CLS 토큰 벡터 사용
-        full_embeddings = outputs.last_hidden_state[:, 0]
+    tokenizer, encode_batch = _load_embedder(model_id, dim)
 
-        # Matryoshka 슬라이싱
-        compressed_embeddings = full_embeddings[:, :dim]
+    if token_counts is None or len(token_counts) != len(chunks):
+        token_counts = [len(tokenizer.encode(chunk, add_special_tokens=False)) for chunk in chunks]
 
-        # 정규화
-        compressed_embeddings = F.normalize(compressed_embeddings, p=2, dim=1)
+    truncated = sum(1 for count in token_counts if count + _SPECIAL_TOKENS > MAX_SEQ_LENGTH)
+    if truncated:
+        print(f"[embed] 경고: {truncated}개 청크가 max_length={MAX_SEQ_LENGTH}를 초과해 잘립니다.")
 
-    return compressed_embeddings.tolist()
+    batches = _pack_batches(token_counts, max_batch_tokens)
+    print(f"[embed] 청크 {len(chunks)}개 → 배치 {len(batches)}개 (토큰 예산={max_batch_tokens})")
 
+    results: List[List[float] | None] = [None] * len(chunks)
+    for batch in batches:
+        vectors = encode_batch([chunks[i] for i in batch])
+        for idx, vec in zip(batch, vectors):
+            results[idx] = vec
 
+    return results  # type: ignore[return-value]
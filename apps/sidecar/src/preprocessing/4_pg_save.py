@@ -9,7 +9,7 @@
 
 입력:
 - parsed: 1_parse.parse_pdf_step의 반환 dict
-- chunks: 2_chunk.chunk_markdown_step의 반환 list[str]
+- chunks: 2_chunk.chunk_markdown_step의 반환 list[str] 또는 list[dict] (with_metadata=True)
 - embeddings: 3_embed.embed_chunks_step의 반환 list[list[float]]
 - user_id: uuid.UUID
 
@@ -24,20 +24,68 @@
 from __future__ import annotations
 
 import logging
+import math
+import os
 import uuid
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from sqlalchemy import func
 
+from src.processing.maintenance.vector_index_maintenance import analyze_after_ingest
 from src.schema.db import get_session
 from src.schema.document_schema import Document, DocumentContent, DocumentChunk
 
 logger = logging.getLogger(__name__)
 
+# 청크 본문 저장 방식
+# - "text"   : chunk_content 에 청크 텍스트 전체를 저장 (기본)
+# - "offsets": DocumentContent.contents->>'markdown' 기준 (chunk_start, chunk_end) 오프셋과
+#              짧은 미리보기만 저장하고 chunk_content 는 비워 둔다. (오프셋이 없는 청크는 text 로 저장)
+CHUNK_STORAGE_MODE = os.getenv("CHUNK_STORAGE_MODE", "text").strip().lower() or "text"
+CHUNK_PREVIEW_CHARS = 200
+
+
+def _as_chunk_record(chunk: str | Dict[str, Any]) -> Dict[str, Any]:
+    """청크 입력(str 또는 dict)을 DocumentChunk 컬럼 구성에 맞는 dict 로 정규화한다."""
+    if isinstance(chunk, dict):
+        token_count: Optional[int] = chunk.get("token_count")
+        return {
+            "text": str(chunk.get("text") or ""),
+            "token_count": token_count,
+            "page_start": chunk.get("page_start"),
+            "page_end": chunk.get("page_end"),
+            "block_ids": chunk.get("block_ids"),
+            "bboxes": chunk.get("bboxes"),
+            "start": chunk.get("start"),
+            "end": chunk.get("end"),
+        }
+    return {
+        "text": chunk,
+        "token_count": None,
+        "page_start": None,
+        "page_end": None,
+        "block_ids": None,
+        "bboxes": None,
+        "start": None,
+        "end": None,
+    }
+
+
+def _document_embedding(embeddings: List[List[float]]) -> Optional[List[float]]:
+    """청크 임베딩 평균을 L2 정규화한 문서 단위 벡터 (계층 검색의 문서 선택 단계용)."""
+    if not embeddings:
+        return None
+    dim = len(embeddings[0])
+    mean = [sum(vec[i] for vec in embeddings) / len(embeddings) for i in range(dim)]
+    norm = math.sqrt(sum(v * v for v in mean))
+    if norm == 0.0:
+        return None
+    return [v / norm for v in mean]
+
 
 def save_to_pg_step(
     parsed: Dict[str, Any],
-    chunks: List[str],
+    chunks: List[str] | List[Dict[str, Any]],
     embeddings: List[List[float]],
     user_id: uuid.UUID,
     document_id: uuid.UUID,
@@ -46,8 +94,8 @@ def save_to_pg_step(
     파싱/청킹/임베딩 결과를 PostgreSQL에 저장한다.
 
     - Document: 파일 메타데이터
-    - DocumentContent: 마크다운/레이아웃/메트릭(JSONB)
-    - DocumentChunk: 청킹 텍스트 + 임베딩
+    - DocumentContent: 마크다운/레이아웃/메트릭(JSONB) + 문서 단위 임베딩(청크 임베딩 평균)
+    - DocumentChunk: 청킹 텍스트 + 임베딩 (+ 토큰 수, 레이아웃 청킹 시 페이지 범위/블록 id)
     """
     if len(chunks) != len(embeddings):
         raise ValueError(
@@ -101,6 +149,7 @@ def save_to_pg_step(
             user_id=user_id,
             version=latest_version + 1,
             contents=content_json,
+            content_embedding=_document_embedding(embeddings),
         )
         session.add(new_content)
         session.flush()
@@ -113,19 +162,44 @@ def save_to_pg_step(
         doc.latest_content_id = new_content.document_content_id
 
         # 3) DocumentChunk 생성
+        markdown_text = content_json["markdown"]
         chunk_count = 0
-        for idx, (chunk_text, embed_vec) in enumerate(zip(chunks, embeddings)):
+        offset_count = 0
+        for idx, (chunk, embed_vec) in enumerate(zip(chunks, embeddings)):
+            record = _as_chunk_record(chunk)
+            start, end = record["start"], record["end"]
+            has_offsets = (
+                isinstance(start, int)
+                and isinstance(end, int)
+                and markdown_text[start:end] == record["text"]
+            )
+            store_offsets = CHUNK_STORAGE_MODE == "offsets" and has_offsets
+            offset_count += int(store_offsets)
             new_chunk = DocumentChunk(
                 document_chunk_id=uuid.uuid4(),
                 document_content_id=new_content.document_content_id,
+                # 검색 필터용 비정규화 컬럼 (DB 트리거가 동일한 값으로 다시 채운다)
+                user_id=doc.user_id,
+                document_path=doc.path,
                 position=idx,
-                chunk_content=chunk_text,
+                chunk_content=None if store_offsets else record["text"],
+                chunk_start=start if has_offsets else None,
+                chunk_end=end if has_offsets else None,
+                chunk_preview=record["text"][:CHUNK_PREVIEW_CHARS] if store_offsets else None,
+                token_count=record["token_count"],
+                page_start=record["page_start"],
+                page_end=record["page_end"],
+                block_ids=record["block_ids"],
+                bboxes=record["bboxes"],
                 chunk_embedding=embed_vec,
             )
             session.add(new_chunk)
             chunk_count += 1
 
-        logger.info(f"[save_to_pg] DocumentChunk {chunk_count}개 추가 완료, 커밋 시작")
+        logger.info(
+            f"[save_to_pg] DocumentChunk {chunk_count}개 추가 완료 "
+            f"(storage_mode={CHUNK_STORAGE_MODE}, offsets={offset_count}), 커밋 시작"
+        )
 
         session.commit()
 
@@ -134,6 +208,12 @@ def save_to_pg_step(
             f"content_id={new_content.document_content_id}, chunk_count={chunk_count}"
         )
 
+        # 대량 적재 직후 플래너 통계 갱신 (실패해도 저장 결과에는 영향 없음)
+        try:
+            analyze_after_ingest(user_id, chunk_count)
+        except Exception as exc:  # pragma: no cover
+            logger.warning(f"[save_to_pg] 적재 후 ANALYZE 실패: {exc}")
+
         return {
             "document_id": doc.document_id,
             "content_id": new_content.document_content_id,
@@ -0,0 +1,340 @@
+"""
+Arctic Embed ONNX Runtime 백엔드 (CPU, int8 동적 양자화).
+
+- 역할:
+  - HF PyTorch 모델을 ONNX 로 export 한 뒤 int8 동적 양자화(quantize_dynamic)를 적용한다.
+  - ONNX Runtime(CPUExecutionProvider)으로 CLS 임베딩을 계산한다.
+  - 3_embed.embed_chunks_step / query_embed_search.embed_query_to_vector 에서
+    EMBED_BACKEND=onnx 일 때 동일한 인터페이스 뒤에서 사용된다.
+
+주요 함수:
+- export_onnx_model(model_id, output_dir=None, quantize=True) -> Path
+- load_onnx_embedder(model_id, dim) -> (tokenizer, encode_batch)
+- check_parity(texts, model_id, dim) -> dict   # PyTorch 대비 코사인 유사도
+- benchmark(texts, model_id, dim, batch_size, repeats) -> dict   # 처리량 비교
+
+CLI:
+    python -m src.processing.embedding.onnx_backend export
+    python -m src.processing.embedding.onnx_backend parity --min-cosine 0.99
+    python -m src.processing.embedding.onnx_backend bench --batch-size 16
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from src.processing.storage.model_store import MODEL_STORE_DIR, load_model, load_tokenizer
+
+# 3_embed / query_embed_search 와 동일하게 유지
+EMBED_MODEL_ID = "Snowflake/snowflake-arctic-embed-m-v2.0"
+MATRYOSHKA_DIM = 256
+MAX_SEQ_LENGTH = 8192
+
+# export 된 ONNX 모델 루트 디렉터리 (모델별 하위 디렉터리에 model.onnx / model.int8.onnx / 토크나이저 저장)
+ONNX_MODEL_ROOT = Path(os.getenv("EMBED_ONNX_DIR", str(MODEL_STORE_DIR / "onnx")))
+# ONNX Runtime intra-op 스레드 수 (0 이면 ONNX Runtime 기본값)
+ONNX_NUM_THREADS = int(os.getenv("EMBED_ONNX_THREADS", "0"))
+
+_FP32_FILE = "model.onnx"
+_INT8_FILE = "model.int8.onnx"
+_OUTPUT_NAME = "cls_embedding"
+
+_embedders: Dict[Tuple[str, int], Tuple[Any, Callable[[List[str]], List[List[float]]]]] = {}
+_torch_models: Dict[str, Tuple[Any, Any]] = {}
+_lock = threading.Lock()
+
+_SAMPLE_TEXTS = [
+    "두 번째 뇌 개념과 개인 지식 관리 방법",
+    "PostgreSQL pgvector 확장으로 코사인 거리 기반 벡터 검색을 수행한다.",
+    "GPT-4 is a large-scale, multimodal model which can accept image and text inputs.",
+    "회의록: 다음 분기 로드맵과 인프라 비용 절감 방안을 논의했다.",
+    "The quick brown fox jumps over the lazy dog.",
+    "Matryoshka representation learning allows truncating embeddings to fewer dimensions.",
+    "문서 전처리 파이프라인은 파싱, 청킹, 임베딩, 저장 단계로 구성된다.",
+    "Retrieval-augmented generation grounds answers in the user's stored documents.",
+]
+
+
+def _model_dir(model_id: str) -> Path:
+    return ONNX_MODEL_ROOT / model_id.replace("/", "__")
+
+
+def _load_torch_model(model_id: str) -> Tuple[Any, Any]:
+    """3_embed 와 동일한 설정으로 HF PyTorch 모델/토크나이저를 로딩한다 (CPU, fp32, 1회 캐시)."""
+    cached = _torch_models.get(model_id)
+    if cached is not None:
+        return cached
+
+    tokenizer = load_tokenizer(model_id)
+    model = load_model(
+        model_id,
+        add_pooling_layer=False,
+        use_memory_efficient_attention=False,
+        unpad_inputs=False,
+        attn_implementation="eager",
+    )
+    model.eval()
+    _torch_models[model_id] = (tokenizer, model)
+    return tokenizer, model
+
+
+def export_onnx_model(
+    model_id: str = EMBED_MODEL_ID,
+    output_dir: Path | None = None,
+    quantize: bool = True,
+    opset: int = 17,
+) -> Path:
+    """
+    HF 모델을 ONNX 로 export 하고 (선택) int8 동적 양자화를 적용한다.
+
+    - 출력 그래프는 input_ids / attention_mask 를 받아 CLS 토큰 벡터(cls_embedding)만 반환한다.
+    - 반환값: 런타임에서 사용할 ONNX 파일 경로 (quantize=True 이면 model.int8.onnx)
+    """
+    import torch
+
+    out_dir = output_dir or _model_dir(model_id)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    tokenizer, model = _load_torch_model(model_id)
+
+    class _ClsWrapper(torch.nn.Module):
+        def __init__(self, inner: Any) -> None:
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids: Any, attention_mask: Any) -> Any:
+            outputs = self.inner(input_ids=input_ids, attention_mask=attention_mask)
+            return outputs.last_hidden_state[:, 0]
+
+    dummy = tokenizer(["onnx export sample", "샘플 문장"], padding=True, return_tensors="pt")
+    fp32_path = out_dir / _FP32_FILE
+
+    print(f"[onnx] export 시작: {model_id} -> {fp32_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            _ClsWrapper(model),
+            (dummy["input_ids"], dummy["attention_mask"]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=[_OUTPUT_NAME],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                _OUTPUT_NAME: {0: "batch"},
+            },
+            opset_version=opset,
+        )
+    tokenizer.save_pretrained(str(out_dir))
+
+    if not quantize:
+        return fp32_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = out_dir / _INT8_FILE
+    print(f"[onnx] int8 동적 양자화: {int8_path}")
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    return int8_path
+
+
+def load_onnx_embedder(
+    model_id: str = EMBED_MODEL_ID,
+    dim: int = MATRYOSHKA_DIM,
+) -> Tuple[Any, Callable[[List[str]], List[List[float]]]]:
+    """
+    ONNX Runtime 세션/토크나이저를 1회 로딩 후 캐시하고 (tokenizer, encode_batch) 를 반환한다.
+
+    - encode_batch(texts): 배치 단위로 CLS 임베딩 → Matryoshka 슬라이싱 → L2 정규화한 벡터 리스트
+    - 양자화 모델(model.int8.onnx)이 있으면 우선 사용하고, 없으면 fp32 모델을 사용한다.
+    """
+    key = (model_id, dim)
+    with _lock:
+        cached = _embedders.get(key)
+        if cached is not None:
+            return cached
+
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = _model_dir(model_id)
+        onnx_path = model_dir / _INT8_FILE
+        if not onnx_path.is_file():
+            onnx_path = model_dir / _FP32_FILE
+        if not onnx_path.is_file():
+            raise RuntimeError(
+                f"ONNX 모델이 없습니다: {model_dir}. "
+                "`python -m src.processing.embedding.onnx_backend export` 로 먼저 생성하세요."
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_NUM_THREADS > 0:
+            options.intra_op_num_threads = ONNX_NUM_THREADS
+        session = ort.InferenceSession(str(onnx_path), options, providers=["CPUExecutionProvider"])
+        input_names = {inp.name for inp in session.get_inputs()}
+
+        tokenizer = AutoTokenizer.from_pretrained(str(model_dir), trust_remote_code=True)
+
+        def encode_batch(texts: List[str]) -> List[List[float]]:
+            inputs = tokenizer(
+                texts,
+                padding=True,
+                truncation=True,
+                return_tensors="np",
+                max_length=MAX_SEQ_LENGTH,
+            )
+            feeds = {name: np.asarray(value, dtype=np.int64) for name, value in inputs.items() if name in input_names}
+            (cls_embeddings,) = session.run([_OUTPUT_NAME], feeds)
+            compressed = np.asarray(cls_embeddings[:, :dim], dtype=np.float32)
+            norms = np.linalg.norm(compressed, axis=1, keepdims=True)
+            compressed = compressed / np.clip(norms, 1e-12, None)
+            return compressed.tolist()
+
+        print(f"[onnx] 세션 로딩: {onnx_path}")
+        _embedders[key] = (tokenizer, encode_batch)
+        return tokenizer, encode_batch
+
+
+def _embed_torch(texts: List[str], model_id: str, dim: int, batch_size: int) -> np.ndarray:
+    """비교 기준용 PyTorch(fp32, CPU) 임베딩."""
+    import torch
+    import torch.nn.functional as F
+
+    tokenizer, model = _load_torch_model(model_id)
+    vectors: List[np.ndarray] = []
+    with torch.no_grad():
+        for i in range(0, len(texts), batch_size):
+            inputs = tokenizer(
+                texts[i : i + batch_size],
+                padding=True,
+                truncation=True,
+                return_tensors="pt",
+                max_length=MAX_SEQ_LENGTH,
+            )
+            outputs = model(**inputs)
+            compressed = F.normalize(outputs.last_hidden_state[:, 0][:, :dim], p=2, dim=1)
+            vectors.append(compressed.numpy())
+    return np.concatenate(vectors, axis=0)
+
+
+def _embed_onnx(texts: List[str], model_id: str, dim: int, batch_size: int) -> np.ndarray:
+    _, encode_batch = load_onnx_embedder(model_id, dim)
+    vectors: List[List[float]] = []
+    for i in range(0, len(texts), batch_size):
+        vectors.extend(encode_batch(texts[i : i + batch_size]))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def check_parity(
+    texts: Sequence[str] = _SAMPLE_TEXTS,
+    model_id: str = EMBED_MODEL_ID,
+    dim: int = MATRYOSHKA_DIM,
+    batch_size: int = 8,
+) -> Dict[str, float]:
+    """
+    PyTorch 출력 대비 ONNX 출력의 코사인 유사도를 계산한다.
+
+    두 벡터 모두 L2 정규화되어 있으므로 내적이 곧 코사인 유사도이다.
+    """
+    texts = list(texts)
+    reference = _embed_torch(texts, model_id, dim, batch_size)
+    candidate = _embed_onnx(texts, model_id, dim, batch_size)
+    cosines = np.sum(reference * candidate, axis=1)
+    return {
+        "count": float(len(texts)),
+        "min_cosine": float(cosines.min()),
+        "mean_cosine": float(cosines.mean()),
+    }
+
+
+def benchmark(
+    texts: Sequence[str] = _SAMPLE_TEXTS,
+    model_id: str = EMBED_MODEL_ID,
+    dim: int = MATRYOSHKA_DIM,
+    batch_size: int = 8,
+    repeats: int = 5,
+) -> Dict[str, Dict[str, float]]:
+    """
+    PyTorch(fp32) / ONNX Runtime 백엔드의 처리량(texts/sec)을 비교한다.
+
+    - 각 백엔드는 1회 워밍업 후 repeats 회 측정한다. (모델 로딩 시간 제외)
+    """
+    texts = list(texts)
+    runners: Dict[str, Callable[[], Any]] = {
+        "torch": lambda: _embed_torch(texts, model_id, dim, batch_size),
+        "onnx": lambda: _embed_onnx(texts, model_id, dim, batch_size),
+    }
+    report: Dict[str, Dict[str, float]] = {}
+    for name, run in runners.items():
+        run()  # warm-up (모델/세션 로딩 포함)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            run()
+        elapsed = time.perf_counter() - started
+        report[name] = {
+            "seconds_per_pass": elapsed / repeats,
+            "texts_per_second": (len(texts) * repeats) / elapsed if elapsed > 0 else 0.0,
+        }
+    return report
+
+
+def _read_texts(path: str | None) -> List[str]:
+    if not path:
+        return list(_SAMPLE_TEXTS)
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip()]
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(description="Arctic Embed ONNX Runtime 백엔드 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="ONNX export + int8 동적 양자화")
+    p_export.add_argument("--model-id", default=EMBED_MODEL_ID)
+    p_export.add_argument("--output-dir", default=None, help="기본값: EMBED_ONNX_DIR/<model_id>")
+    p_export.add_argument("--no-quantize", action="store_true", help="fp32 ONNX 만 생성")
+
+    p_parity = sub.add_parser("parity", help="PyTorch 대비 코사인 유사도 검증")
+    p_parity.add_argument("--model-id", default=EMBED_MODEL_ID)
+    p_parity.add_argument("--texts-file", default=None, help="한 줄에 한 문장씩 담긴 텍스트 파일")
+    p_parity.add_argument("--min-cosine", type=float, default=0.99, help="허용 최소 코사인 유사도")
+
+    p_bench = sub.add_parser("bench", help="PyTorch / ONNX Runtime 처리량 비교")
+    p_bench.add_argument("--model-id", default=EMBED_MODEL_ID)
+    p_bench.add_argument("--texts-file", default=None, help="한 줄에 한 문장씩 담긴 텍스트 파일")
+    p_bench.add_argument("--batch-size", type=int, default=8)
+    p_bench.add_argument("--repeats", type=int, default=5)
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        out_path = export_onnx_model(
+            args.model_id,
+            Path(args.output_dir) if args.output_dir else None,
+            quantize=not args.no_quantize,
+        )
+        print(f"[onnx] 완료: {out_path}")
+    elif args.command == "parity":
+        result = check_parity(_read_texts(args.texts_file), args.model_id)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        if result["min_cosine"] < args.min_cosine:
+            print(f"[onnx] parity 실패: min_cosine={result['min_cosine']:.4f} < {args.min_cosine}")
+            sys.exit(1)
+    elif args.command == "bench":
+        result = benchmark(
+            _read_texts(args.texts_file),
+            args.model_id,
+            batch_size=args.batch_size,
+            repeats=args.repeats,
+        )
+        print(json.dumps(result, ensure_ascii=False, indent=2))
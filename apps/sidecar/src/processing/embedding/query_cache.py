@@ -0,0 +1,265 @@
+"""
+질의 임베딩 캐시 (LRU + TTL).
+
+- 에이전트는 같은/비슷한 검색을 반복하므로 embed_query_to_vector 의 forward pass 결과를 캐시한다.
+- 키: 정규화한 질의 텍스트 + model_id + 백엔드 + dim
+  - 정규화: 유니코드 NFKC, 앞뒤 공백 제거, 연속 공백 1칸으로 축약 (대소문자는 유지)
+  - 임베딩도 정규화된 텍스트로 계산하므로 같은 키는 항상 같은 벡터를 가진다.
+  - 정규화 결과가 빈 문자열(공백뿐인 질의)이면 캐시/임베딩하지 않고 ValueError 를 던진다.
+- 값: float32 바이트열 (256차원 기준 1KB) + 생성 시각. TTL 이 지나면 만료된다.
+- 1차: 프로세스 메모리 LRU (QUERY_EMBED_CACHE_MAX_ENTRIES)
+- 2차(선택): QUERY_EMBED_CACHE_SQLITE_PATH 를 지정하면 같은 호스트의 모든 uvicorn 워커가 공유하는 SQLite(WAL) 저장소
+
+주요 함수:
+- get_or_compute_query_embedding(query, model_id, backend, dim, compute) -> list[float]
+- get_or_compute_query_embeddings(queries, model_id, backend, dim, compute_batch) -> list[list[float]]
+- get_query_cache_stats() -> dict
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+QUERY_EMBED_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_EMBED_CACHE_MAX_ENTRIES", "4096"))
+QUERY_EMBED_CACHE_TTL_SECONDS = float(os.getenv("QUERY_EMBED_CACHE_TTL_SECONDS", "3600"))
+# 비어 있으면 공유 저장소를 사용하지 않는다.
+QUERY_EMBED_CACHE_SQLITE_PATH = os.getenv("QUERY_EMBED_CACHE_SQLITE_PATH", "").strip()
+
+_RE_SPACES = re.compile(r"\s+")
+# 공유 저장소 만료 행 정리 주기 (쓰기 N회마다)
+_SHARED_PRUNE_EVERY = 256
+
+_cache: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+_lock = threading.Lock()
+_stats: Dict[str, int] = {
+    "hits": 0,
+    "shared_hits": 0,
+    "misses": 0,
+    "evictions": 0,
+    "expirations": 0,
+}
+
+_shared_conn: Optional[sqlite3.Connection] = None
+_shared_lock = threading.Lock()
+_shared_writes = 0
+
+
+def normalize_query(query: str) -> str:
+    """캐시 키/임베딩 입력용 질의 정규화."""
+    return _RE_SPACES.sub(" ", unicodedata.normalize("NFKC", query)).strip()
+
+
+def _cache_key(normalized: str, model_id: str, backend: str, dim: int) -> str:
+    raw = f"{model_id}\x1f{backend}\x1f{dim}\x1f{normalized}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+def _get_shared_conn() -> Optional[sqlite3.Connection]:
+    """공유 SQLite 저장소 연결을 1회 생성 후 캐시한다. (경로 미지정 시 None)"""
+    global _shared_conn
+
+    if not QUERY_EMBED_CACHE_SQLITE_PATH:
+        return None
+    if _shared_conn is None:
+        conn = sqlite3.connect(QUERY_EMBED_CACHE_SQLITE_PATH, timeout=1.0, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_embedding ("
+            "  cache_key TEXT PRIMARY KEY,"
+            "  vector BLOB NOT NULL,"
+            "  created_at REAL NOT NULL"
+            ")"
+        )
+        conn.commit()
+        _shared_conn = conn
+    return _shared_conn
+
+
+def _shared_get(key: str, now: float) -> Optional[Tuple[bytes, float]]:
+    try:
+        with _shared_lock:
+            conn = _get_shared_conn()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT vector, created_at FROM query_embedding WHERE cache_key = ? AND created_at >= ?",
+                (key, now - QUERY_EMBED_CACHE_TTL_SECONDS),
+            ).fetchone()
+    except sqlite3.Error:
+        # 공유 저장소 장애는 캐시 미스로 취급한다.
+        return None
+    return (row[0], row[1]) if row else None
+
+
+def _shared_put(key: str, blob: bytes, created_at: float) -> None:
+    global _shared_writes
+
+    try:
+        with _shared_lock:
+            conn = _get_shared_conn()
+            if conn is None:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO query_embedding (cache_key, vector, created_at) VALUES (?, ?, ?)",
+                (key, blob, created_at),
+            )
+            _shared_writes += 1
+            if _shared_writes % _SHARED_PRUNE_EVERY == 0:
+                conn.execute(
+                    "DELETE FROM query_embedding WHERE created_at < ?",
+                    (created_at - QUERY_EMBED_CACHE_TTL_SECONDS,),
+                )
+            conn.commit()
+    except sqlite3.Error:
+        return
+
+
+def _memory_get(key: str, now: float) -> Optional[bytes]:
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        blob, created_at = entry
+        if now - created_at > QUERY_EMBED_CACHE_TTL_SECONDS:
+            del _cache[key]
+            _stats["expirations"] += 1
+            return None
+        _cache.move_to_end(key)
+        return blob
+
+
+def _memory_put(key: str, blob: bytes, created_at: float) -> None:
+    with _lock:
+        _cache[key] = (blob, created_at)
+        _cache.move_to_end(key)
+        while len(_cache) > QUERY_EMBED_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+            _stats["evictions"] += 1
+
+
+def _lookup(key: str, now: float) -> Optional[bytes]:
+    """메모리 LRU → 공유 SQLite 순으로 조회하고 히트 지표를 갱신한다. (미스 시 None)"""
+    blob = _memory_get(key, now)
+    if blob is not None:
+        with _lock:
+            _stats["hits"] += 1
+        return blob
+
+    shared = _shared_get(key, now)
+    if shared is not None:
+        blob, created_at = shared
+        _memory_put(key, blob, created_at)
+        with _lock:
+            _stats["shared_hits"] += 1
+        return blob
+    return None
+
+
+def get_or_compute_query_embedding(
+    query: str,
+    model_id: str,
+    backend: str,
+    dim: int,
+    compute: Callable[[str], List[float]],
+) -> List[float]:
+    """
+    캐시에서 질의 임베딩을 찾고, 없으면 compute(정규화된 질의)로 계산해 저장한다.
+
+    - 조회 순서: 메모리 LRU → 공유 SQLite → compute
+    - 공유 저장소에서 찾은 값은 메모리 LRU 에도 적재한다. (생성 시각 유지)
+    """
+    return get_or_compute_query_embeddings(
+        [query],
+        model_id=model_id,
+        backend=backend,
+        dim=dim,
+        compute_batch=lambda texts: [compute(texts[0])],
+    )[0]
+
+
+def get_or_compute_query_embeddings(
+    queries: List[str],
+    model_id: str,
+    backend: str,
+    dim: int,
+    compute_batch: Callable[[List[str]], List[List[float]]],
+) -> List[List[float]]:
+    """
+    여러 질의의 임베딩을 캐시에서 찾고, 미스난 질의만 compute_batch 한 번(단일 forward pass)으로 계산한다.
+
+    - 정규화 결과가 같은 질의는 한 번만 계산한다.
+    - 정규화 결과가 빈 질의가 있으면 ValueError (조회/계산 전에 검사)
+    - 반환 순서는 queries 순서와 같다.
+    """
+    now = time.time()
+    normalized = [normalize_query(q) for q in queries]
+    if not all(normalized):
+        raise ValueError("공백만으로 이루어진 질의는 임베딩할 수 없습니다.")
+    keys = [_cache_key(n, model_id, backend, dim) for n in normalized]
+
+    blobs: Dict[str, bytes] = {}
+    missing: List[str] = []
+    missing_texts: List[str] = []
+    for key, text in zip(keys, normalized):
+        if key in blobs or key in missing:
+            continue
+        blob = _lookup(key, now)
+        if blob is None:
+            missing.append(key)
+            missing_texts.append(text)
+        else:
+            blobs[key] = blob
+
+    if missing:
+        with _lock:
+            _stats["misses"] += len(missing)
+        for key, vector in zip(missing, compute_batch(missing_texts)):
+            blob = _pack(vector)
+            _memory_put(key, blob, now)
+            _shared_put(key, blob, now)
+            blobs[key] = blob
+
+    # float32 로 저장된 값과 동일한 정밀도를 반환해 캐시 히트/미스 결과를 일치시킨다.
+    return [_unpack(blobs[key]) for key in keys]
+
+
+def get_query_cache_stats() -> Dict[str, Any]:
+    """캐시 히트율 등 지표를 반환한다."""
+    with _lock:
+        stats: Dict[str, Any] = dict(_stats)
+        stats["entries"] = len(_cache)
+    lookups = stats["hits"] + stats["shared_hits"] + stats["misses"]
+    stats["lookups"] = lookups
+    stats["hit_rate"] = (stats["hits"] + stats["shared_hits"]) / lookups if lookups else 0.0
+    stats["max_entries"] = QUERY_EMBED_CACHE_MAX_ENTRIES
+    stats["ttl_seconds"] = QUERY_EMBED_CACHE_TTL_SECONDS
+    stats["shared_store"] = bool(QUERY_EMBED_CACHE_SQLITE_PATH)
+    return stats
+
+
+def clear_query_cache() -> None:
+    """메모리 캐시와 지표를 초기화한다. (공유 저장소는 유지)"""
+    with _lock:
+        _cache.clear()
+        for key in _stats:
+            _stats[key] = 0
@@ -0,0 +1,113 @@
+"""
+Cross-encoder 재순위화(rerank) 단계.
+
+- 임베딩 검색이 과다 추출한 후보 청크를 (질의, 청크) 쌍 단위로 cross-encoder 에 넣어 관련도 점수를 계산한다.
+- 모델: RERANK_MODEL_ID (기본 BAAI/bge-reranker-v2-m3, 다국어/한국어 지원), model_store 를 통해 오프라인 로딩
+- 배치 구성: 입력 순서(= 벡터 검색 순위) 그대로 batch_size 개씩 묶는다.
+- 지연 예산: 배치 시작 전에 deadline 을 확인하고, 예산을 넘기면 남은 후보는 점수 없이(None) 반환한다.
+  벡터 순위가 높은 후보부터 처리하므로 예산이 모자라도 상위 후보가 먼저 점수를 받는다.
+
+주요 함수:
+- rerank_scores(query, passages, batch_size, budget_ms) -> (scores, stats)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.processing.storage.model_store import RERANK_MODEL_ID, load_sequence_classifier, load_tokenizer
+
+# 배치당 (질의, 청크) 쌍 수
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+# 쌍 하나의 최대 토큰 길이 (질의 + 청크)
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", "512"))
+
+_tokenizer: Any = None
+_model: Any = None
+_device: Optional[str] = None
+_lock = threading.Lock()
+
+
+def _load_reranker(model_id: str = RERANK_MODEL_ID) -> Tuple[Any, Any, str]:
+    """Cross-encoder 모델/토크나이저를 1회 로딩 후 캐시."""
+    global _tokenizer, _model, _device
+
+    with _lock:
+        if _tokenizer is not None and _model is not None and _device is not None:
+            return _tokenizer, _model, _device
+
+        import torch
+
+        device = "mps" if torch.backends.mps.is_available() else "cpu"
+        if torch.cuda.is_available():
+            device = "cuda"
+
+        tokenizer = load_tokenizer(model_id)
+        model = load_sequence_classifier(model_id)
+        model.to(device)
+        model.eval()
+
+        _tokenizer = tokenizer
+        _model = model
+        _device = device
+        return tokenizer, model, device
+
+
+def rerank_scores(
+    query: str,
+    passages: List[str],
+    batch_size: int = RERANK_BATCH_SIZE,
+    budget_ms: Optional[float] = None,
+) -> Tuple[List[Optional[float]], Dict[str, Any]]:
+    """
+    (query, passage) 쌍의 관련도 점수(0~1, sigmoid)를 계산한다.
+
+    - passages: 벡터 검색 순위 순서의 후보 (앞에서부터 점수를 계산한다)
+    - budget_ms: 지연 예산(ms). None 또는 0 이하이면 제한 없음. 첫 배치는 예산과 무관하게 항상 계산한다.
+    - 반환값: (passages 와 같은 순서의 점수 목록 - 예산 초과로 계산하지 못한 항목은 None, 통계 dict)
+    """
+    scores: List[Optional[float]] = [None] * len(passages)
+    stats: Dict[str, Any] = {"scored": 0, "batches": 0, "budget_exhausted": False, "elapsed_ms": 0.0}
+    if not passages:
+        return scores, stats
+
+    import torch
+
+    # 최초 모델 로딩 시간은 요청 예산에 포함하지 않는다
+    tokenizer, model, device = _load_reranker()
+
+    started = time.perf_counter()
+    deadline = started + budget_ms / 1000.0 if budget_ms and budget_ms > 0 else None
+    batch_size = max(1, batch_size)
+
+    # 벡터 순위 순서 유지 (예산 초과 시 하위 후보만 점수 없이 남도록)
+    order = list(range(len(passages)))
+
+    with torch.no_grad():
+        for start in range(0, len(order), batch_size):
+            if deadline is not None and stats["batches"] > 0 and time.perf_counter() >= deadline:
+                stats["budget_exhausted"] = True
+                break
+
+            batch_idx = order[start : start + batch_size]
+            inputs = tokenizer(
+                [query] * len(batch_idx),
+                [passages[i] for i in batch_idx],
+                padding=True,
+                truncation=True,
+                return_tensors="pt",
+                max_length=RERANK_MAX_LENGTH,
+            ).to(device)
+
+            logits = model(**inputs).logits.view(-1).float()
+            for i, score in zip(batch_idx, torch.sigmoid(logits).tolist()):
+                scores[i] = float(score)
+
+            stats["batches"] += 1
+            stats["scored"] += len(batch_idx)
+
+    stats["elapsed_ms"] = (time.perf_counter() - started) * 1000.0
+    return scores, stats
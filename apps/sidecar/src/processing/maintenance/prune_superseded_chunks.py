@@ -0,0 +1,207 @@
+"""
+과거 content 버전 청크 정리 작업.
+
+- 문서가 새 content 버전(document.latest_content_id)으로 갱신되면 이전 버전의 청크는 검색에서 제외되지만
+  벡터/전문 검색 인덱스에는 계속 남는다.
+- 최신 버전이 생성된 지 retention_days 가 지난 과거 버전 청크를 배치 단위로 정리한다.
+  - "soft" : deleted_at 설정 → 트리거가 is_live=false 로 갱신 (is_live 부분 인덱스에서 빠짐)
+  - "purge": 행 삭제 (이미 soft delete 된 과거 버전 청크 포함)
+- 여러 워커/호스트에서 동시에 실행되지 않도록 배치 트랜잭션마다 PostgreSQL 트랜잭션 advisory lock
+  (pg_try_advisory_xact_lock)을 잡는다. 트랜잭션이 끝나면 자동으로 풀리므로 pgbouncer 트랜잭션 풀링에서도
+  다른 백엔드에 락이 남지 않는다.
+  - uvicorn 워커마다 정리 스레드가 뜨지만, 락을 얻지 못한 워커는 해당 주기를 건너뛴다.
+
+주요 함수:
+- prune_superseded_chunks(retention_days, mode, batch_size, dry_run) -> dict
+- start_background_pruner(interval_seconds) -> threading.Thread | None
+
+CLI:
+    python -m src.processing.maintenance.prune_superseded_chunks --mode soft --retention-days 7
+    python -m src.processing.maintenance.prune_superseded_chunks --interval 3600   # 주기 실행
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from src.schema.db import get_session
+
+logger = logging.getLogger(__name__)
+
+# 최신 버전 생성 후 과거 버전 청크를 유지할 기간(일)
+CHUNK_HISTORY_RETENTION_DAYS = int(os.getenv("CHUNK_HISTORY_RETENTION_DAYS", "7"))
+# 정리 방식 ("soft" | "purge")
+CHUNK_PRUNE_MODE = os.getenv("CHUNK_PRUNE_MODE", "soft").strip().lower() or "soft"
+# 배치당 처리 청크 수
+CHUNK_PRUNE_BATCH_SIZE = int(os.getenv("CHUNK_PRUNE_BATCH_SIZE", "5000"))
+# 사이드카 프로세스 내 주기 실행 간격(초). 0 이면 실행하지 않는다.
+CHUNK_PRUNE_INTERVAL_SECONDS = int(os.getenv("CHUNK_PRUNE_INTERVAL_SECONDS", "0"))
+
+# pg_try_advisory_xact_lock 키 (작업 식별용 임의 상수)
+_ADVISORY_LOCK_KEY = 7_203_301
+
+_VICTIMS_SQL = """
+    SELECT dc.document_chunk_id
+    FROM document_chunk AS dc
+    JOIN document_content AS dct
+        ON dct.document_content_id = dc.document_content_id
+    JOIN document AS d
+        ON d.document_id = dct.document_id
+    JOIN document_content AS latest
+        ON latest.document_content_id = d.latest_content_id
+    WHERE
+        dc.document_content_id <> d.latest_content_id
+        AND latest.created_at < now() - make_interval(days => :retention_days)
+        {soft_filter}
+    LIMIT :batch_size
+"""
+
+
+def _build_statement(mode: str, dry_run: bool) -> Any:
+    if mode not in ("soft", "purge"):
+        raise ValueError(f"지원하지 않는 mode 입니다: {mode} (soft | purge)")
+
+    victims = _VICTIMS_SQL.format(soft_filter="AND dc.deleted_at IS NULL" if mode == "soft" else "")
+    if dry_run:
+        return text(f"SELECT count(*) FROM ({victims}) AS victims")
+    if mode == "soft":
+        return text(
+            f"""
+            WITH victims AS ({victims})
+            UPDATE document_chunk AS dc
+            SET deleted_at = now(), updated_at = now()
+            FROM victims
+            WHERE dc.document_chunk_id = victims.document_chunk_id
+            """
+        )
+    return text(
+        f"""
+        WITH victims AS ({victims})
+        DELETE FROM document_chunk AS dc
+        USING victims
+        WHERE dc.document_chunk_id = victims.document_chunk_id
+        """
+    )
+
+
+def prune_superseded_chunks(
+    retention_days: int = CHUNK_HISTORY_RETENTION_DAYS,
+    mode: str = CHUNK_PRUNE_MODE,
+    batch_size: int = CHUNK_PRUNE_BATCH_SIZE,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    과거 content 버전 청크를 정리한다.
+
+    - 배치마다 커밋하므로 긴 트랜잭션/락 없이 진행된다.
+    - 배치마다 트랜잭션 advisory lock 을 잡고, 다른 워커가 잡고 있으면 거기서 멈춘다.
+    - dry_run=True 이면 정리 대상 전체 수만 계산한다.
+    - 반환값: {"mode", "retention_days", "affected", "batches", "skipped"}
+    """
+    stmt = _build_statement(mode, dry_run)
+    params = {"retention_days": retention_days, "batch_size": batch_size}
+    report: Dict[str, Any] = {
+        "mode": mode,
+        "retention_days": retention_days,
+        "affected": 0,
+        "batches": 0,
+        "skipped": False,
+    }
+
+    lock_stmt = text("SELECT pg_try_advisory_xact_lock(:key)")
+    with get_session() as session:
+        while True:
+            # 락은 이 배치 트랜잭션이 끝날 때(commit/rollback) 자동으로 풀린다
+            if not session.execute(lock_stmt, {"key": _ADVISORY_LOCK_KEY}).scalar():
+                session.rollback()
+                if report["batches"] == 0:
+                    logger.info("[prune] 다른 워커가 실행 중이므로 건너뜁니다.")
+                    report["skipped"] = True
+                    return report
+                logger.info("[prune] 다른 워커가 정리를 이어서 진행 중이므로 멈춥니다.")
+                break
+
+            if dry_run:
+                # LIMIT NULL 은 제한 없음
+                report["affected"] = int(session.execute(stmt, {**params, "batch_size": None}).scalar() or 0)
+                session.rollback()
+                return report
+
+            affected = session.execute(stmt, params).rowcount or 0
+            session.commit()
+            report["affected"] += affected
+            report["batches"] += 1
+            if affected < batch_size:
+                break
+
+    logger.info(
+        f"[prune] 완료: mode={mode}, retention_days={retention_days}, "
+        f"affected={report['affected']}, batches={report['batches']}"
+    )
+    return report
+
+
+def _run_forever(interval_seconds: int, stop_event: threading.Event) -> None:
+    while not stop_event.is_set():
+        try:
+            prune_superseded_chunks()
+        except Exception as exc:  # pragma: no cover
+            logger.error(f"[prune] 오류: {exc}", exc_info=True)
+        stop_event.wait(interval_seconds)
+
+
+def start_background_pruner(
+    interval_seconds: int = CHUNK_PRUNE_INTERVAL_SECONDS,
+    stop_event: Optional[threading.Event] = None,
+) -> Optional[threading.Thread]:
+    """
+    interval_seconds 주기로 정리 작업을 실행하는 데몬 스레드를 시작한다.
+
+    - interval_seconds <= 0 이면 아무것도 하지 않고 None 을 반환한다.
+    """
+    if interval_seconds <= 0:
+        return None
+
+    thread = threading.Thread(
+        target=_run_forever,
+        args=(interval_seconds, stop_event or threading.Event()),
+        name="prune-superseded-chunks",
+        daemon=True,
+    )
+    thread.start()
+    logger.info(f"[prune] 백그라운드 정리 시작: interval={interval_seconds}s, mode={CHUNK_PRUNE_MODE}")
+    return thread
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="과거 content 버전 청크 정리 작업")
+    parser.add_argument("--mode", choices=["soft", "purge"], default=CHUNK_PRUNE_MODE)
+    parser.add_argument("--retention-days", type=int, default=CHUNK_HISTORY_RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=CHUNK_PRUNE_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="정리 대상 수만 계산")
+    parser.add_argument("--interval", type=int, default=0, help="0 보다 크면 해당 주기(초)로 반복 실행")
+
+    args = parser.parse_args()
+
+    while True:
+        result = prune_superseded_chunks(
+            retention_days=args.retention_days,
+            mode=args.mode,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+        )
+        print(json.dumps(result, ensure_ascii=False))
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
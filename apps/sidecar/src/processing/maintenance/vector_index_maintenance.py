@@ -0,0 +1,538 @@
+"""
+벡터 인덱스 유지보수 작업.
+
+- 대상: document_chunk 청크 벡터 인덱스(기본 document_chunk_embedding_bq_hnsw_idx) — 파티션 테이블이면 파티션 인덱스마다 처리
+- 관측: pg_stat_user_tables 의 live 행 수 / 누적 INSERT·DELETE 수 / n_mod_since_analyze
+  - churn = (마지막 재생성 이후 INSERT + DELETE) / live 행 수 — 기준값은 직전 실행 기록(vector_index_maintenance_run.relations)
+- 조치:
+  - 권장 파라미터 계산: HNSW (m, ef_construction) 는 행 수 구간별, ivfflat lists 는 rows/1000 (100만 초과 시 sqrt(rows))
+  - churn 이 VECTOR_INDEX_REBUILD_CHURN 이상이거나 현재 파라미터가 권장값과 다르면
+    ALTER INDEX ... SET (파라미터) 후 REINDEX INDEX CONCURRENTLY 로 재생성 (서비스 중 실행 가능)
+  - 대량 적재 후 통계가 오래되면(n_mod_since_analyze / live ≥ VECTOR_INDEX_ANALYZE_RATIO) ANALYZE
+- 측정: 무작위 live 청크 벡터를 probe 질의로 삼아 정확한 코사인 KNN 대비 recall@k 와 지연시간(p50/p95)을
+  조치 전/후 같은 probe 집합으로 측정해 vector_index_maintenance_run 에 기록한다.
+- 재생성/ANALYZE 와 advisory lock, lock_timeout 은 세션 단위이므로 pgbouncer(트랜잭션 풀링)를 거치지 않는
+  Postgres 직접 연결(VECTOR_INDEX_MAINTENANCE_DATABASE_URL, 풀 없이 실행마다 새 연결)에서 실행한다.
+  - 여러 워커에서 동시에 실행되지 않도록 이 연결에서 PostgreSQL advisory lock 을 잡는다.
+  - URL 이 비어 있으면 유지보수를 실행하지 않는다. (풀링 연결로 대체하지 않음)
+
+주요 함수:
+- run_vector_index_maintenance(index_name, force_rebuild, dry_run) -> dict
+- analyze_after_ingest(user_id, inserted_rows) -> bool
+- start_vector_index_maintainer(interval_seconds) -> threading.Thread | None
+
+CLI:
+    python -m src.processing.maintenance.vector_index_maintenance --dry-run
+    python -m src.processing.maintenance.vector_index_maintenance --force-rebuild
+    python -m src.processing.maintenance.vector_index_maintenance --interval 86400   # 주기 실행
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import statistics
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+
+from src.schema.db import engine
+
+logger = logging.getLogger(__name__)
+
+# 유지보수 전용 Postgres 직접 연결 URL (pgbouncer 경유 금지). 비어 있으면 유지보수를 건너뛴다.
+VECTOR_INDEX_MAINTENANCE_DATABASE_URL = os.getenv("VECTOR_INDEX_MAINTENANCE_DATABASE_URL", "").strip()
+VECTOR_INDEX_NAME = os.getenv("VECTOR_INDEX_NAME", "document_chunk_embedding_bq_hnsw_idx")
+# 마지막 재생성 이후 (INSERT + DELETE) / live 행 비율이 이 값 이상이면 재생성
+VECTOR_INDEX_REBUILD_CHURN = float(os.getenv("VECTOR_INDEX_REBUILD_CHURN", "0.2"))
+# n_mod_since_analyze / live 행 비율이 이 값 이상이면 ANALYZE
+VECTOR_INDEX_ANALYZE_RATIO = float(os.getenv("VECTOR_INDEX_ANALYZE_RATIO", "0.1"))
+# 문서 1건 적재로 이 수 이상의 청크가 들어오면 적재 직후 해당 파티션 ANALYZE 여부를 확인
+VECTOR_INDEX_ANALYZE_MIN_ROWS = int(os.getenv("VECTOR_INDEX_ANALYZE_MIN_ROWS", "5000"))
+# probe 질의 수 / recall 기준 k
+VECTOR_INDEX_PROBE_QUERIES = int(os.getenv("VECTOR_INDEX_PROBE_QUERIES", "20"))
+VECTOR_INDEX_PROBE_TOP_K = int(os.getenv("VECTOR_INDEX_PROBE_TOP_K", "10"))
+# 재생성 시 lock_timeout (ALTER INDEX SET 은 짧은 배타 락을 잡는다)
+VECTOR_INDEX_LOCK_TIMEOUT = os.getenv("VECTOR_INDEX_LOCK_TIMEOUT", "5s")
+# 사이드카 프로세스 내 주기 실행 간격(초). 0 이면 실행하지 않는다.
+VECTOR_INDEX_MAINTENANCE_INTERVAL_SECONDS = int(os.getenv("VECTOR_INDEX_MAINTENANCE_INTERVAL_SECONDS", "0"))
+# probe 의 Hamming 후보 배수. 검색과 같은 환경변수/기본값을 직접 읽는다.
+# (query_embed_search 를 import 하면 torch / transformers 까지 적재 단계와 CLI 로 끌려온다)
+EMBED_SEARCH_OVERSAMPLE = int(os.getenv("EMBED_SEARCH_OVERSAMPLE", "10"))
+
+# pg_try_advisory_lock 키 (작업 식별용 임의 상수)
+_ADVISORY_LOCK_KEY = 7_203_302
+
+# pgvector 기본값 (reloptions 에 없으면 이 값으로 빌드된 것)
+_HNSW_DEFAULTS = {"m": 16, "ef_construction": 64}
+_IVFFLAT_DEFAULTS = {"lists": 100}
+
+_direct_engine: Optional[Engine] = None
+_direct_engine_lock = threading.Lock()
+
+# 대상 인덱스(파티션 인덱스 포함)와 소속 테이블/통계
+_TARGETS_SQL = text(
+    """
+    WITH parent AS (
+        SELECT to_regclass(:index_name) AS oid
+    ),
+    targets AS (
+        SELECT parent.oid AS index_oid FROM parent WHERE parent.oid IS NOT NULL
+        UNION ALL
+        SELECT inh.inhrelid FROM pg_inherits AS inh, parent WHERE inh.inhparent = parent.oid
+    )
+    SELECT
+        ic.relname AS index_name,
+        tc.relname AS relation,
+        ic.relkind::text AS index_kind,
+        am.amname AS method,
+        COALESCE(ic.reloptions, ARRAY[]::text[]) AS reloptions,
+        COALESCE(st.n_live_tup, 0) AS live_rows,
+        COALESCE(st.n_tup_ins, 0) AS tup_ins,
+        COALESCE(st.n_tup_del, 0) AS tup_del,
+        COALESCE(st.n_mod_since_analyze, 0) AS mod_since_analyze
+    FROM targets AS t
+    JOIN pg_class AS ic
+        ON ic.oid = t.index_oid
+    JOIN pg_index AS ix
+        ON ix.indexrelid = ic.oid
+    JOIN pg_class AS tc
+        ON tc.oid = ix.indrelid
+    JOIN pg_am AS am
+        ON am.oid = ic.relam
+    LEFT JOIN pg_stat_user_tables AS st
+        ON st.relid = tc.oid
+    ORDER BY tc.relname
+    """
+)
+
+_LAST_RUN_SQL = text(
+    """
+    SELECT relations
+    FROM vector_index_maintenance_run
+    WHERE index_name = :index_name AND error IS NULL AND finished_at IS NOT NULL
+    ORDER BY started_at DESC
+    LIMIT 1
+    """
+)
+
+_INSERT_RUN_SQL = text(
+    """
+    INSERT INTO vector_index_maintenance_run (
+        index_name, actions, relations, probe_queries,
+        recall_before, recall_after,
+        latency_ms_p50_before, latency_ms_p50_after,
+        latency_ms_p95_before, latency_ms_p95_after,
+        error, started_at, finished_at
+    )
+    VALUES (
+        :index_name, CAST(:actions AS jsonb), CAST(:relations AS jsonb), :probe_queries,
+        :recall_before, :recall_after,
+        :latency_ms_p50_before, :latency_ms_p50_after,
+        :latency_ms_p95_before, :latency_ms_p95_after,
+        :error, to_timestamp(:started_at), now()
+    )
+    RETURNING id
+    """
+)
+
+_PROBE_SAMPLE_SQL = text(
+    """
+    SELECT dc.user_id AS user_id, dc.chunk_embedding::text AS embedding
+    FROM document_chunk AS dc
+    WHERE dc.is_live AND dc.chunk_embedding IS NOT NULL
+    ORDER BY random()
+    LIMIT :sample
+    """
+)
+
+_PROBE_EXACT_SQL = text(
+    """
+    SELECT dc.document_chunk_id
+    FROM document_chunk AS dc
+    WHERE dc.user_id = :user_id AND dc.is_live
+    ORDER BY dc.chunk_embedding <=> CAST(:query_embedding AS halfvec(256))
+    LIMIT :top_k
+    """
+)
+
+# query_embed_search(mode="flat") 과 같은 binary quantize Hamming 후보 + 코사인 재정렬
+_PROBE_INDEX_SQL = text(
+    """
+    WITH candidates AS (
+        SELECT dc.document_chunk_id, dc.chunk_embedding
+        FROM document_chunk AS dc
+        WHERE dc.user_id = :user_id AND dc.is_live
+        ORDER BY
+            (binary_quantize(dc.chunk_embedding)::bit(256))
+            <~> (binary_quantize(CAST(:query_embedding AS halfvec(256)))::bit(256))
+        LIMIT :candidate_limit
+    )
+    SELECT document_chunk_id
+    FROM candidates
+    ORDER BY chunk_embedding <=> CAST(:query_embedding AS halfvec(256))
+    LIMIT :top_k
+    """
+)
+
+
+def _get_direct_engine() -> Engine:
+    """
+    유지보수 전용 직접 연결 엔진.
+
+    - NullPool 이므로 연결을 닫으면 세션 상태(advisory lock, lock_timeout)가 백엔드와 함께 사라진다.
+    """
+    global _direct_engine
+    with _direct_engine_lock:
+        if _direct_engine is None:
+            url = VECTOR_INDEX_MAINTENANCE_DATABASE_URL
+            # Ensure postgresql:// scheme (not postgres://) for SQLAlchemy 2.0
+            if url.startswith("postgres://"):
+                url = url.replace("postgres://", "postgresql://", 1)
+            _direct_engine = create_engine(url, poolclass=NullPool)
+        return _direct_engine
+
+
+def recommend_index_params(method: str, rows: int) -> Dict[str, int]:
+    """
+    행 수에 맞는 인덱스 빌드 파라미터.
+
+    - ivfflat: lists = rows / 1000 (100만 행 초과 시 sqrt(rows)), 최소 10
+    - hnsw   : 10만 미만 (16, 64) / 100만 미만 (16, 128) / 그 이상 (24, 200)
+    """
+    if method == "ivfflat":
+        lists = rows // 1000 if rows <= 1_000_000 else int(math.sqrt(rows))
+        return {"lists": max(10, lists)}
+    if rows < 100_000:
+        return {"m": 16, "ef_construction": 64}
+    if rows < 1_000_000:
+        return {"m": 16, "ef_construction": 128}
+    return {"m": 24, "ef_construction": 200}
+
+
+def _current_params(method: str, reloptions: Sequence[str]) -> Dict[str, int]:
+    params = dict(_IVFFLAT_DEFAULTS if method == "ivfflat" else _HNSW_DEFAULTS)
+    for option in reloptions:
+        key, _, value = option.partition("=")
+        if key in params:
+            params[key] = int(value)
+    return params
+
+
+def _percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    idx = min(len(ordered) - 1, max(0, round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _sample_probes(conn: Any, sample: int) -> List[Dict[str, Any]]:
+    rows = conn.execute(_PROBE_SAMPLE_SQL, {"sample": sample}).all()
+    return [{"user_id": row.user_id, "embedding": row.embedding} for row in rows]
+
+
+def measure_probe_recall(probes: List[Dict[str, Any]], top_k: int) -> Dict[str, Any]:
+    """
+    probe 벡터마다 인덱스 경로 검색의 recall@top_k (정확한 코사인 KNN 대비) 와 지연시간을 측정한다.
+
+    - 인덱스 경로 검색은 query_embed_search 와 같은 후보 배수(EMBED_SEARCH_OVERSAMPLE)와 세션 설정
+      (hnsw.ef_search, hnsw.iterative_scan = relaxed_order)을 트랜잭션 범위로 적용한다.
+      그래서 AUTOCOMMIT 이 아닌 별도 연결을 사용한다.
+    - 반환값: {"recall", "latency_ms_p50", "latency_ms_p95"} (probe 가 없으면 모두 None)
+    """
+    recalls: List[float] = []
+    latencies: List[float] = []
+    candidate_limit = top_k * max(1, EMBED_SEARCH_OVERSAMPLE)
+
+    with engine.connect() as conn:
+        for probe in probes:
+            params = {"user_id": probe["user_id"], "query_embedding": probe["embedding"], "top_k": top_k}
+            with conn.begin():
+                truth = set(conn.execute(_PROBE_EXACT_SQL, params).scalars())
+                if not truth:
+                    continue
+                # query_embed_search 와 같이 ef_search 를 후보 수 이상으로, iterative scan 사용
+                conn.execute(
+                    text(
+                        "SELECT set_config('hnsw.ef_search', :ef_search, true), "
+                        "set_config('hnsw.iterative_scan', 'relaxed_order', true)"
+                    ),
+                    {"ef_search": str(min(max(candidate_limit, 40), 1000))},
+                )
+                started = time.perf_counter()
+                found = conn.execute(_PROBE_INDEX_SQL, {**params, "candidate_limit": candidate_limit}).scalars().all()
+                latencies.append((time.perf_counter() - started) * 1000.0)
+            recalls.append(len(truth.intersection(found)) / len(truth))
+
+    return {
+        "recall": statistics.fmean(recalls) if recalls else None,
+        "latency_ms_p50": _percentile(latencies, 50),
+        "latency_ms_p95": _percentile(latencies, 95),
+    }
+
+
+def _plan(
+    targets: List[Any],
+    baseline: Dict[str, Any],
+    force_rebuild: bool,
+) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """대상별 조치(rebuild / analyze)와 다음 실행의 churn 기준이 될 relations 스냅샷을 만든다."""
+    actions: List[Dict[str, Any]] = []
+    relations: Dict[str, Any] = {}
+
+    for target in targets:
+        # 파티션 부모 인덱스(relkind 'I')는 파티션 인덱스 단위로 처리
+        if target.index_kind == "I":
+            continue
+
+        live_rows = int(target.live_rows)
+        prev = baseline.get(target.relation) or {}
+        build_ins = int(prev.get("build_tup_ins", target.tup_ins))
+        build_del = int(prev.get("build_tup_del", target.tup_del))
+        if target.tup_ins < build_ins or target.tup_del < build_del:
+            # 통계가 초기화된 경우 기준값을 다시 잡는다.
+            build_ins, build_del = int(target.tup_ins), int(target.tup_del)
+        churn = ((target.tup_ins - build_ins) + (target.tup_del - build_del)) / max(live_rows, 1)
+
+        current = _current_params(target.method, target.reloptions)
+        recommended = recommend_index_params(target.method, live_rows)
+        reasons: List[str] = []
+        if force_rebuild:
+            reasons.append("forced")
+        if churn >= VECTOR_INDEX_REBUILD_CHURN:
+            reasons.append(f"churn={churn:.2f}")
+        if current != recommended:
+            reasons.append("params")
+
+        info = {
+            "relation": target.relation,
+            "index": target.index_name,
+            "live_rows": live_rows,
+            "churn": round(churn, 4),
+            "params_before": current,
+        }
+        if reasons:
+            actions.append({**info, "action": "rebuild", "reasons": reasons, "params_after": recommended})
+            build_ins, build_del = int(target.tup_ins), int(target.tup_del)
+        if target.mod_since_analyze >= VECTOR_INDEX_ANALYZE_RATIO * max(live_rows, 1):
+            actions.append({**info, "action": "analyze", "mod_since_analyze": int(target.mod_since_analyze)})
+
+        relations[target.relation] = {
+            "index": target.index_name,
+            "live_rows": live_rows,
+            "build_tup_ins": build_ins,
+            "build_tup_del": build_del,
+        }
+    return actions, relations
+
+
+def _apply(conn: Any, action: Dict[str, Any]) -> None:
+    if action["action"] == "analyze":
+        conn.execute(text(f'ANALYZE "{action["relation"]}"'))
+        return
+
+    conn.execute(text("SELECT set_config('lock_timeout', :timeout, false)"), {"timeout": VECTOR_INDEX_LOCK_TIMEOUT})
+    if action["params_after"] != action["params_before"]:
+        options = ", ".join(f"{key} = {int(value)}" for key, value in action["params_after"].items())
+        conn.execute(text(f'ALTER INDEX "{action["index"]}" SET ({options})'))
+    conn.execute(text(f'REINDEX INDEX CONCURRENTLY "{action["index"]}"'))
+
+
+def run_vector_index_maintenance(
+    index_name: str = VECTOR_INDEX_NAME,
+    force_rebuild: bool = False,
+    dry_run: bool = False,
+    probe_queries: int = VECTOR_INDEX_PROBE_QUERIES,
+    top_k: int = VECTOR_INDEX_PROBE_TOP_K,
+) -> Dict[str, Any]:
+    """
+    벡터 인덱스 유지보수를 1회 실행한다.
+
+    - VECTOR_INDEX_MAINTENANCE_DATABASE_URL 이 비어 있으면 실행하지 않고 skipped 로 반환한다.
+    - dry_run=True 이면 조치 계획만 계산하고 실행/기록하지 않는다.
+    - 조치가 있으면 같은 probe 집합으로 전/후 recall · 지연시간을 측정한다.
+    - 반환값: {"index_name", "actions", "before", "after", "skipped", "run_id"}
+    """
+    report: Dict[str, Any] = {
+        "index_name": index_name,
+        "actions": [],
+        "before": None,
+        "after": None,
+        "skipped": False,
+        "run_id": None,
+    }
+    if not VECTOR_INDEX_MAINTENANCE_DATABASE_URL:
+        logger.info("[vector-index] VECTOR_INDEX_MAINTENANCE_DATABASE_URL 이 없어 건너뜁니다.")
+        report["skipped"] = True
+        return report
+    started_at = time.time()
+
+    # REINDEX CONCURRENTLY / ANALYZE 는 트랜잭션 밖에서 실행해야 하므로 AUTOCOMMIT 직접 연결
+    with _get_direct_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY}).scalar():
+            logger.info("[vector-index] 다른 워커가 실행 중이므로 건너뜁니다.")
+            report["skipped"] = True
+            return report
+
+        error: Optional[str] = None
+        relations: Dict[str, Any] = {}
+        probes: List[Dict[str, Any]] = []
+        try:
+            targets = conn.execute(_TARGETS_SQL, {"index_name": f"public.{index_name}"}).all()
+            if not targets:
+                raise ValueError(f"인덱스를 찾을 수 없습니다: {index_name}")
+
+            baseline = conn.execute(_LAST_RUN_SQL, {"index_name": index_name}).scalar() or {}
+            actions, relations = _plan(targets, baseline, force_rebuild)
+            report["actions"] = actions
+            if dry_run:
+                return report
+
+            if any(a["action"] == "rebuild" for a in actions):
+                probes = _sample_probes(conn, probe_queries)
+                report["before"] = measure_probe_recall(probes, top_k)
+
+            for action in actions:
+                logger.info(
+                    f"[vector-index] {action['action']}: {action['index']} ({action['relation']}), "
+                    f"live_rows={action['live_rows']}, churn={action['churn']}"
+                )
+                _apply(conn, action)
+
+            if probes:
+                report["after"] = measure_probe_recall(probes, top_k)
+        except Exception as exc:
+            error = str(exc)
+            logger.error(f"[vector-index] 실패: {exc}", exc_info=True)
+            raise
+        finally:
+            if not dry_run:
+                before = report["before"] or {}
+                after = report["after"] or {}
+                report["run_id"] = conn.execute(
+                    _INSERT_RUN_SQL,
+                    {
+                        "index_name": index_name,
+                        "actions": json.dumps(report["actions"], ensure_ascii=False),
+                        "relations": json.dumps(relations, ensure_ascii=False),
+                        "probe_queries": len(probes),
+                        "recall_before": before.get("recall"),
+                        "recall_after": after.get("recall"),
+                        "latency_ms_p50_before": before.get("latency_ms_p50"),
+                        "latency_ms_p50_after": after.get("latency_ms_p50"),
+                        "latency_ms_p95_before": before.get("latency_ms_p95"),
+                        "latency_ms_p95_after": after.get("latency_ms_p95"),
+                        "error": error,
+                        "started_at": started_at,
+                    },
+                ).scalar()
+            conn.execute(text("RESET lock_timeout"))
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+
+    logger.info(
+        f"[vector-index] 완료: index={index_name}, actions={len(report['actions'])}, "
+        f"recall {(report['before'] or {}).get('recall')} -> {(report['after'] or {}).get('recall')}"
+    )
+    return report
+
+
+def analyze_after_ingest(user_id: Any, inserted_rows: int) -> bool:
+    """
+    대량 적재 직후 해당 사용자 파티션의 통계가 오래되었으면 ANALYZE 한다.
+
+    - inserted_rows < VECTOR_INDEX_ANALYZE_MIN_ROWS 이면 아무것도 하지 않는다.
+    - 반환값: ANALYZE 실행 여부
+    """
+    if inserted_rows < VECTOR_INDEX_ANALYZE_MIN_ROWS:
+        return False
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        row = conn.execute(
+            text(
+                """
+                SELECT c.relname AS relation, COALESCE(st.n_live_tup, 0) AS live_rows,
+                       COALESCE(st.n_mod_since_analyze, 0) AS mod_since_analyze
+                FROM (SELECT dc.tableoid FROM document_chunk AS dc WHERE dc.user_id = :user_id LIMIT 1) AS t
+                JOIN pg_class AS c ON c.oid = t.tableoid
+                LEFT JOIN pg_stat_user_tables AS st ON st.relid = c.oid
+                """
+            ),
+            {"user_id": user_id},
+        ).first()
+        if row is None or row.mod_since_analyze < VECTOR_INDEX_ANALYZE_RATIO * max(row.live_rows, 1):
+            return False
+        conn.execute(text(f'ANALYZE "{row.relation}"'))
+
+    logger.info(f"[vector-index] 적재 후 ANALYZE: {row.relation} (inserted={inserted_rows})")
+    return True
+
+
+def _run_forever(interval_seconds: int, stop_event: threading.Event) -> None:
+    while not stop_event.is_set():
+        try:
+            run_vector_index_maintenance()
+        except Exception as exc:  # pragma: no cover
+            logger.error(f"[vector-index] 오류: {exc}", exc_info=True)
+        stop_event.wait(interval_seconds)
+
+
+def start_vector_index_maintainer(
+    interval_seconds: int = VECTOR_INDEX_MAINTENANCE_INTERVAL_SECONDS,
+    stop_event: Optional[threading.Event] = None,
+) -> Optional[threading.Thread]:
+    """
+    interval_seconds 주기로 유지보수를 실행하는 데몬 스레드를 시작한다.
+
+    - interval_seconds <= 0 이거나 VECTOR_INDEX_MAINTENANCE_DATABASE_URL 이 없으면 아무것도 하지 않고 None 을 반환한다.
+    """
+    if interval_seconds <= 0:
+        return None
+    if not VECTOR_INDEX_MAINTENANCE_DATABASE_URL:
+        logger.info("[vector-index] VECTOR_INDEX_MAINTENANCE_DATABASE_URL 이 없어 백그라운드 유지보수를 시작하지 않습니다.")
+        return None
+
+    thread = threading.Thread(
+        target=_run_forever,
+        args=(interval_seconds, stop_event or threading.Event()),
+        name="vector-index-maintenance",
+        daemon=True,
+    )
+    thread.start()
+    logger.info(f"[vector-index] 백그라운드 유지보수 시작: interval={interval_seconds}s, index={VECTOR_INDEX_NAME}")
+    return thread
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="벡터 인덱스 유지보수 (재생성 / ANALYZE / recall 측정)")
+    parser.add_argument("--index", default=VECTOR_INDEX_NAME, help="대상 인덱스 이름")
+    parser.add_argument("--force-rebuild", action="store_true", help="churn/파라미터와 관계없이 재생성")
+    parser.add_argument("--dry-run", action="store_true", help="조치 계획만 출력")
+    parser.add_argument("--probe-queries", type=int, default=VECTOR_INDEX_PROBE_QUERIES)
+    parser.add_argument("--top-k", type=int, default=VECTOR_INDEX_PROBE_TOP_K)
+    parser.add_argument("--interval", type=int, default=0, help="0 보다 크면 해당 주기(초)로 반복 실행")
+
+    args = parser.parse_args()
+
+    while True:
+        result = run_vector_index_maintenance(
+            index_name=args.index,
+            force_rebuild=args.force_rebuild,
+            dry_run=args.dry_run,
+            probe_queries=args.probe_queries,
+            top_k=args.top_k,
+        )
+        print(json.dumps(result, ensure_ascii=False, default=str))
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,234 @@
+"""
+RAG 에이전트 지연 시간 계측.
+
+- 에이전트 실행 1회마다 RunTrace 를 만들고 아래 이벤트를 기록한다.
+  - llm_call: LLM 호출별 지연(ms), 첫 토큰까지 시간(ms), 입력/출력 토큰 수 (rag_agent 의 콜백 핸들러가 기록)
+  - tool_call: 도구 호출별 전체 시간(ms)과 단계별 시간 embed / db / rerank (phase_timer 로 수집), 결과 출처(search / speculation)
+  - first_token: 실행 시작부터 답변 첫 토큰까지 시간(TTFT) — 스트리밍 실행에서만 기록
+  - serialize: 스트리밍 응답 직렬화 누적 시간 (main 의 SSE 라우트가 기록)
+- 실행이 끝나면(finish) 요약을 `[agent-timing]` JSON 로그 1줄로 남기고, 최근 RAG_TIMING_WINDOW 건 기준
+  p50 / p95 / 평균 지표에 반영한다. 개별 이벤트는 DEBUG 로그로 남긴다.
+
+주요 함수:
+- RunTrace(kind)
+- tool_span(trace, tool_name) -> context manager
+- get_agent_timing_stats() -> dict
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from src.processing.tools.phase_timer import collect_phases
+
+logger = logging.getLogger(__name__)
+
+# 지표 계산에 쓰는 최근 표본 수 (지표별)
+RAG_TIMING_WINDOW = int(os.getenv("RAG_TIMING_WINDOW", "1000"))
+
+_lock = threading.Lock()
+_samples: Dict[str, Deque[float]] = {}
+_counters: Dict[str, int] = {
+    "runs": 0,
+    "cached_runs": 0,
+    "failed_runs": 0,
+    "cancelled_runs": 0,
+    "llm_calls": 0,
+    "tool_calls": 0,
+    "prompt_tokens": 0,
+    "completion_tokens": 0,
+}
+
+
+def _ms_since(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000.0, 2)
+
+
+def _add_sample(name: str, value: Optional[float]) -> None:
+    if value is None:
+        return
+    samples = _samples.get(name)
+    if samples is None:
+        samples = deque(maxlen=RAG_TIMING_WINDOW)
+        _samples[name] = samples
+    samples.append(value)
+
+
+def _summarize(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    count = len(ordered)
+    return {
+        "count": count,
+        "avg": round(sum(ordered) / count, 2),
+        "p50": ordered[int(0.5 * (count - 1))],
+        "p95": ordered[int(0.95 * (count - 1))],
+        "max": ordered[-1],
+    }
+
+
+class RunTrace:
+    """
+    에이전트 실행 1회의 계측 기록.
+
+    - 콜백(스레드)과 비동기 도구가 동시에 기록할 수 있으므로 잠금으로 보호한다.
+    """
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.ttft_ms: Optional[float] = None
+        self.serialize_ms = 0.0
+        self.cached = False
+        self.llm_calls: List[Dict[str, Any]] = []
+        self.tool_calls: List[Dict[str, Any]] = []
+        self.summary: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def _event(self, event: Dict[str, Any]) -> None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[agent-timing] {json.dumps({'run': self.kind, **event}, ensure_ascii=False)}")
+
+    def mark_first_token(self) -> None:
+        """답변 첫 토큰 시점 기록 (실행당 1회)."""
+        with self._lock:
+            if self.ttft_ms is not None:
+                return
+            self.ttft_ms = _ms_since(self.started)
+        self._event({"event": "first_token", "ttft_ms": self.ttft_ms})
+
+    def llm_call(
+        self,
+        model: Optional[str],
+        latency_ms: float,
+        first_token_ms: Optional[float],
+        prompt_tokens: Optional[int],
+        completion_tokens: Optional[int],
+    ) -> None:
+        event = {
+            "event": "llm_call",
+            "model": model,
+            "latency_ms": latency_ms,
+            "first_token_ms": first_token_ms,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+        }
+        with self._lock:
+            self.llm_calls.append(event)
+        self._event(event)
+
+    def tool_call(self, name: str, duration_ms: float, phases: Dict[str, float], source: str, error: bool) -> None:
+        event = {
+            "event": "tool_call",
+            "tool": name,
+            "duration_ms": duration_ms,
+            "embed_ms": round(phases.get("embed", 0.0), 2),
+            "db_ms": round(phases.get("db", 0.0), 2),
+            "rerank_ms": round(phases.get("rerank", 0.0), 2),
+            "source": source,
+            "error": error,
+        }
+        with self._lock:
+            self.tool_calls.append(event)
+        self._event(event)
+
+    def add_serialization(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.serialize_ms += elapsed_ms
+
+    def finish(self, status: str = "ok") -> Dict[str, Any]:
+        """실행 종료: 요약을 로그/지표에 반영하고 돌려준다. (여러 번 호출해도 1회만 반영)"""
+        with self._lock:
+            if self.summary is not None:
+                return self.summary
+            llm_calls = list(self.llm_calls)
+            tool_calls = list(self.tool_calls)
+            summary: Dict[str, Any] = {
+                "run": self.kind,
+                "status": status,
+                "cached": self.cached,
+                "total_ms": _ms_since(self.started),
+                "ttft_ms": self.ttft_ms,
+                "llm_ms": round(sum(c["latency_ms"] for c in llm_calls), 2),
+                "tool_ms": round(sum(c["duration_ms"] for c in tool_calls), 2),
+                "embed_ms": round(sum(c["embed_ms"] for c in tool_calls), 2),
+                "db_ms": round(sum(c["db_ms"] for c in tool_calls), 2),
+                "serialize_ms": round(self.serialize_ms, 2),
+                "prompt_tokens": sum(c["prompt_tokens"] or 0 for c in llm_calls),
+                "completion_tokens": sum(c["completion_tokens"] or 0 for c in llm_calls),
+                "llm_calls": llm_calls,
+                "tool_calls": tool_calls,
+            }
+            self.summary = summary
+
+        logger.info(f"[agent-timing] {json.dumps(summary, ensure_ascii=False)}")
+        with _lock:
+            _counters["runs"] += 1
+            _counters["cached_runs"] += int(summary["cached"])
+            _counters["failed_runs"] += int(status == "error")
+            _counters["cancelled_runs"] += int(status == "cancelled")
+            _counters["llm_calls"] += len(llm_calls)
+            _counters["tool_calls"] += len(tool_calls)
+            _counters["prompt_tokens"] += summary["prompt_tokens"]
+            _counters["completion_tokens"] += summary["completion_tokens"]
+            _add_sample("run_total_ms", summary["total_ms"])
+            _add_sample("ttft_ms", summary["ttft_ms"])
+            if summary["serialize_ms"]:
+                _add_sample("serialize_ms", summary["serialize_ms"])
+            for call in llm_calls:
+                _add_sample("llm_latency_ms", call["latency_ms"])
+                _add_sample("llm_first_token_ms", call["first_token_ms"])
+            for call in tool_calls:
+                _add_sample(f"tool.{call['tool']}.duration_ms", call["duration_ms"])
+                if call["source"] == "search":
+                    _add_sample(f"tool.{call['tool']}.embed_ms", call["embed_ms"] or None)
+                    _add_sample(f"tool.{call['tool']}.db_ms", call["db_ms"])
+        return summary
+
+
+class _ToolSpan:
+    __slots__ = ("source", "error")
+
+    def __init__(self) -> None:
+        # 결과 출처: "search"(직접 검색) / "speculation"(추측 검색 결과 사용)
+        self.source = "search"
+        self.error = False
+
+
+@contextmanager
+def tool_span(trace: Optional[RunTrace], tool_name: str) -> Iterator[_ToolSpan]:
+    """
+    도구 호출 1회를 계측한다. (trace 가 None 이면 단계 수집 없이 통과)
+
+    - 범위 안에서 실행된 검색 함수의 phase("embed" / "db" / "rerank") 시간이 함께 기록된다.
+    """
+    span = _ToolSpan()
+    if trace is None:
+        yield span
+        return
+
+    started = time.perf_counter()
+    with collect_phases() as phases:
+        try:
+            yield span
+        except BaseException:
+            span.error = True
+            raise
+        finally:
+            trace.tool_call(tool_name, _ms_since(started), dict(phases), span.source, span.error)
+
+
+def get_agent_timing_stats() -> Dict[str, Any]:
+    """에이전트 지연 시간 지표 (현재 워커 프로세스 기준, 지표별 최근 RAG_TIMING_WINDOW 건)."""
+    with _lock:
+        stats: Dict[str, Any] = dict(_counters)
+        samples = {name: list(values) for name, values in _samples.items() if values}
+    stats["latency_ms"] = {name: _summarize(values) for name, values in sorted(samples.items())}
+    stats["window"] = RAG_TIMING_WINDOW
+    return stats
@@ -0,0 +1,201 @@
+"""
+RAG 에이전트 의미 기반 답변 캐시.
+
+- 사용자는 같은 문서에 대해 같은(비슷한) 질문을 반복하므로, 에이전트 실행(도구 루프 + LLM 생성) 결과 답변을 캐시한다.
+- 범위 키: (user_id, path_prefix, model_name). 범위마다 (질의 임베딩, 답변, 근거 content id 집합) 항목을 LRU 로 보관한다.
+- 조회: 같은 범위에서 질의 임베딩 코사인 유사도가 RAG_ANSWER_CACHE_SIMILARITY 이상인 가장 가까운 항목을 찾고,
+  근거 content id 가 모두 아직 각 문서의 latest_content_id 이면(= 근거 문서가 바뀌지 않았으면) 캐시 답변을 돌려준다.
+  근거 문서가 수정/삭제되었으면 항목을 지우고 미스로 처리한다.
+- 저장: 검색 도구로 문서를 1건 이상 가져와 만든 답변만 저장한다. (검색 없이 만든 답변은 무효화 기준이 없으므로 저장하지 않음)
+- 임베딩은 256차원 정규화 벡터이므로 내적 = 코사인 유사도.
+- 프로세스 메모리 캐시이므로 워커 프로세스마다 따로 쌓인다.
+
+주요 함수:
+- lookup_answer(scope, embedding) -> CachedAnswer | None
+- store_answer(scope, query, embedding, answer, content_ids)
+- get_answer_cache_stats() -> dict
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Text, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from src.schema.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# 답변 캐시를 기본으로 켤지 여부 (요청별로 use_cache 인자로 덮어쓸 수 있음)
+RAG_ANSWER_CACHE = os.getenv("RAG_ANSWER_CACHE", "false").strip().lower() in ("1", "true", "yes")
+# 캐시 적중으로 볼 최소 질의 임베딩 코사인 유사도
+RAG_ANSWER_CACHE_SIMILARITY = float(os.getenv("RAG_ANSWER_CACHE_SIMILARITY", "0.95"))
+# 범위(user, path_prefix, model) 수 / 범위당 항목 수 상한
+RAG_ANSWER_CACHE_MAX_SCOPES = int(os.getenv("RAG_ANSWER_CACHE_MAX_SCOPES", "1024"))
+RAG_ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("RAG_ANSWER_CACHE_MAX_ENTRIES", "128"))
+# 항목 수명 (근거 문서가 그대로여도 이 시간이 지나면 만료)
+RAG_ANSWER_CACHE_TTL_SECONDS = float(os.getenv("RAG_ANSWER_CACHE_TTL_SECONDS", "86400"))
+
+# (user_id, path_prefix, model_name)
+AnswerScope = Tuple[str, Optional[str], str]
+
+
+@dataclass
+class CachedAnswer:
+    query: str
+    embedding: array
+    answer: str
+    content_ids: FrozenSet[str]
+    created_at: float
+    similarity: float = 1.0
+
+
+_cache: "OrderedDict[AnswerScope, OrderedDict[str, CachedAnswer]]" = OrderedDict()
+_lock = threading.Lock()
+_stats: Dict[str, int] = {
+    "lookups": 0,
+    "hits": 0,
+    "misses": 0,
+    "stale": 0,
+    "expirations": 0,
+    "stores": 0,
+    "evictions": 0,
+}
+
+
+def _dot(a: array, b: array) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+def _count(name: str) -> None:
+    with _lock:
+        _stats[name] += 1
+
+
+def _is_current(user_id: str, content_ids: FrozenSet[str]) -> bool:
+    """근거 content id 가 모두 아직 삭제되지 않은 문서의 latest_content_id 인지 확인한다."""
+    stmt = text(
+        """
+        SELECT COUNT(*)
+        FROM document AS d
+        WHERE d.user_id = :user_id
+          AND d.deleted_at IS NULL
+          AND d.latest_content_id = ANY(CAST(:content_ids AS uuid[]))
+        """
+    ).bindparams(
+        bindparam("user_id", value=uuid.UUID(user_id)),
+        bindparam("content_ids", value=sorted(content_ids), type_=ARRAY(Text)),
+    )
+    with SessionLocal() as session:
+        current = session.execute(stmt).scalar_one()
+    return int(current) == len(content_ids)
+
+
+def lookup_answer(scope: AnswerScope, embedding: List[float]) -> Optional[CachedAnswer]:
+    """범위 안에서 질의 임베딩이 가장 가까운 캐시 답변 (유사도 미달/근거 문서 변경/만료 시 None)."""
+    vector = array("f", embedding)
+    now = time.time()
+    best: Optional[Tuple[str, CachedAnswer, float]] = None
+
+    with _lock:
+        _stats["lookups"] += 1
+        entries = _cache.get(scope)
+        if entries:
+            for key in [k for k, e in entries.items() if now - e.created_at > RAG_ANSWER_CACHE_TTL_SECONDS]:
+                del entries[key]
+                _stats["expirations"] += 1
+            for key, entry in entries.items():
+                similarity = _dot(vector, entry.embedding)
+                if similarity >= RAG_ANSWER_CACHE_SIMILARITY and (best is None or similarity > best[2]):
+                    best = (key, entry, similarity)
+
+    if best is None:
+        _count("misses")
+        return None
+
+    key, entry, similarity = best
+    # DB 확인은 잠금 밖에서 (검증 중 다른 요청을 막지 않도록)
+    if not _is_current(scope[0], entry.content_ids):
+        with _lock:
+            entries = _cache.get(scope)
+            if entries is not None:
+                entries.pop(key, None)
+            _stats["stale"] += 1
+            _stats["misses"] += 1
+        logger.info(f"[answer-cache] 근거 문서 변경으로 무효화: user_id={scope[0]}, query={entry.query[:50]}")
+        return None
+
+    with _lock:
+        entries = _cache.get(scope)
+        if entries is not None and key in entries:
+            entries.move_to_end(key)
+            _cache.move_to_end(scope)
+        _stats["hits"] += 1
+    return CachedAnswer(
+        query=entry.query,
+        embedding=entry.embedding,
+        answer=entry.answer,
+        content_ids=entry.content_ids,
+        created_at=entry.created_at,
+        similarity=similarity,
+    )
+
+
+def store_answer(
+    scope: AnswerScope,
+    query: str,
+    embedding: List[float],
+    answer: str,
+    content_ids: Iterable[str],
+) -> bool:
+    """답변을 저장한다. (근거 문서가 없거나 답변이 비어 있으면 저장하지 않고 False)"""
+    ids = frozenset(str(content_id) for content_id in content_ids if content_id)
+    if not ids or not answer:
+        return False
+
+    key = " ".join(query.split())
+    entry = CachedAnswer(
+        query=query,
+        embedding=array("f", embedding),
+        answer=answer,
+        content_ids=ids,
+        created_at=time.time(),
+    )
+    with _lock:
+        entries = _cache.get(scope)
+        if entries is None:
+            entries = OrderedDict()
+            _cache[scope] = entries
+        _cache.move_to_end(scope)
+        entries[key] = entry
+        entries.move_to_end(key)
+        _stats["stores"] += 1
+
+        while len(entries) > RAG_ANSWER_CACHE_MAX_ENTRIES:
+            entries.popitem(last=False)
+            _stats["evictions"] += 1
+        while len(_cache) > RAG_ANSWER_CACHE_MAX_SCOPES:
+            _, evicted = _cache.popitem(last=False)
+            _stats["evictions"] += len(evicted)
+    return True
+
+
+def get_answer_cache_stats() -> Dict[str, Any]:
+    """답변 캐시 지표 (현재 워커 프로세스 기준)."""
+    with _lock:
+        stats: Dict[str, Any] = dict(_stats)
+        stats["scopes"] = len(_cache)
+        stats["entries"] = sum(len(entries) for entries in _cache.values())
+    stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+    stats["enabled_by_default"] = RAG_ANSWER_CACHE
+    stats["similarity_threshold"] = RAG_ANSWER_CACHE_SIMILARITY
+    return stats
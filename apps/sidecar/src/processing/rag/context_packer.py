@@ -0,0 +1,278 @@
+"""
+RAG 에이전트 검색 결과 토큰 예산 패킹.
+
+- 검색 도구 결과는 그대로 LLM 프롬프트(ToolMessage)에 들어가므로, 같은 실행 안에서 중복되거나
+  겹치는 청크가 여러 번 들어가면 그만큼 프롬프트 토큰(비용/지연)이 늘어난다.
+- 도구 호출마다 결과를 아래 순서로 정리한 뒤 돌려준다.
+  1) 중복 제거: 같은 실행에서 이미 돌려준 청크(document_chunk_id) 또는 이미 돌려준 창(position 범위)에
+     완전히 포함되는 결과, 정규화한 본문이 같은 결과(다른 버전/문서의 동일 청크)는 뺀다.
+  2) 인접 병합: 같은 content 에서 position 이 맞닿는 결과는 순위가 높은 결과 하나로 이어 붙인다.
+     (청크 중첩 구간은 앞 청크 끝/뒤 청크 처음의 같은 문자열을 잘라 한 번만 남긴다)
+  3) 예산 자르기: 순위순으로 RAG_CONTEXT_TOKEN_BUDGET 토큰까지 담고, 넘치는 첫 결과는 남은 예산이
+     RAG_CONTEXT_MIN_TRIM_TOKENS 이상이면 잘라서 담는다. 나머지는 버린다.
+- 토큰 수는 청킹 때 저장한 document_chunk.token_count 를 우선 사용하고, 병합/창 본문처럼 저장 값이 없는
+  텍스트만 tiktoken 으로 세어 캐시한다. (CHUNK_TOKENIZER=embed 로 청킹했다면 근사값)
+- 지표: 호출마다 입력/출력/절감 토큰을 로그로 남기고, 누적 값은 get_packing_stats() 로 조회한다.
+
+주요 함수:
+- ContextPacker(token_budget).pack(tool_name, results) -> list[dict]
+- count_tokens(text) -> int
+- get_packing_stats() -> dict
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 검색 결과 패킹 사용 여부
+RAG_CONTEXT_PACKING = os.getenv("RAG_CONTEXT_PACKING", "true").strip().lower() in ("1", "true", "yes")
+# 도구 호출 1회 결과에 허용할 최대 토큰 수
+RAG_CONTEXT_TOKEN_BUDGET = int(os.getenv("RAG_CONTEXT_TOKEN_BUDGET", "3000"))
+# 예산을 넘는 결과를 잘라 담을 최소 남은 예산 (이보다 적게 남으면 자르지 않고 버림)
+RAG_CONTEXT_MIN_TRIM_TOKENS = int(os.getenv("RAG_CONTEXT_MIN_TRIM_TOKENS", "64"))
+# 저장 값이 없는 텍스트의 토큰 수를 셀 tiktoken 모델명
+RAG_CONTEXT_TOKENIZER_MODEL = os.getenv("RAG_CONTEXT_TOKENIZER_MODEL", "gpt-4o-mini")
+
+# 청크 중첩(chunk_overlap) 구간을 찾을 때 비교할 최대 문자 수
+_MAX_OVERLAP_CHARS = 1024
+_JOIN_SEPARATOR = "\n\n"
+
+_encoding: Any = None
+_encoding_loaded = False
+_lock = threading.Lock()
+_stats: Dict[str, int] = {
+    "calls": 0,
+    "results_in": 0,
+    "results_out": 0,
+    "tokens_in": 0,
+    "tokens_out": 0,
+    "duplicates": 0,
+    "merged": 0,
+    "truncated": 0,
+    "dropped": 0,
+}
+
+
+def _get_encoding() -> Any:
+    """tiktoken 인코딩을 1회 로딩 후 캐시. (tiktoken 이 없으면 None → 글자 수 근사)"""
+    global _encoding, _encoding_loaded
+
+    with _lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            try:
+                import tiktoken
+
+                try:
+                    _encoding = tiktoken.encoding_for_model(RAG_CONTEXT_TOKENIZER_MODEL)
+                except KeyError:
+                    _encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                logger.warning(f"[context-packer] tiktoken 로딩 실패, 글자 수로 토큰을 근사합니다: {e}")
+        return _encoding
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """텍스트 토큰 수. (같은 텍스트는 캐시)"""
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[: max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    return encoding.decode(tokens[:max_tokens])
+
+
+def _text_key(text: str) -> str:
+    """근사 중복 판정용 본문 키 (공백/대소문자 무시)."""
+    normalized = " ".join(text.casefold().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def _join_overlapping(head: str, tail: str) -> str:
+    """head 끝과 tail 처음이 겹치면(청크 중첩) 한 번만 남기고 이어 붙인다."""
+    limit = min(len(head), len(tail), _MAX_OVERLAP_CHARS)
+    for size in range(limit, 0, -1):
+        if head.endswith(tail[:size]):
+            return head + tail[size:]
+    return head + _JOIN_SEPARATOR + tail
+
+
+class _Passage:
+    """패킹 단위: 결과 1건(또는 인접 결과 병합본)."""
+
+    __slots__ = ("result", "content_id", "start", "end", "text", "tokens", "chunk_ids")
+
+    def __init__(self, result: Dict[str, Any]) -> None:
+        self.result = result
+        self.content_id: Optional[str] = result.get("document_content_id")
+        context = result.get("context")
+        if context:
+            self.start: Optional[int] = context.get("position_start")
+            self.end: Optional[int] = context.get("position_end")
+            self.text: str = context.get("content") or ""
+            self.tokens: int = count_tokens(self.text)
+            self.chunk_ids: List[str] = list(context.get("chunk_ids") or [result.get("document_chunk_id")])
+        else:
+            self.start = self.end = result.get("position")
+            self.text = result.get("chunk_content") or ""
+            stored = result.get("token_count")
+            self.tokens = int(stored) if stored else count_tokens(self.text)
+            self.chunk_ids = [result.get("document_chunk_id")]
+
+    def is_adjacent(self, other: "_Passage") -> bool:
+        if self.content_id is None or self.content_id != other.content_id:
+            return False
+        if None in (self.start, self.end, other.start, other.end):
+            return False
+        return other.start <= self.end + 1 and other.end >= self.start - 1
+
+    def absorb(self, other: "_Passage") -> None:
+        """인접한 other 를 position 순서에 맞게 이어 붙인다."""
+        if other.start < self.start:
+            self.text = _join_overlapping(other.text, self.text)
+        else:
+            self.text = _join_overlapping(self.text, other.text)
+        self.start = min(self.start, other.start)
+        self.end = max(self.end, other.end)
+        self.tokens = count_tokens(self.text)
+        self.chunk_ids.extend(c for c in other.chunk_ids if c not in self.chunk_ids)
+
+
+class ContextPacker:
+    """
+    에이전트 실행 1회 동안 도구 결과를 패킹한다.
+
+    - 실행 안에서 이미 돌려준 청크/창/본문을 기억해 이후 도구 호출에서 다시 넣지 않는다.
+    - 여러 도구 호출이 동시에 실행될 수 있으므로(비동기 ToolNode) 상태는 잠금으로 보호한다.
+    """
+
+    def __init__(self, token_budget: Optional[int] = None) -> None:
+        self.token_budget = token_budget or RAG_CONTEXT_TOKEN_BUDGET
+        self._seen_chunks: Set[str] = set()
+        self._seen_texts: Set[str] = set()
+        self._seen_ranges: Dict[str, List[Tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+
+    def _is_seen(self, passage: _Passage) -> bool:
+        if all(chunk_id in self._seen_chunks for chunk_id in passage.chunk_ids):
+            return True
+        if passage.content_id is not None and passage.start is not None and passage.end is not None:
+            for start, end in self._seen_ranges.get(passage.content_id, ()):
+                if start <= passage.start and passage.end <= end:
+                    return True
+        return _text_key(passage.text) in self._seen_texts
+
+    def _remember(self, passage: _Passage) -> None:
+        self._seen_chunks.update(passage.chunk_ids)
+        self._seen_texts.add(_text_key(passage.text))
+        if passage.content_id is not None and passage.start is not None and passage.end is not None:
+            self._seen_ranges.setdefault(passage.content_id, []).append((passage.start, passage.end))
+
+    def pack(self, tool_name: str, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """도구 결과(순위순 dict 목록)를 중복 제거/병합/예산 자르기 후 돌려준다."""
+        # 오류 결과(타임아웃 등)는 손대지 않는다
+        if not results or any("error" in r for r in results):
+            return results
+
+        passages = [_Passage(result) for result in results]
+        tokens_in = sum(p.tokens for p in passages)
+        duplicates = merged = truncated = dropped = 0
+        packed: List[_Passage] = []
+        packed_texts: Set[str] = set()
+        output: List[Dict[str, Any]] = []
+
+        with self._lock:
+            for passage in passages:
+                text_key = _text_key(passage.text)
+                if text_key in packed_texts or self._is_seen(passage):
+                    duplicates += 1
+                    continue
+                packed_texts.add(text_key)
+                target = next((p for p in packed if p.is_adjacent(passage)), None)
+                if target is not None:
+                    target.absorb(passage)
+                    merged += 1
+                    continue
+                packed.append(passage)
+
+            remaining = self.token_budget
+            tokens_out = 0
+            for passage in packed:
+                if remaining <= 0:
+                    dropped += 1
+                    continue
+                if passage.tokens > remaining:
+                    if remaining < RAG_CONTEXT_MIN_TRIM_TOKENS:
+                        dropped += 1
+                        remaining = 0
+                        continue
+                    passage.text = _truncate_to_tokens(passage.text, remaining)
+                    passage.tokens = remaining
+                    truncated += 1
+                else:
+                    # 잘린 결과는 기억하지 않는다 (이후 호출에서 전체 본문을 다시 받을 수 있도록)
+                    self._remember(passage)
+
+                remaining -= passage.tokens
+                tokens_out += passage.tokens
+                output.append(self._to_result(passage))
+
+        tokens_saved = tokens_in - tokens_out
+        logger.info(
+            f"[context-packer] {tool_name}: results {len(results)}→{len(output)} "
+            f"tokens {tokens_in}→{tokens_out} (saved {tokens_saved}, dup {duplicates}, "
+            f"merged {merged}, truncated {truncated}, dropped {dropped})"
+        )
+        with _lock:
+            _stats["calls"] += 1
+            _stats["results_in"] += len(results)
+            _stats["results_out"] += len(output)
+            _stats["tokens_in"] += tokens_in
+            _stats["tokens_out"] += tokens_out
+            _stats["duplicates"] += duplicates
+            _stats["merged"] += merged
+            _stats["truncated"] += truncated
+            _stats["dropped"] += dropped
+
+        if not output and duplicates:
+            return [{"message": "새 결과가 없습니다. 모든 결과가 이번 대화의 앞선 검색 결과에 이미 포함되어 있습니다."}]
+        return output
+
+    @staticmethod
+    def _to_result(passage: _Passage) -> Dict[str, Any]:
+        # 패킹된 본문은 chunk_content 하나로만 전달 (context 의 중복 본문 제거)
+        result = dict(passage.result)
+        result["chunk_content"] = passage.text
+        result["token_count"] = passage.tokens
+        result["context"] = None
+        if passage.start is not None:
+            result["position_start"] = passage.start
+            result["position_end"] = passage.end
+        if len(passage.chunk_ids) > 1:
+            result["chunk_ids"] = passage.chunk_ids
+        return result
+
+
+def get_packing_stats() -> Dict[str, Any]:
+    """검색 결과 패킹 지표 (현재 워커 프로세스 기준)."""
+    with _lock:
+        stats: Dict[str, Any] = dict(_stats)
+    stats["tokens_saved"] = stats["tokens_in"] - stats["tokens_out"]
+    stats["saved_ratio"] = stats["tokens_saved"] / stats["tokens_in"] if stats["tokens_in"] else 0.0
+    stats["enabled"] = RAG_CONTEXT_PACKING
+    stats["token_budget"] = RAG_CONTEXT_TOKEN_BUDGET
+    return stats
@@ -15,16 +15,52 @@ LangGraph 기반 RAG 에이전트.
 - `src/processing/tools/query_text_search.py`
 
 을 그대로 래핑해서 LangGraph Tool 로 노출한다.
+
+에이전트 재사용:
+- 도구는 사용자와 무관하게 모듈 단위로 한 번만 만들고, user_id / path_prefix 는 호출 시점의
+  RunnableConfig["configurable"] 로 전달받는다.
+- 컴파일된 create_react_agent 그래프는 모델명별로 한 번만 만들어 공유한다.
+- 모든 ChatOpenAI 인스턴스는 커넥션 풀을 가진 httpx 클라이언트 하나를 공유한다. (LLM API 연결 재사용)
+- get_rag_agent(user_id, path_prefix, model_name) 는 (user_id, path_prefix, model) 키의 LRU 캐시에서 RAGAgent 를 돌려준다.
+
+비동기 실행:
+- ainvoke / astream 은 LangGraph 비동기 경로로 실행되며, 도구는 동기/비동기 구현을 모두 가진다.
+  - 비동기 도구는 블로킹 검색 함수를 스레드에서 실행하고 RAG_TOOL_TIMEOUT_SECONDS 로 제한한다.
+  - 모델이 한 턴에 여러 도구를 호출하면 ToolNode 가 이를 동시에 실행하므로, 한 턴의 도구 대기 시간은
+    가장 느린 호출(최대 타임아웃)로 제한된다.
+
+검색 결과 패킹:
+- 도구 결과는 실행마다 만든 ContextPacker(context_packer.py)로 중복 제거/인접 병합/토큰 예산 자르기 후 모델에 전달한다.
+
+지연 시간 계측:
+- 실행마다 RunTrace(agent_timing.py)를 만들어 콜백 핸들러로 LLM 호출별 지연/첫 토큰/토큰 수를, 도구 래퍼로 도구 호출별
+  시간(embed / db / rerank 단계 포함)을, 스트리밍 실행에서는 TTFT 를 기록한다.
+- invoke / ainvoke 결과의 "timing" 에 요약이 담기고, 스트리밍 호출자는 trace 인자로 RunTrace 를 넘겨 요약을 받을 수 있다.
+
+답변 캐시:
+- use_cache(기본 RAG_ANSWER_CACHE) 이면 실행 전에 질의 임베딩으로 answer_cache.py 를 조회해, 비슷한 질문의 답변이 있고
+  그 답변의 근거 문서(검색된 content id)가 바뀌지 않았으면 에이전트를 실행하지 않고 캐시 답변을 돌려준다.
+- 실행한 경우에는 도구가 가져온 content id 를 근거로 답변을 저장한다.
 """
 
 from __future__ import annotations
 
+import asyncio
+import logging
+import os
 import sys
+import threading
+import time
 import uuid
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from langchain_core.tools import tool
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import create_react_agent
 
@@ -38,12 +74,32 @@ _TOOLS_DIR = _THIS_DIR.parent / "tools"
 if str(_TOOLS_DIR) not in sys.path:
     sys.path.append(str(_TOOLS_DIR))
 
-from query_embed_search import query_embed_search  # type: ignore[import]
+from query_embed_search import embed_query_to_vector, query_embed_search  # type: ignore[import]
 from query_text_search import query_text_search  # type: ignore[import]
 
+from src.processing.rag.agent_timing import RunTrace, tool_span
+from src.processing.rag.answer_cache import RAG_ANSWER_CACHE, CachedAnswer, lookup_answer, store_answer
+from src.processing.rag.context_packer import RAG_CONTEXT_PACKING, ContextPacker
+from src.processing.rag.speculation import (
+    RAG_SPECULATION_TOOLS,
+    RAG_SPECULATION_TOP_K,
+    RAG_SPECULATIVE_RETRIEVAL,
+    Speculation,
+)
+
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_MODEL = "gpt-4o-mini"
 
+# get_rag_agent 캐시에 보관할 RAGAgent 수 (user_id, path_prefix, model 조합)
+RAG_AGENT_CACHE_SIZE = int(os.getenv("RAG_AGENT_CACHE_SIZE", "256"))
+# 공유 LLM HTTP 클라이언트 커넥션 풀 크기 / 요청 타임아웃(초)
+RAG_LLM_MAX_CONNECTIONS = int(os.getenv("RAG_LLM_MAX_CONNECTIONS", "20"))
+RAG_LLM_TIMEOUT_SECONDS = float(os.getenv("RAG_LLM_TIMEOUT_SECONDS", "60"))
+# 비동기 도구 호출 1건의 제한 시간(초). 한 턴의 도구들은 동시에 실행되므로 턴 단위 대기 상한이기도 하다.
+RAG_TOOL_TIMEOUT_SECONDS = float(os.getenv("RAG_TOOL_TIMEOUT_SECONDS", "20"))
+
 
 def _normalize_user_id(user_id: uuid.UUID | str) -> uuid.UUID:
     if isinstance(user_id, uuid.UUID):
@@ -97,13 +153,375 @@ def _extract_answer_from_messages(messages: Sequence[Any]) -> str:
     return "" if content is None else str(content)
 
 
+def _scope_from_config(config: RunnableConfig) -> Tuple[uuid.UUID, Optional[str]]:
+    """호출 시점 config 에서 검색 범위(user_id, path_prefix)를 꺼낸다."""
+    configurable = (config or {}).get("configurable") or {}
+    if configurable.get("user_id") is None:
+        raise ValueError("검색 도구 호출에 user_id 가 없습니다. RAGAgent 를 통해 호출해야 합니다.")
+    return _normalize_user_id(configurable["user_id"]), configurable.get("path_prefix")
+
+
+def _search_embed(config: RunnableConfig, query: str, top_k: int, context_window: int) -> List[Dict[str, Any]]:
+    user_id, path_prefix = _scope_from_config(config)
+    return query_embed_search(
+        user_id=user_id,
+        query=query,
+        top_k=top_k,
+        path_prefix=path_prefix,
+        context_window=max(0, min(context_window, 10)),
+    )
+
+
+def _search_text(config: RunnableConfig, query: str, top_k: int, context_window: int) -> List[Dict[str, Any]]:
+    user_id, path_prefix = _scope_from_config(config)
+    return query_text_search(
+        user_id=user_id,
+        query=query,
+        top_k=top_k,
+        path_prefix=path_prefix,
+        context_window=max(0, min(context_window, 10)),
+    )
+
+
+def _speculative_results(
+    config: RunnableConfig, tool_name: str, query: str, top_k: int, context_window: int
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    이번 실행의 추측 검색 중 요청과 일치하는 결과.
+
+    - 추측 모드가 아니거나, 불일치/대기열 취소/실패이거나, 예상 소요 시간 안에 끝나지 않으면 None (직접 검색)
+    - 결과를 실제로 받은 경우에만 적중으로 기록한다. (시간 초과는 late, 예외는 failed)
+    """
+    speculation = ((config or {}).get("configurable") or {}).get("speculation")
+    if speculation is None:
+        return None
+    future = speculation.match(tool_name, query, top_k, context_window)
+    if future is None:
+        return None
+    try:
+        results = future.result(timeout=speculation.wait_timeout(tool_name))
+    except TimeoutError:
+        speculation.record(tool_name, "late")
+        return None
+    except Exception:
+        speculation.record(tool_name, "failed")
+        return None
+    speculation.record(tool_name, "hit")
+    return results[:top_k]
+
+
+async def _aspeculative_results(
+    config: RunnableConfig, tool_name: str, query: str, top_k: int, context_window: int
+) -> Optional[List[Dict[str, Any]]]:
+    """_speculative_results 의 비동기 버전 (이벤트 루프를 막지 않고 기다린다)."""
+    speculation = ((config or {}).get("configurable") or {}).get("speculation")
+    if speculation is None:
+        return None
+    future = speculation.match(tool_name, query, top_k, context_window)
+    if future is None:
+        return None
+    try:
+        results = await asyncio.wait_for(asyncio.wrap_future(future), timeout=speculation.wait_timeout(tool_name))
+    except TimeoutError:
+        speculation.record(tool_name, "late")
+        return None
+    except Exception:
+        speculation.record(tool_name, "failed")
+        return None
+    speculation.record(tool_name, "hit")
+    return results[:top_k]
+
+
+def _run_trace(config: RunnableConfig) -> Optional[RunTrace]:
+    """이번 실행의 지연 시간 계측 기록 (RAGAgent 밖에서 도구를 직접 호출하면 None)."""
+    return ((config or {}).get("configurable") or {}).get("trace")
+
+
+def _tool_output(config: RunnableConfig, tool_name: str, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    도구 결과를 모델에 넘기기 전 후처리.
+
+    - 결과의 document_content_id 를 이번 실행의 근거 목록에 기록한다. (답변 캐시 무효화 기준)
+    - 이번 실행의 ContextPacker 로 토큰 예산에 맞춰 정리한다. (패킹 비활성 시 그대로)
+    """
+    configurable = (config or {}).get("configurable") or {}
+    sources = configurable.get("retrieved_content_ids")
+    if sources is not None:
+        sources.update(r["document_content_id"] for r in results if r.get("document_content_id"))
+
+    packer = configurable.get("context_packer")
+    if packer is None:
+        return results
+    return packer.pack(tool_name, results)
+
+
+def _embed_search(
+    query: str,
+    config: RunnableConfig,
+    top_k: int = 5,
+    context_window: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    사용자의 DocumentChunk에서 의미론적(임베딩) 검색을 수행한다.
+
+    context_window=n 이면 각 결과의 앞뒤 n개 청크를 병합한 "context" 를 함께 반환한다.
+    """
+    with tool_span(_run_trace(config), "embed_search") as span:
+        results = _speculative_results(config, "embed_search", query, top_k, context_window)
+        if results is not None:
+            span.source = "speculation"
+        else:
+            # 추측 검색 불일치/실패/지연 시 직접 검색
+            results = _search_embed(config, query, top_k, context_window)
+        return _tool_output(config, "embed_search", results)
+
+
+def _text_search(
+    query: str,
+    config: RunnableConfig,
+    top_k: int = 5,
+    context_window: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    사용자의 DocumentChunk에서 텍스트(full-text) 기반 검색을 수행한다.
+
+    context_window=n 이면 각 결과의 앞뒤 n개 청크를 병합한 "context" 를 함께 반환한다.
+    """
+    with tool_span(_run_trace(config), "text_search") as span:
+        results = _speculative_results(config, "text_search", query, top_k, context_window)
+        if results is not None:
+            span.source = "speculation"
+        else:
+            results = _search_text(config, query, top_k, context_window)
+        return _tool_output(config, "text_search", results)
+
+
+async def _run_tool_in_thread(func: Any, name: str, **kwargs: Any) -> List[Dict[str, Any]]:
+    """
+    블로킹 검색 함수를 스레드에서 실행한다. (RAG_TOOL_TIMEOUT_SECONDS 초과 시 오류 결과 반환)
+
+    - 타임아웃 시 스레드의 DB 조회는 끝까지 실행되지만, 에이전트는 기다리지 않고 다음 단계로 진행한다.
+    """
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(func, **kwargs), timeout=RAG_TOOL_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        return [{"error": "timeout", "message": f"{name} 검색이 {RAG_TOOL_TIMEOUT_SECONDS:.0f}초 안에 끝나지 않았습니다."}]
+
+
+async def _aembed_search(
+    query: str,
+    config: RunnableConfig,
+    top_k: int = 5,
+    context_window: int = 0,
+) -> List[Dict[str, Any]]:
+    with tool_span(_run_trace(config), "embed_search") as span:
+        results = await _aspeculative_results(config, "embed_search", query, top_k, context_window)
+        if results is not None:
+            span.source = "speculation"
+        else:
+            results = await _run_tool_in_thread(
+                _search_embed, "embed_search", config=config, query=query, top_k=top_k, context_window=context_window
+            )
+            span.error = any("error" in r for r in results)
+        return _tool_output(config, "embed_search", results)
+
+
+async def _atext_search(
+    query: str,
+    config: RunnableConfig,
+    top_k: int = 5,
+    context_window: int = 0,
+) -> List[Dict[str, Any]]:
+    with tool_span(_run_trace(config), "text_search") as span:
+        results = await _aspeculative_results(config, "text_search", query, top_k, context_window)
+        if results is not None:
+            span.source = "speculation"
+        else:
+            results = await _run_tool_in_thread(
+                _search_text, "text_search", config=config, query=query, top_k=top_k, context_window=context_window
+            )
+            span.error = any("error" in r for r in results)
+        return _tool_output(config, "text_search", results)
+
+
+# 동기(invoke/stream) 경로는 func, 비동기(ainvoke/astream) 경로는 coroutine 을 사용
+embed_search = StructuredTool.from_function(func=_embed_search, coroutine=_aembed_search, name="embed_search")
+text_search = StructuredTool.from_function(func=_text_search, coroutine=_atext_search, name="text_search")
+
+DB_TOOLS: List[Any] = [embed_search, text_search]
+
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_compiled_agents: Dict[str, Any] = {}
+_agent_cache: "OrderedDict[Tuple[str, Optional[str], str], RAGAgent]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _get_http_client() -> httpx.Client:
+    """모든 ChatOpenAI 가 공유하는 커넥션 풀 httpx 클라이언트."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=RAG_LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=RAG_LLM_MAX_CONNECTIONS,
+                ),
+                timeout=RAG_LLM_TIMEOUT_SECONDS,
+            )
+        return _http_client
+
+
+def _get_async_http_client() -> httpx.AsyncClient:
+    """비동기 경로(ainvoke/astream)에서 모든 ChatOpenAI 가 공유하는 커넥션 풀 httpx 클라이언트."""
+    global _async_http_client
+    with _lock:
+        if _async_http_client is None:
+            _async_http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=RAG_LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=RAG_LLM_MAX_CONNECTIONS,
+                ),
+                timeout=RAG_LLM_TIMEOUT_SECONDS,
+            )
+        return _async_http_client
+
+
+def _get_compiled_agent(model_name: str) -> Any:
+    """모델명별로 한 번만 컴파일한 create_react_agent 그래프."""
+    with _lock:
+        agent = _compiled_agents.get(model_name)
+    if agent is not None:
+        return agent
+
+    llm = ChatOpenAI(
+        model=model_name,
+        temperature=0,
+        http_client=_get_http_client(),
+        http_async_client=_get_async_http_client(),
+        # 스트리밍 호출에서도 토큰 사용량을 받아 지연 계측에 기록
+        stream_usage=True,
+    )
+    agent = create_react_agent(model=llm, tools=DB_TOOLS, prompt=SYSTEM_PROMPT)
+    with _lock:
+        # 동시에 만든 경우 먼저 등록된 그래프를 사용
+        return _compiled_agents.setdefault(model_name, agent)
+
+
+def get_rag_agent(
+    user_id: uuid.UUID | str,
+    path_prefix: Optional[str] = None,
+    model_name: str = DEFAULT_MODEL,
+) -> "RAGAgent":
+    """
+    (user_id, path_prefix, model_name) 키의 LRU 캐시에서 RAGAgent 를 돌려준다. (없으면 생성)
+
+    - 캐시 크기: RAG_AGENT_CACHE_SIZE
+    """
+    normalized_user_id = _normalize_user_id(user_id)
+    key = (str(normalized_user_id), path_prefix, model_name)
+    with _lock:
+        agent = _agent_cache.get(key)
+        if agent is not None:
+            _agent_cache.move_to_end(key)
+            return agent
+
+    agent = RAGAgent(normalized_user_id, path_prefix=path_prefix, model_name=model_name)
+    with _lock:
+        agent = _agent_cache.setdefault(key, agent)
+        _agent_cache.move_to_end(key)
+        while len(_agent_cache) > RAG_AGENT_CACHE_SIZE:
+            _agent_cache.popitem(last=False)
+    return agent
+
+
+def _token_usage(response: Any) -> Tuple[Optional[int], Optional[int]]:
+    """LLMResult 에서 (입력 토큰, 출력 토큰) 을 꺼낸다. (없으면 None)"""
+    for generations in getattr(response, "generations", None) or []:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens"), usage.get("output_tokens")
+    usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens"), usage.get("completion_tokens")
+
+
+class _TimingCallbackHandler(BaseCallbackHandler):
+    """LLM 호출별 지연 / 첫 토큰까지 시간 / 토큰 수를 RunTrace 에 기록하는 콜백."""
+
+    # 실행기 스레드로 넘기지 않고 호출 지점에서 바로 실행 (시각 오차 방지)
+    run_inline = True
+
+    def __init__(self, trace: RunTrace) -> None:
+        self.trace = trace
+        self._started: Dict[uuid.UUID, Tuple[float, Optional[str]]] = {}
+        self._first_token: Dict[uuid.UUID, float] = {}
+
+    def on_chat_model_start(self, serialized: Any, messages: Any, *, run_id: uuid.UUID, **kwargs: Any) -> None:
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or (kwargs.get("metadata") or {}).get("ls_model_name")
+        self._started[run_id] = (time.perf_counter(), model)
+
+    def on_llm_new_token(self, token: str, *, run_id: uuid.UUID, **kwargs: Any) -> None:
+        self._first_token.setdefault(run_id, time.perf_counter())
+
+    def on_llm_end(self, response: Any, *, run_id: uuid.UUID, **kwargs: Any) -> None:
+        started, model = self._started.pop(run_id, (None, None))
+        first_token = self._first_token.pop(run_id, None)
+        if started is None:
+            return
+        prompt_tokens, completion_tokens = _token_usage(response)
+        self.trace.llm_call(
+            model,
+            latency_ms=round((time.perf_counter() - started) * 1000.0, 2),
+            first_token_ms=None if first_token is None else round((first_token - started) * 1000.0, 2),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+        )
+
+    def on_llm_error(self, error: BaseException, *, run_id: uuid.UUID, **kwargs: Any) -> None:
+        self._started.pop(run_id, None)
+        self._first_token.pop(run_id, None)
+
+
+# 캐시 답변을 스트리밍할 때 metadata 의 langgraph_node 값
+_CACHE_NODE = "answer_cache"
+
+
+class _AnswerCollector:
+    """스트리밍 메시지 청크에서 마지막 AI 메시지(최종 답변) 텍스트를 모은다."""
+
+    def __init__(self) -> None:
+        self._message_id: Optional[str] = None
+        self._parts: List[str] = []
+
+    def add(self, message: Any) -> bool:
+        """AI 메시지 청크를 모은다. 답변 텍스트가 있는 청크였으면 True."""
+        if getattr(message, "type", None) not in ("AIMessageChunk", "ai"):
+            return False
+        message_id = getattr(message, "id", None)
+        if message_id != self._message_id:
+            self._message_id = message_id
+            self._parts = []
+        content = getattr(message, "content", None)
+        if isinstance(content, str):
+            self._parts.append(content)
+            return bool(content)
+        return False
+
+    @property
+    def answer(self) -> str:
+        return "".join(self._parts)
+
+
 class RAGAgent:
     """
     단일 사용자/경로에 대해 LangGraph 기반 RAG 에이전트를 캡슐화한 클래스.
 
     - 생성 시점에 user_id / path_prefix / 모델명을 고정
-    - 내부적으로 create_react_agent + DB 검색 도구(embed/text)를 구성
-    - 라우트 레벨에서는 이 클래스를 생성한 뒤, `invoke` 또는 `stream`만 호출하면 됨
+    - 모델명별로 공유되는 컴파일된 그래프 + 모듈 단위 DB 검색 도구(embed/text)를 사용하고,
+      user_id / path_prefix 는 invoke/stream 시 config 로 도구에 전달
+    - 라우트 레벨에서는 get_rag_agent(...) 로 캐시된 인스턴스를 얻은 뒤, `invoke` 또는 `stream`만 호출하면 됨
     """
 
     def __init__(
@@ -116,84 +534,260 @@ class RAGAgent:
         self.path_prefix = path_prefix
         self.model_name = model_name
 
-        tools = self._build_db_tools()
-        llm = ChatOpenAI(model=self.model_name, temperature=0)
-
-        self._agent = create_react_agent(
-            model=llm,
-            tools=tools,
-            prompt=SYSTEM_PROMPT,
-        )
+        self._agent = _get_compiled_agent(self.model_name)
+        self._cache_scope = (str(self.user_id), self.path_prefix, self.model_name)
+        self._config: RunnableConfig = {
+            "configurable": {"user_id": str(self.user_id), "path_prefix": self.path_prefix},
+        }
 
     # ------------------------------------------------------------------ #
     # 내부 구성 요소
     # ------------------------------------------------------------------ #
-    def _build_db_tools(self) -> List[Any]:
+    def _start_run(
+        self,
+        query: str,
+        speculative: Optional[bool],
+        trace: RunTrace,
+    ) -> Tuple[RunnableConfig, Optional[Speculation]]:
         """
-        현재 user_id / path_prefix 에 고정된 DB 검색 Tool 들을 생성한다.
+        실행 config 를 만든다.
 
-        - embed_search: 의미론적(임베딩) 검색
-        - text_search: 텍스트(full-text) 검색
+        - 지연 시간 계측: trace 를 도구에 전달하고, LLM 호출은 콜백 핸들러로 기록한다.
+        - 검색 결과 패킹이 켜져 있으면 실행마다 ContextPacker 를 만들어 config 로 도구에 전달한다.
+        - 추측 모드이면 원 질의 검색을 먼저 시작하고 config 로 도구에 전달한다.
         """
-        user_id = self.user_id
-        path_prefix = self.path_prefix
-
-        @tool
-        def embed_search(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-            """사용자의 DocumentChunk에서 의미론적(임베딩) 검색을 수행한다."""
-            return query_embed_search(
-                user_id=user_id,
-                query=query,
-                top_k=top_k,
-                path_prefix=path_prefix,
-            )
+        configurable: Dict[str, Any] = dict(self._config["configurable"])
+        configurable["retrieved_content_ids"] = set()
+        configurable["trace"] = trace
+        if RAG_CONTEXT_PACKING:
+            configurable["context_packer"] = ContextPacker()
+        callbacks = [_TimingCallbackHandler(trace)]
+
+        use_speculation = RAG_SPECULATIVE_RETRIEVAL if speculative is None else speculative
+        if not use_speculation:
+            return {"configurable": configurable, "callbacks": callbacks}, None
+
+        base_config: RunnableConfig = self._config
+        searches = {
+            "embed_search": lambda: _search_embed(base_config, query, RAG_SPECULATION_TOP_K, 0),
+            "text_search": lambda: _search_text(base_config, query, RAG_SPECULATION_TOP_K, 0),
+        }
+        speculation = Speculation(
+            query,
+            {name: search for name, search in searches.items() if name in RAG_SPECULATION_TOOLS},
+            top_k=RAG_SPECULATION_TOP_K,
+        )
+        configurable["speculation"] = speculation
+        return {"configurable": configurable, "callbacks": callbacks}, speculation
 
-        @tool
-        def text_search(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
-            """사용자의 DocumentChunk에서 텍스트(full-text) 기반 검색을 수행한다."""
-            return query_text_search(
-                user_id=user_id,
-                query=query,
-                top_k=top_k,
-                path_prefix=path_prefix,
-            )
+    def _lookup_cache(self, query: str, use_cache: Optional[bool]) -> Tuple[Optional[List[float]], Optional[CachedAnswer]]:
+        """
+        답변 캐시를 조회한다. -> (질의 임베딩, 캐시 답변)
 
-        return [embed_search, text_search]
+        - 캐시를 쓰지 않으면 (None, None). 임베딩/DB 오류 시에도 캐시 없이 진행하도록 (None, None).
+        """
+        if not (RAG_ANSWER_CACHE if use_cache is None else use_cache):
+            return None, None
+        try:
+            embedding = embed_query_to_vector(query)
+            return embedding, lookup_answer(self._cache_scope, embedding)
+        except Exception as e:
+            logger.warning(f"[answer-cache] 조회 실패, 캐시 없이 실행합니다: {e}")
+            return None, None
+
+    def _store_cache(self, query: str, embedding: Optional[List[float]], answer: str, config: RunnableConfig) -> None:
+        if embedding is None:
+            return
+        sources = config["configurable"].get("retrieved_content_ids") or set()
+        store_answer(self._cache_scope, query, embedding, answer, sources)
+
+    @staticmethod
+    def _cached_result(query: str, cached: CachedAnswer) -> Dict[str, Any]:
+        messages = [HumanMessage(content=query), AIMessage(content=cached.answer)]
+        return {"answer": cached.answer, "messages": messages, "cached": True}
 
     # ------------------------------------------------------------------ #
-    # 공개 인터페이스: 동기 호출 + 스트리밍
+    # 공개 인터페이스: 동기/비동기 호출 + 스트리밍
     # ------------------------------------------------------------------ #
-    def invoke(self, query: str) -> Dict[str, Any]:
+    def invoke(
+        self,
+        query: str,
+        speculative: Optional[bool] = None,
+        use_cache: Optional[bool] = None,
+    ) -> Dict[str, Any]:
         """
         단일 질의를 동기적으로 처리하고, 최종 답변/메시지 전체를 반환한다.
 
+        - speculative: 추측 검색 사용 여부 (None 이면 RAG_SPECULATIVE_RETRIEVAL)
+        - use_cache: 답변 캐시 사용 여부 (None 이면 RAG_ANSWER_CACHE)
+
         반환 예시:
         {
           "answer": "...",
-          "messages": [...],  # LangGraph state의 messages
+          "messages": [...],  # LangGraph state의 messages (캐시 적중 시 질문/답변 2개)
+          "cached": False,    # 캐시 답변 여부
+          "timing": {...},    # 지연 시간 계측 요약 (RunTrace.finish)
         }
         """
-        state = self._agent.invoke(
-            {"messages": [{"role": "user", "content": query}]},
-        )
-        messages: Sequence[Any] = state.get("messages", [])  # type: ignore[assignment]
-        answer = _extract_answer_from_messages(messages)
-        return {"answer": answer, "messages": messages}
-
-    def stream(self, query: str):
+        trace = RunTrace("invoke")
+        status = "error"
+        try:
+            embedding, cached = self._lookup_cache(query, use_cache)
+            if cached is not None:
+                trace.cached = True
+                result = self._cached_result(query, cached)
+            else:
+                config, speculation = self._start_run(query, speculative, trace)
+                try:
+                    state = self._agent.invoke(
+                        {"messages": [{"role": "user", "content": query}]},
+                        config=config,
+                    )
+                finally:
+                    if speculation is not None:
+                        speculation.finish()
+                messages: Sequence[Any] = state.get("messages", [])  # type: ignore[assignment]
+                answer = _extract_answer_from_messages(messages)
+                self._store_cache(query, embedding, answer, config)
+                result = {"answer": answer, "messages": messages, "cached": False}
+            status = "ok"
+        finally:
+            summary = trace.finish(status)
+        result["timing"] = summary
+        return result
+
+    def stream(
+        self,
+        query: str,
+        speculative: Optional[bool] = None,
+        use_cache: Optional[bool] = None,
+        trace: Optional[RunTrace] = None,
+    ):
         """
         LangGraph 에이전트의 메시지를 그대로 스트리밍하는 제너레이터.
 
         FastAPI 등의 라우트에서 SSE/WebSocket 으로 바로 전달하기 좋은 형태.
+        캐시 적중 시에는 답변 AIMessage 1개를 metadata {"langgraph_node": "answer_cache"} 로 내보낸다.
+        trace 를 넘기면 스트림 종료 후 trace.summary 로 지연 시간 계측 요약을 볼 수 있다.
 
         for message, metadata in rag_agent.stream(query):
             ...
         """
-        for message, metadata in self._agent.stream(
-            input={"messages": [{"role": "user", "content": query}]},
-            stream_mode="messages",
-        ):
-            yield message, metadata
-
+        trace = trace or RunTrace("stream")
+        status = "error"
+        try:
+            embedding, cached = self._lookup_cache(query, use_cache)
+            if cached is not None:
+                trace.cached = True
+                trace.mark_first_token()
+                yield AIMessage(content=cached.answer), {"langgraph_node": _CACHE_NODE}
+                status = "ok"
+                return
+
+            config, speculation = self._start_run(query, speculative, trace)
+            collector = _AnswerCollector()
+            try:
+                for message, metadata in self._agent.stream(
+                    input={"messages": [{"role": "user", "content": query}]},
+                    config=config,
+                    stream_mode="messages",
+                ):
+                    if collector.add(message):
+                        trace.mark_first_token()
+                    yield message, metadata
+            finally:
+                if speculation is not None:
+                    speculation.finish()
+            self._store_cache(query, embedding, collector.answer, config)
+            status = "ok"
+        except (GeneratorExit, asyncio.CancelledError):
+            # 호출자가 스트림을 중간에 닫음 (클라이언트 연결 종료 등)
+            status = "cancelled"
+            raise
+        finally:
+            trace.finish(status)
+
+    async def ainvoke(
+        self,
+        query: str,
+        speculative: Optional[bool] = None,
+        use_cache: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """
+        invoke 의 비동기 버전. (이벤트 루프 스레드를 점유하지 않으며, 한 턴의 도구 호출은 동시에 실행)
 
+        반환 형식은 invoke 와 같다.
+        """
+        trace = RunTrace("ainvoke")
+        status = "error"
+        try:
+            embedding, cached = await asyncio.to_thread(self._lookup_cache, query, use_cache)
+            if cached is not None:
+                trace.cached = True
+                result = self._cached_result(query, cached)
+            else:
+                config, speculation = self._start_run(query, speculative, trace)
+                try:
+                    state = await self._agent.ainvoke(
+                        {"messages": [{"role": "user", "content": query}]},
+                        config=config,
+                    )
+                finally:
+                    if speculation is not None:
+                        speculation.finish()
+                messages: Sequence[Any] = state.get("messages", [])  # type: ignore[assignment]
+                answer = _extract_answer_from_messages(messages)
+                self._store_cache(query, embedding, answer, config)
+                result = {"answer": answer, "messages": messages, "cached": False}
+            status = "ok"
+        finally:
+            summary = trace.finish(status)
+        result["timing"] = summary
+        return result
+
+    async def astream(
+        self,
+        query: str,
+        speculative: Optional[bool] = None,
+        use_cache: Optional[bool] = None,
+        trace: Optional[RunTrace] = None,
+    ):
+        """
+        stream 의 비동기 버전. (async 제너레이터)
 
+        async for message, metadata in rag_agent.astream(query):
+            ...
+        """
+        trace = trace or RunTrace("astream")
+        status = "error"
+        try:
+            embedding, cached = await asyncio.to_thread(self._lookup_cache, query, use_cache)
+            if cached is not None:
+                trace.cached = True
+                trace.mark_first_token()
+                yield AIMessage(content=cached.answer), {"langgraph_node": _CACHE_NODE}
+                status = "ok"
+                return
+
+            config, speculation = self._start_run(query, speculative, trace)
+            collector = _AnswerCollector()
+            try:
+                async for message, metadata in self._agent.astream(
+                    input={"messages": [{"role": "user", "content": query}]},
+                    config=config,
+                    stream_mode="messages",
+                ):
+                    if collector.add(message):
+                        trace.mark_first_token()
+                    yield message, metadata
+            finally:
+                if speculation is not None:
+                    speculation.finish()
+            self._store_cache(query, embedding, collector.answer, config)
+            status = "ok"
+        except (GeneratorExit, asyncio.CancelledError):
+            # 호출자가 스트림을 중간에 닫음 (클라이언트 연결 종료 등)
+            status = "cancelled"
+            raise
+        finally:
+            trace.finish(status)
@@ -0,0 +1,174 @@
+"""
+RAG 에이전트 추측 검색(speculative retrieval).
+
+- 문서 질문에서 첫 LLM 호출은 보통 "검색할지"만 결정하므로, 검색은 LLM 왕복 1회만큼 늦게 시작된다.
+- 추측 모드에서는 질의가 들어오자마자 원 질의로 검색 도구(embed/text)를 백그라운드 스레드에서 먼저 실행하고,
+  모델이 같은 검색을 요청하면 그 결과를 도구 결과로 돌려준다. 요청하지 않은 추측 결과는 버린다.
+- 일치 기준: 같은 도구 + 정규화된 질의 문자열 동일(대소문자/공백/구두점 무시)
+  + context_window == 0 + 요청 top_k ≤ 추측 top_k (상위 top_k 개만 잘라 사용)
+- 대기 상한: 추측 결과는 직접 검색보다 빨라야 의미가 있으므로 도구 제한 시간까지 기다리지 않는다.
+  - 일치한 추측 검색이 아직 스레드풀 대기열에 있으면 취소하고 바로 직접 검색한다.
+  - 실행 중이면 검색 시작 시점부터 RAG_SPECULATION_WAIT_SECONDS 까지만 기다리고, 넘으면 직접 검색한다.
+- 지표: 실행 수 / 추측 결과를 1번 이상 사용한 실행 수(hit_rate) / 도구 호출 적중·불일치 / 대기열 취소 /
+  대기 상한 초과(late) / 추측 검색 실패(failed) / 버린 추측 검색 수
+  - 적중(tool_hits)과 사용 표시는 도구가 추측 결과를 실제로 받은 뒤(record("hit"))에만 센다.
+
+주요 함수:
+- Speculation(query, searches, top_k)
+- get_speculation_stats() -> dict
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set
+
+# 추측 검색을 기본으로 켤지 여부 (요청별로 speculative 인자로 덮어쓸 수 있음)
+RAG_SPECULATIVE_RETRIEVAL = os.getenv("RAG_SPECULATIVE_RETRIEVAL", "false").strip().lower() in ("1", "true", "yes")
+# 추측 검색 결과 수 (모델이 이보다 작은 top_k 를 요청하면 잘라서 사용)
+RAG_SPECULATION_TOP_K = int(os.getenv("RAG_SPECULATION_TOP_K", "8"))
+# 추측 실행할 도구 (쉼표 구분)
+RAG_SPECULATION_TOOLS = tuple(
+    name.strip()
+    for name in os.getenv("RAG_SPECULATION_TOOLS", "embed_search,text_search").split(",")
+    if name.strip()
+)
+# 추측 검색 스레드 수
+RAG_SPECULATION_WORKERS = int(os.getenv("RAG_SPECULATION_WORKERS", "4"))
+# 추측 검색 결과를 기다리는 상한(초, 검색 시작 시점 기준). 검색 1건의 예상 소요 시간 정도로 둔다.
+RAG_SPECULATION_WAIT_SECONDS = float(os.getenv("RAG_SPECULATION_WAIT_SECONDS", "2"))
+
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_stats: Dict[str, int] = {
+    "runs": 0,
+    "runs_with_hit": 0,
+    "tool_hits": 0,
+    "tool_misses": 0,
+    "tool_queued": 0,
+    "tool_late": 0,
+    "tool_failed": 0,
+    "wasted": 0,
+}
+# record() 결과 → 지표 키
+_OUTCOME_STATS = {"hit": "tool_hits", "late": "tool_late", "failed": "tool_failed"}
+
+
+def normalize_query(query: str) -> str:
+    """대소문자/공백/구두점을 무시한 비교용 질의 문자열."""
+    return " ".join(_NON_WORD.sub(" ", query.casefold()).split())
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=RAG_SPECULATION_WORKERS, thread_name_prefix="rag-speculation")
+        return _executor
+
+
+class Speculation:
+    """
+    한 번의 에이전트 실행에 대한 추측 검색 묶음.
+
+    - 생성 즉시 searches 의 각 검색을 스레드풀에 제출한다.
+    - 도구는 match() 로 추측 결과(Future)를 받아 wait_timeout() 동안만 기다린 뒤 record() 로 결과를 기록하고,
+      실행이 끝나면 finish() 로 지표를 기록한다.
+    """
+
+    def __init__(self, query: str, searches: Dict[str, Callable[[], List[Dict[str, Any]]]], top_k: int) -> None:
+        self.query_key = normalize_query(query)
+        self.top_k = top_k
+        executor = _get_executor()
+        # 검색별 실제 시작 시각 (스레드풀 대기 시간 제외)
+        self.started_at: Dict[str, float] = {}
+        self.futures: Dict[str, Future] = {
+            name: executor.submit(self._run, name, search) for name, search in searches.items()
+        }
+        self.used: Set[str] = set()
+        self._lock = threading.Lock()
+        self._finished = False
+
+    def _run(self, name: str, search: Callable[[], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        self.started_at[name] = time.perf_counter()
+        return search()
+
+    def match(self, tool_name: str, query: str, top_k: int, context_window: int) -> Optional[Future]:
+        """
+        요청한 검색과 일치하는 추측 검색 Future (없으면 None).
+
+        - 일치하더라도 아직 스레드풀 대기열에 있으면 취소하고 None 을 돌려준다. (직접 검색이 더 빠름)
+        - 일치한 경우 적중 여부는 결과를 기다린 뒤 record() 로 기록한다.
+        """
+        future = self.futures.get(tool_name)
+        if future is None:
+            return None
+
+        hit = context_window == 0 and 0 < top_k <= self.top_k and normalize_query(query) == self.query_key
+        if hit and not future.running() and not future.done() and future.cancel():
+            with _lock:
+                _stats["tool_queued"] += 1
+            return None
+        if not hit:
+            with _lock:
+                _stats["tool_misses"] += 1
+            return None
+        return future
+
+    def record(self, tool_name: str, outcome: str) -> None:
+        """
+        match() 로 받은 추측 검색의 결과를 기록한다.
+
+        - "hit": 결과를 도구 결과로 사용 (사용한 도구로 표시)
+        - "late": 대기 상한 안에 끝나지 않아 직접 검색
+        - "failed": 추측 검색이 예외로 끝나 직접 검색
+        """
+        if outcome == "hit":
+            with self._lock:
+                self.used.add(tool_name)
+        with _lock:
+            _stats[_OUTCOME_STATS[outcome]] += 1
+
+    def wait_timeout(self, tool_name: str) -> float:
+        """추측 검색 결과를 더 기다릴 시간(초): 검색 시작 후 RAG_SPECULATION_WAIT_SECONDS 까지."""
+        started = self.started_at.get(tool_name)
+        if started is None:
+            return RAG_SPECULATION_WAIT_SECONDS
+        return max(0.0, RAG_SPECULATION_WAIT_SECONDS - (time.perf_counter() - started))
+
+    def finish(self) -> None:
+        """실행 종료 시 호출: 사용하지 않은 추측 검색은 취소(미시작 시)하고 지표를 기록한다."""
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+            unused = [future for name, future in self.futures.items() if name not in self.used]
+            used_any = bool(self.used)
+
+        for future in unused:
+            future.cancel()
+        with _lock:
+            _stats["runs"] += 1
+            _stats["runs_with_hit"] += int(used_any)
+            _stats["wasted"] += len(unused)
+
+
+def get_speculation_stats() -> Dict[str, Any]:
+    """추측 검색 지표 (현재 워커 프로세스 기준)."""
+    with _lock:
+        stats: Dict[str, Any] = dict(_stats)
+    tool_calls = (
+        stats["tool_hits"] + stats["tool_misses"] + stats["tool_queued"] + stats["tool_late"] + stats["tool_failed"]
+    )
+    stats["hit_rate"] = stats["runs_with_hit"] / stats["runs"] if stats["runs"] else 0.0
+    stats["tool_hit_rate"] = stats["tool_hits"] / tool_calls if tool_calls else 0.0
+    stats["enabled_by_default"] = RAG_SPECULATIVE_RETRIEVAL
+    stats["tools"] = list(RAG_SPECULATION_TOOLS)
+    stats["wait_seconds"] = RAG_SPECULATION_WAIT_SECONDS
+    return stats
@@ -0,0 +1,244 @@
+"""
+로컬 모델 아티팩트 스토어 (오프라인 로딩).
+
+- 임베딩 모델(Arctic Embed), rerank cross-encoder, Marker(surya) 모델을 MODEL_STORE_DIR 아래에 고정(pin)된 스냅샷으로 보관한다.
+  - HF 모델: MODEL_STORE_DIR/hf  (Hugging Face 캐시 레이아웃, trust_remote_code 의존 저장소 포함)
+  - Marker : MODEL_STORE_DIR/marker (surya MODEL_CACHE_DIR)
+  - manifest.json: model_id → 실제 다운로드된 커밋 sha (+ trust_remote_code 외부 코드 저장소의 커밋 sha)
+- manifest 에 등록된 모델은 local_files_only=True + 커밋 sha 로 로딩하므로 허브 메타데이터 조회가 없다.
+  외부 코드 저장소도 기록된 커밋 sha(code_revision)로 로딩한다.
+- 가중치는 safetensors 로만 로딩한다. (pickle 가중치 미사용, 워커 프로세스마다 각자 메모리에 올라간다)
+- manifest 에 없는 모델은 기존처럼 허브 기준으로 로딩한다. (로컬 개발 환경)
+
+CLI:
+    python -m src.processing.storage.model_store prefetch [--skip-marker] [--onnx]
+    python -m src.processing.storage.model_store list
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_APP_DIR = Path(__file__).resolve().parents[3]  # .../apps/sidecar (Docker: /app)
+
+MODEL_STORE_DIR = Path(os.getenv("MODEL_STORE_DIR", str(_APP_DIR / "models")))
+HF_STORE_DIR = MODEL_STORE_DIR / "hf"
+MARKER_STORE_DIR = Path(os.getenv("MODEL_CACHE_DIR", str(MODEL_STORE_DIR / "marker")))
+MANIFEST_PATH = MODEL_STORE_DIR / "manifest.json"
+
+# 스토어에 고정할 HF 모델과 요청 revision (브랜치/태그/커밋 sha)
+EMBED_MODEL_ID = "Snowflake/snowflake-arctic-embed-m-v2.0"
+RERANK_MODEL_ID = os.getenv("RERANK_MODEL_ID", "BAAI/bge-reranker-v2-m3")
+PINNED_MODELS: Dict[str, str] = {
+    EMBED_MODEL_ID: os.getenv("EMBED_MODEL_REVISION", "main"),
+    RERANK_MODEL_ID: os.getenv("RERANK_MODEL_REVISION", "main"),
+}
+# trust_remote_code 가 참조하는 외부 코드 저장소의 요청 revision (예: Alibaba-NLP/new-impl)
+REMOTE_CODE_REVISION = os.getenv("REMOTE_CODE_REVISION", "main")
+
+# 스냅샷에 포함할 파일 패턴 (pytorch_model.bin 등 pickle 가중치는 제외)
+_ALLOW_PATTERNS = ["*.json", "*.safetensors", "*.py", "*.txt", "*.model", "tokenizer*"]
+
+_manifest: Optional[Dict[str, Dict[str, Any]]] = None
+_lock = threading.Lock()
+
+
+def _read_manifest() -> Dict[str, Dict[str, Any]]:
+    """manifest.json 을 1회 읽어 캐시한다. (없으면 빈 dict)"""
+    global _manifest
+
+    with _lock:
+        if _manifest is None:
+            try:
+                _manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                _manifest = {}
+        return _manifest
+
+
+def hf_load_kwargs(model_id: str) -> Dict[str, Any]:
+    """
+    from_pretrained 에 넘길 스토어 관련 인자를 반환한다.
+
+    - 스토어에 고정된 모델이면 cache_dir / revision(커밋 sha) / local_files_only=True
+    - 아니면 빈 dict (허브 기본 동작)
+    """
+    entry = _read_manifest().get(model_id)
+    if not entry:
+        return {}
+    return {
+        "cache_dir": str(HF_STORE_DIR),
+        "revision": entry["revision"],
+        "local_files_only": True,
+    }
+
+
+def _code_revision_kwargs(model_id: str) -> Dict[str, Any]:
+    """
+    외부 코드 저장소의 고정 커밋 sha (from_pretrained 의 code_revision).
+
+    - code_revision 은 하나만 지정할 수 있으므로 외부 코드 저장소가 정확히 1개일 때만 사용한다.
+    """
+    entry = _read_manifest().get(model_id) or {}
+    code_repos = entry.get("code_repos") or {}
+    if len(code_repos) != 1:
+        return {}
+    (code,) = code_repos.values()
+    return {"code_revision": code["revision"]}
+
+
+def load_tokenizer(model_id: str) -> Any:
+    """스토어 우선으로 AutoTokenizer 를 로딩한다."""
+    from transformers import AutoTokenizer
+
+    return AutoTokenizer.from_pretrained(model_id, trust_remote_code=True, **hf_load_kwargs(model_id))
+
+
+def load_model(model_id: str, **model_kwargs: Any) -> Any:
+    """
+    스토어 우선으로 AutoModel 을 로딩한다.
+
+    - safetensors 가중치만 사용하고 low_cpu_mem_usage 로 중간 복사본을 만들지 않는다.
+    - 외부 코드 저장소(auto_map "repo--module.Class")는 manifest 에 기록된 커밋 sha 로 로딩한다.
+    - model_kwargs 는 그대로 from_pretrained 에 전달된다. (add_pooling_layer 등)
+    """
+    from transformers import AutoModel
+
+    return AutoModel.from_pretrained(
+        model_id,
+        trust_remote_code=True,
+        use_safetensors=True,
+        low_cpu_mem_usage=True,
+        **hf_load_kwargs(model_id),
+        **_code_revision_kwargs(model_id),
+        **model_kwargs,
+    )
+
+
+def load_sequence_classifier(model_id: str, **model_kwargs: Any) -> Any:
+    """스토어 우선으로 AutoModelForSequenceClassification(cross-encoder 등)을 로딩한다."""
+    from transformers import AutoModelForSequenceClassification
+
+    return AutoModelForSequenceClassification.from_pretrained(
+        model_id,
+        use_safetensors=True,
+        low_cpu_mem_usage=True,
+        **hf_load_kwargs(model_id),
+        **model_kwargs,
+    )
+
+
+def _remote_code_repos(snapshot_dir: Path) -> List[str]:
+    """config.json 의 auto_map 에서 다른 저장소 코드("repo--module.Class") 참조를 찾는다."""
+    try:
+        config = json.loads((snapshot_dir / "config.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+
+    repos: List[str] = []
+    for ref in (config.get("auto_map") or {}).values():
+        refs = ref if isinstance(ref, list) else [ref]
+        for item in refs:
+            if isinstance(item, str) and "--" in item:
+                repo = item.split("--", 1)[0]
+                if repo not in repos:
+                    repos.append(repo)
+    return repos
+
+
+def prefetch_hf_models(models: Optional[Dict[str, str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    HF 모델 스냅샷을 스토어에 내려받고 manifest.json 을 갱신한다.
+
+    - trust_remote_code 가 참조하는 외부 코드 저장소도 REMOTE_CODE_REVISION 으로 함께 내려받고,
+      실제 커밋 sha 를 manifest 의 code_repos 에 기록한다.
+    - 반환값: 갱신된 manifest
+    """
+    global _manifest
+
+    from huggingface_hub import snapshot_download
+
+    HF_STORE_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = dict(_read_manifest())
+
+    for model_id, revision in (models or PINNED_MODELS).items():
+        print(f"[model_store] 다운로드: {model_id}@{revision}")
+        snapshot_dir = Path(
+            snapshot_download(
+                model_id,
+                revision=revision,
+                cache_dir=str(HF_STORE_DIR),
+                allow_patterns=_ALLOW_PATTERNS,
+            )
+        )
+        code_repos: Dict[str, Dict[str, str]] = {}
+        for code_repo in _remote_code_repos(snapshot_dir):
+            print(f"[model_store] 원격 코드 저장소: {code_repo}@{REMOTE_CODE_REVISION}")
+            code_dir = Path(
+                snapshot_download(
+                    code_repo,
+                    revision=REMOTE_CODE_REVISION,
+                    cache_dir=str(HF_STORE_DIR),
+                    allow_patterns=["*.py", "*.json"],
+                )
+            )
+            code_repos[code_repo] = {"revision": code_dir.name, "requested": REMOTE_CODE_REVISION}
+
+        # 캐시 레이아웃상 스냅샷 디렉터리 이름이 커밋 sha 이다.
+        manifest[model_id] = {"revision": snapshot_dir.name, "requested": revision}
+        if code_repos:
+            manifest[model_id]["code_repos"] = code_repos
+
+    MODEL_STORE_DIR.mkdir(parents=True, exist_ok=True)
+    MANIFEST_PATH.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    with _lock:
+        _manifest = manifest
+    return manifest
+
+
+def prefetch_marker_models() -> Path:
+    """
+    Marker(surya) 모델을 MARKER_STORE_DIR 로 내려받는다.
+
+    surya 설정은 import 시점에 MODEL_CACHE_DIR 환경변수를 읽으므로 import 전에 설정한다.
+    런타임에서도 같은 경로를 쓰려면 MODEL_CACHE_DIR 환경변수를 동일하게 지정해야 한다. (Dockerfile 참고)
+    """
+    os.environ["MODEL_CACHE_DIR"] = str(MARKER_STORE_DIR)
+    MARKER_STORE_DIR.mkdir(parents=True, exist_ok=True)
+
+    from marker.models import create_model_dict
+
+    print(f"[model_store] Marker 모델 다운로드: {MARKER_STORE_DIR}")
+    create_model_dict()
+    return MARKER_STORE_DIR
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="로컬 모델 아티팩트 스토어 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_prefetch = sub.add_parser("prefetch", help="고정 모델 스냅샷을 스토어로 내려받기")
+    p_prefetch.add_argument("--skip-marker", action="store_true", help="Marker 모델 다운로드 생략")
+    p_prefetch.add_argument("--onnx", action="store_true", help="임베딩 모델 ONNX export + int8 양자화까지 수행")
+
+    sub.add_parser("list", help="manifest.json 출력")
+
+    args = parser.parse_args()
+
+    if args.command == "prefetch":
+        prefetch_hf_models()
+        if not args.skip_marker:
+            prefetch_marker_models()
+        if args.onnx:
+            from src.processing.embedding.onnx_backend import export_onnx_model
+
+            export_onnx_model(EMBED_MODEL_ID)
+        print(f"[model_store] 완료: {MODEL_STORE_DIR}")
+    elif args.command == "list":
+        print(json.dumps(_read_manifest(), ensure_ascii=False, indent=2))
@@ -0,0 +1,190 @@
+"""
+검색 결과 주변 청크(context window) 확장.
+
+- 검색 히트마다 같은 document_content_id 의 position ± n 청크를 같은 SQL 의 LATERAL 조인으로 함께 가져온다.
+  (에이전트가 주변 문맥을 얻으려고 추가 검색/LLM 턴을 쓰지 않도록)
+- 같은 content 에서 겹치거나 맞닿는 창은 하나로 병합하고, 병합된 창은 순위가 가장 높은 히트 결과에 붙인다.
+- 청크 간 중첩(chunk_overlap)이 있으면 오프셋(chunk_start / chunk_end) 기준으로 중복 구간을 잘라 이어 붙인다.
+
+주요 함수:
+- wrap_with_neighbors(hits_sql) -> str
+- split_hit_rows(session, rows) -> (hit_rows, neighbors_by_hit)
+- merge_context_windows(results, neighbors_by_hit) -> list[dict]
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Mapping, Tuple
+
+from markdown_cache import materialize_chunk_texts  # type: ignore[import]
+
+# 창 조각 이어 붙일 때 구분자 (오프셋이 없어 원문 구간을 알 수 없는 경우)
+_JOIN_SEPARATOR = "\n\n"
+
+# 이웃 청크 컬럼 (히트 컬럼과 이름이 겹치지 않도록 nb_ 접두사)
+_NEIGHBOR_FIELDS = (
+    "document_chunk_id",
+    "position",
+    "chunk_content",
+    "chunk_start",
+    "chunk_end",
+    "chunk_preview",
+    "page_start",
+    "page_end",
+)
+
+
+def wrap_with_neighbors(hits_sql: str) -> str:
+    """
+    히트 쿼리(hit_rank 컬럼 포함)를 CTE 로 감싸고 이웃 청크를 LATERAL 조인하는 SQL 을 만든다.
+
+    - 바인드 파라미터: :user_id, :context_window
+    - 결과: 히트 1건당 이웃 수만큼의 row (hit_rank, nb_position 순)
+    """
+    neighbor_columns = ",\n                ".join(f"n.{name} AS nb_{name}" for name in _NEIGHBOR_FIELDS)
+    return f"""
+        WITH hits AS (
+            {hits_sql}
+        )
+        SELECT h.*, nb.*
+        FROM hits AS h
+        LEFT JOIN LATERAL (
+            SELECT
+                {neighbor_columns}
+            FROM document_chunk AS n
+            WHERE
+                n.user_id = :user_id
+                AND n.document_content_id = h.document_content_id
+                AND n.is_live
+                AND n.position BETWEEN h.position - :context_window AND h.position + :context_window
+        ) AS nb ON true
+        ORDER BY h.hit_rank, nb.nb_position
+    """
+
+
+def split_hit_rows(
+    session: Any,
+    rows: List[Mapping[str, Any]],
+) -> Tuple[List[Mapping[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+    """
+    wrap_with_neighbors 결과 row 를 (히트 row 목록, 히트 청크 id → 이웃 청크 목록) 으로 나눈다.
+
+    - 이웃 청크 본문도 materialize_chunk_texts 로 복원해 "text" 키에 넣는다.
+    """
+    hit_rows: List[Mapping[str, Any]] = []
+    neighbors_by_hit: Dict[str, List[Dict[str, Any]]] = {}
+    neighbor_rows: List[Dict[str, Any]] = []
+
+    for row in rows:
+        hit_id = str(row["document_chunk_id"])
+        if hit_id not in neighbors_by_hit:
+            hit_rows.append(row)
+            neighbors_by_hit[hit_id] = []
+        if row.get("nb_document_chunk_id") is None:
+            continue
+        neighbor = {name: row.get(f"nb_{name}") for name in _NEIGHBOR_FIELDS}
+        neighbor["document_content_id"] = row["document_content_id"]
+        neighbors_by_hit[hit_id].append(neighbor)
+        neighbor_rows.append(neighbor)
+
+    for neighbor, chunk_text in zip(neighbor_rows, materialize_chunk_texts(session, neighbor_rows)):
+        neighbor["text"] = chunk_text
+
+    return hit_rows, neighbors_by_hit
+
+
+def _join_window_texts(chunks: List[Dict[str, Any]]) -> str:
+    """position 순 청크 텍스트를 이어 붙인다. (오프셋이 있으면 중첩 구간 제거)"""
+    parts: List[str] = []
+    prev_end: int | None = None
+    for chunk in chunks:
+        chunk_text = chunk.get("text") or ""
+        start, end = chunk.get("chunk_start"), chunk.get("chunk_end")
+        if prev_end is not None and start is not None and end is not None:
+            overlap = prev_end - start
+            if overlap > 0:
+                chunk_text = chunk_text[overlap:]
+            elif overlap < 0:
+                # 청크 사이에서 잘려 나간 공백/개행 구간
+                parts.append(_JOIN_SEPARATOR)
+            parts.append(chunk_text)
+        else:
+            if parts:
+                parts.append(_JOIN_SEPARATOR)
+            parts.append(chunk_text)
+        prev_end = end
+    return "".join(parts)
+
+
+def _build_context(group: Dict[str, Any]) -> Dict[str, Any]:
+    chunks = sorted(group["chunks"].values(), key=lambda c: c["position"])
+    page_starts = [c["page_start"] for c in chunks if c.get("page_start") is not None]
+    page_ends = [c["page_end"] for c in chunks if c.get("page_end") is not None]
+    return {
+        "position_start": group["start"],
+        "position_end": group["end"],
+        "content": _join_window_texts(chunks),
+        "page_start": min(page_starts) if page_starts else None,
+        "page_end": max(page_ends) if page_ends else None,
+        "chunk_ids": [str(c["document_chunk_id"]) for c in chunks],
+        "hit_chunk_ids": group["hit_chunk_ids"],
+    }
+
+
+def merge_context_windows(
+    results: List[Dict[str, Any]],
+    neighbors_by_hit: Dict[str, List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """
+    순위순 결과(dict) 목록에 "context" 를 붙이고, 같은 content 의 겹치거나 맞닿는 창을 병합한다.
+
+    - 병합된 창은 가장 순위가 높은 히트 결과에만 남고 나머지 히트 결과는 제거된다.
+    - position 이 없어 창을 만들 수 없는 히트는 context=None 으로 그대로 둔다.
+    """
+    merged: List[Dict[str, Any]] = []
+    # document_content_id → 해당 content 의 창 그룹 목록
+    groups_by_content: Dict[str, List[Dict[str, Any]]] = {}
+
+    for rank, result in enumerate(results):
+        chunks = neighbors_by_hit.get(result["document_chunk_id"]) or []
+        positions = [c["position"] for c in chunks if c.get("position") is not None]
+        if not positions:
+            result["context"] = None
+            merged.append(result)
+            continue
+
+        start, end = min(positions), max(positions)
+        content_groups = groups_by_content.setdefault(result["document_content_id"], [])
+        touching = [g for g in content_groups if start <= g["end"] + 1 and end >= g["start"] - 1]
+
+        if not touching:
+            group = {
+                "order": rank,
+                "result": result,
+                "start": start,
+                "end": end,
+                "chunks": {str(c["document_chunk_id"]): c for c in chunks},
+                "hit_chunk_ids": [result["document_chunk_id"]],
+            }
+            content_groups.append(group)
+            merged.append(result)
+            continue
+
+        # 가장 먼저(높은 순위로) 만들어진 그룹으로 모두 흡수
+        touching.sort(key=lambda g: g["order"])
+        target = touching[0]
+        target["start"] = min([start] + [g["start"] for g in touching])
+        target["end"] = max([end] + [g["end"] for g in touching])
+        target["chunks"].update({str(c["document_chunk_id"]): c for c in chunks})
+        target["hit_chunk_ids"].append(result["document_chunk_id"])
+        for other in touching[1:]:
+            target["chunks"].update(other["chunks"])
+            target["hit_chunk_ids"].extend(other["hit_chunk_ids"])
+            content_groups.remove(other)
+            merged.remove(other["result"])
+
+    for content_groups in groups_by_content.values():
+        for group in content_groups:
+            group["result"]["context"] = _build_context(group)
+
+    return merged
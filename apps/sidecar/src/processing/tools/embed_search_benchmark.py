@@ -0,0 +1,193 @@
+"""
+임베딩 검색 방식(flat / hierarchical) recall · 지연시간 비교 벤치마크.
+
+- 정답 집합: 사용자 최신 버전 live 청크 전체에 대한 정확한 코사인 KNN (인덱스 없이 halfvec <=> 정렬)
+- 비교 대상:
+  - flat: bit HNSW Hamming 후보 + 코사인 재정렬 (query_embed_search mode="flat")
+  - hierarchical: 문서 단위 벡터로 상위 doc_k 문서 선택 후 청크 KNN (mode="hierarchical", doc_k 별)
+- 질의: --queries-file 의 각 줄, 없으면 사용자 코퍼스에서 무작위 청크 앞부분을 질의로 사용
+- 질의 임베딩은 미리 계산해 캐시에 올려 두므로 지연시간은 DB 검색 구간(엔진 생성/조회/본문 복원)만 측정된다.
+
+CLI:
+    python apps/sidecar/src/processing/tools/embed_search_benchmark.py \\
+      --user-id <uuid> --sample 50 --top-k 10 --doc-k 10,20,50
+"""
+
+from __future__ import annotations
+
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+
+_TOOLS_DIR = Path(__file__).resolve().parent
+if str(_TOOLS_DIR) not in sys.path:
+    sys.path.append(str(_TOOLS_DIR))
+
+from query_embed_search import (  # type: ignore[import]
+    _get_db_engine,
+    _normalize_user_id,
+    embed_query_to_vector,
+    query_embed_search,
+)
+
+# 무작위 청크 질의 길이(문자)
+_SAMPLE_QUERY_CHARS = 200
+
+
+def _sample_queries(user_id: Any, sample: int, path_prefix: Optional[str]) -> List[str]:
+    """사용자 최신 버전 live 청크에서 무작위로 질의 텍스트를 뽑는다."""
+    stmt = text(
+        """
+        SELECT left(COALESCE(dc.chunk_content, dc.chunk_preview), :chars) AS query
+        FROM document_chunk AS dc
+        JOIN document AS d
+            ON d.latest_content_id = dc.document_content_id
+        WHERE
+            dc.user_id = :user_id
+            AND dc.is_live
+            AND COALESCE(dc.chunk_content, dc.chunk_preview) IS NOT NULL
+            AND (:path_prefix IS NULL OR dc.document_path <@ CAST(:path_prefix AS ltree))
+        ORDER BY random()
+        LIMIT :sample
+        """
+    )
+    with _get_db_engine().connect() as conn:
+        rows = conn.execute(
+            stmt,
+            {"user_id": user_id, "chars": _SAMPLE_QUERY_CHARS, "path_prefix": path_prefix, "sample": sample},
+        ).all()
+    return [row.query for row in rows if row.query and row.query.strip()]
+
+
+def _exact_top_ids(user_id: Any, query: str, top_k: int, path_prefix: Optional[str]) -> List[str]:
+    """정답 집합: 최신 버전 live 청크 전체에 대한 정확한 코사인 KNN."""
+    stmt = text(
+        """
+        SELECT dc.document_chunk_id
+        FROM document_chunk AS dc
+        JOIN document AS d
+            ON d.latest_content_id = dc.document_content_id
+        WHERE
+            dc.user_id = :user_id
+            AND dc.is_live
+            AND d.deleted_at IS NULL
+            AND (:path_prefix IS NULL OR dc.document_path <@ CAST(:path_prefix AS ltree))
+        ORDER BY dc.chunk_embedding <=> CAST(:query_embedding AS halfvec(256))
+        LIMIT :top_k
+        """
+    )
+    with _get_db_engine().connect() as conn:
+        rows = conn.execute(
+            stmt,
+            {
+                "user_id": user_id,
+                "query_embedding": embed_query_to_vector(query),
+                "path_prefix": path_prefix,
+                "top_k": top_k,
+            },
+        ).all()
+    return [str(row.document_chunk_id) for row in rows]
+
+
+def _percentile(values: Sequence[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    idx = min(len(ordered) - 1, max(0, round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def run_benchmark(
+    user_id: Any,
+    queries: List[str],
+    top_k: int = 10,
+    doc_ks: Sequence[int] = (10, 20, 50),
+    repeat: int = 3,
+    path_prefix: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    flat / hierarchical(doc_k 별) 검색의 recall@top_k 와 지연시간을 측정한다.
+
+    - 반환값: {"queries", "top_k", "configs": [{"name", "recall_mean", "latency_ms_p50", "latency_ms_p95"}]}
+    """
+    normalized_user_id = _normalize_user_id(user_id)
+    configs: List[Dict[str, Any]] = [{"name": "flat", "mode": "flat", "doc_k": None}]
+    configs += [{"name": f"hierarchical@{k}", "mode": "hierarchical", "doc_k": k} for k in doc_ks]
+    for config in configs:
+        config["recalls"] = []
+        config["latencies"] = []
+
+    for query in queries:
+        # 질의 임베딩을 캐시에 올려 두어 측정 구간에서 제외
+        embed_query_to_vector(query)
+        truth = set(_exact_top_ids(normalized_user_id, query, top_k, path_prefix))
+        if not truth:
+            continue
+
+        for config in configs:
+            found: List[Dict[str, Any]] = []
+            for _ in range(max(1, repeat)):
+                started = time.perf_counter()
+                found = query_embed_search(
+                    normalized_user_id,
+                    query,
+                    top_k=top_k,
+                    path_prefix=path_prefix,
+                    rerank=False,
+                    mode=config["mode"],
+                    doc_k=config["doc_k"],
+                )
+                config["latencies"].append((time.perf_counter() - started) * 1000.0)
+            hits = sum(1 for r in found if r["document_chunk_id"] in truth)
+            config["recalls"].append(hits / len(truth))
+
+    return {
+        "queries": len(configs[0]["recalls"]),
+        "top_k": top_k,
+        "configs": [
+            {
+                "name": config["name"],
+                "recall_mean": statistics.fmean(config["recalls"]) if config["recalls"] else 0.0,
+                "latency_ms_p50": _percentile(config["latencies"], 50),
+                "latency_ms_p95": _percentile(config["latencies"], 95),
+            }
+            for config in configs
+        ],
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="flat / hierarchical 임베딩 검색 recall · 지연시간 비교")
+    parser.add_argument("--user-id", required=True, help="UUID 형식의 사용자 ID")
+    parser.add_argument("--queries-file", default=None, help="질의 파일 (한 줄에 하나). 없으면 코퍼스에서 샘플링")
+    parser.add_argument("--sample", type=int, default=50, help="샘플링할 질의 수")
+    parser.add_argument("--top-k", type=int, default=10, help="recall 계산 기준 k")
+    parser.add_argument("--doc-k", default="10,20,50", help="hierarchical 문서 수 목록 (쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=3, help="질의당 반복 측정 횟수")
+    parser.add_argument("--path-prefix", default=None, help="ltree 기반 Document.path prefix")
+
+    args = parser.parse_args()
+
+    user_uuid = _normalize_user_id(args.user_id)
+    if args.queries_file:
+        lines = Path(args.queries_file).read_text(encoding="utf-8").splitlines()
+        bench_queries = [line.strip() for line in lines if line.strip()]
+    else:
+        bench_queries = _sample_queries(user_uuid, args.sample, args.path_prefix)
+
+    report = run_benchmark(
+        user_uuid,
+        bench_queries,
+        top_k=args.top_k,
+        doc_ks=[int(k) for k in args.doc_k.split(",") if k.strip()],
+        repeat=args.repeat,
+        path_prefix=args.path_prefix,
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
@@ -0,0 +1,122 @@
+"""
+DocumentContent markdown 버퍼 캐시.
+
+- 오프셋 저장 모드(CHUNK_STORAGE_MODE=offsets)로 저장된 청크는 chunk_content 가 NULL 이고
+  DocumentContent.contents->>'markdown' 기준 (chunk_start, chunk_end) 오프셋만 가진다.
+- 검색 결과를 만들 때 content 별 markdown 을 프로세스 메모리에 캐시해 두고 슬라이싱으로 청크 텍스트를 복원한다.
+- DocumentContent 는 버전 단위로 불변(새 버전은 새 row)이므로 별도 무효화 없이 LRU 로만 관리한다.
+
+주요 함수:
+- materialize_chunk_texts(session, rows) -> list[str]
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Mapping
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+
+# 캐시에 보관할 markdown 총 문자 수 상한 (기본 약 64M 문자)
+MARKDOWN_CACHE_MAX_CHARS = int(os.getenv("MARKDOWN_CACHE_MAX_CHARS", str(64 * 1024 * 1024)))
+
+_cache: "OrderedDict[uuid.UUID, str]" = OrderedDict()
+_cache_chars = 0
+_lock = threading.Lock()
+
+
+def _cache_get(content_id: uuid.UUID) -> str | None:
+    with _lock:
+        markdown = _cache.get(content_id)
+        if markdown is not None:
+            _cache.move_to_end(content_id)
+        return markdown
+
+
+def _cache_put(content_id: uuid.UUID, markdown: str) -> None:
+    global _cache_chars
+
+    # 단일 문서가 상한보다 크면 캐시하지 않는다.
+    if len(markdown) > MARKDOWN_CACHE_MAX_CHARS:
+        return
+
+    with _lock:
+        if content_id in _cache:
+            _cache.move_to_end(content_id)
+            return
+        _cache[content_id] = markdown
+        _cache_chars += len(markdown)
+        while _cache_chars > MARKDOWN_CACHE_MAX_CHARS and _cache:
+            _, evicted = _cache.popitem(last=False)
+            _cache_chars -= len(evicted)
+
+
+def get_content_markdowns(session: Any, content_ids: Iterable[uuid.UUID]) -> Dict[uuid.UUID, str]:
+    """
+    content_id 별 markdown 을 반환한다.
+
+    - 캐시에 없는 content 만 한 번의 쿼리로 조회한 뒤 캐시에 적재한다.
+    """
+    found: Dict[uuid.UUID, str] = {}
+    missing: List[uuid.UUID] = []
+    for content_id in set(content_ids):
+        markdown = _cache_get(content_id)
+        if markdown is None:
+            missing.append(content_id)
+        else:
+            found[content_id] = markdown
+
+    if missing:
+        stmt = text(
+            """
+            SELECT
+                dct.document_content_id AS document_content_id,
+                coalesce(dct.contents->>'markdown', '') AS markdown
+            FROM document_content AS dct
+            WHERE dct.document_content_id = ANY(:content_ids)
+            """
+        ).bindparams(bindparam("content_ids", type_=ARRAY(UUID(as_uuid=True))))
+
+        rows = session.execute(stmt, {"content_ids": missing}).mappings().all()
+        for row in rows:
+            content_id = row["document_content_id"]
+            markdown = row["markdown"] or ""
+            _cache_put(content_id, markdown)
+            found[content_id] = markdown
+
+    return found
+
+
+def materialize_chunk_texts(session: Any, rows: List[Mapping[str, Any]]) -> List[str]:
+    """
+    검색 결과 row 들의 청크 텍스트를 반환한다.
+
+    - chunk_content 가 있으면 그대로 사용한다.
+    - 없으면 (document_content_id, chunk_start, chunk_end) 로 캐시된 markdown 을 슬라이싱한다.
+    - markdown 을 찾지 못하면 chunk_preview(없으면 빈 문자열)로 대체한다.
+    """
+    offset_content_ids = [
+        row["document_content_id"]
+        for row in rows
+        if row.get("chunk_content") is None and row.get("chunk_start") is not None
+    ]
+    markdowns = get_content_markdowns(session, offset_content_ids) if offset_content_ids else {}
+
+    texts: List[str] = []
+    for row in rows:
+        chunk_content = row.get("chunk_content")
+        if chunk_content is not None:
+            texts.append(chunk_content)
+            continue
+
+        markdown = markdowns.get(row["document_content_id"])
+        start, end = row.get("chunk_start"), row.get("chunk_end")
+        if markdown is not None and start is not None and end is not None:
+            texts.append(markdown[start:end])
+        else:
+            texts.append(row.get("chunk_preview") or "")
+    return texts
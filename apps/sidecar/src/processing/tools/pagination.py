@@ -0,0 +1,66 @@
+"""
+검색/트리 결과 keyset 페이지네이션용 불투명(opaque) 커서.
+
+- 커서 = URL-safe base64(JSON). 클라이언트는 내용을 해석하지 않고 next_cursor 를 그대로 돌려준다.
+- JSON 구조: {"v": 버전, "k": 커서 종류, "f": 요청 조건 지문, "p": keyset 위치}
+  - 임베딩 검색: p = {"distance": float, "chunk_id": str}
+  - 텍스트 검색: p = {"rank": float, "chunk_id": str}
+  - 트리 목록  : p = {"path": str}
+- "f" 는 사용자/질의/필터를 해시한 값이라, 다른 조건의 요청에 커서를 재사용하면 거부된다.
+- 페이지는 항상 keyset 조건(마지막 위치 이후)으로 조회하며 OFFSET 을 쓰지 않는다.
+
+주요 함수:
+- request_fingerprint(**params) -> str
+- encode_cursor(kind, fingerprint, position) -> str
+- decode_cursor(cursor, kind, fingerprint) -> dict | None
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+_CURSOR_VERSION = 1
+
+
+def request_fingerprint(**params: Any) -> str:
+    """커서를 발급한 요청 조건(사용자/질의/필터)의 짧은 지문."""
+    raw = json.dumps(params, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(kind: str, fingerprint: str, position: Dict[str, Any]) -> str:
+    """keyset 위치를 불투명 커서 문자열로 인코딩한다."""
+    payload = {"v": _CURSOR_VERSION, "k": kind, "f": fingerprint, "p": position}
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], kind: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+    """
+    커서를 keyset 위치 dict 로 디코딩한다.
+
+    - cursor 가 None/빈 문자열이면 None (첫 페이지)
+    - 형식 오류, 종류/버전 불일치, 다른 요청 조건의 커서이면 ValueError
+    """
+    if not cursor:
+        return None
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise ValueError("유효하지 않은 cursor 입니다.") from exc
+
+    if not isinstance(payload, dict) or payload.get("v") != _CURSOR_VERSION or payload.get("k") != kind:
+        raise ValueError("유효하지 않은 cursor 입니다.")
+    if payload.get("f") != fingerprint:
+        raise ValueError("cursor 가 현재 요청 조건과 일치하지 않습니다.")
+
+    position = payload.get("p")
+    if not isinstance(position, dict):
+        raise ValueError("유효하지 않은 cursor 입니다.")
+    return position
@@ -0,0 +1,48 @@
+"""
+검색 도구 단계별 소요 시간 측정.
+
+- 검색 함수 안의 단계(embed / db / rerank)를 phase(name) 로 감싸 두면, 호출자가 collect_phases() 범위 안에서
+  호출한 경우에만 단계별 누적 시간(ms)이 기록된다. (범위 밖에서는 아무 일도 하지 않음)
+- 수집 대상은 ContextVar 로 전달되므로 asyncio.to_thread / LangChain executor 처럼 컨텍스트를 복사해 실행하는
+  스레드에서도 같은 dict 에 기록된다.
+- 모듈 인스턴스가 하나여야 ContextVar 가 공유되므로 항상 `src.processing.tools.phase_timer` 경로로 import 한다.
+
+주요 함수:
+- phase(name) -> context manager
+- collect_phases() -> context manager (단계명 → ms dict 를 돌려줌)
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+_current: ContextVar[Optional[Dict[str, float]]] = ContextVar("tool_phase_timings", default=None)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """현재 수집 범위에 name 단계 소요 시간(ms)을 더한다."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - started) * 1000.0
+
+
+@contextmanager
+def collect_phases() -> Iterator[Dict[str, float]]:
+    """이 범위 안에서 실행된 phase() 단계별 소요 시간(ms)을 모을 dict 를 돌려준다."""
+    timings: Dict[str, float] = {}
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
@@ -10,6 +10,17 @@
 내부 규칙:
 - 검색 대상은 DocumentChunk.chunk_content 기준
 - 동일한 Snowflake Arctic Embed v2.0 + Matryoshka(256차원) 설정 사용
+- 2단계 검색(flat): binary quantize(bit) HNSW 인덱스로 Hamming 거리 후보를 뽑고,
+  halfvec 컬럼의 정확한 코사인 거리로 재정렬한다. (단일 쿼리)
+- mode="hierarchical" 이면 문서 단위 벡터(document_content.content_embedding)로 상위 doc_k 개 문서를 고른 뒤
+  그 문서들의 청크만 정확한 코사인 거리로 KNN 한다. (전체 코퍼스 청크 HNSW 탐색 회피)
+- context_window=n 이면 각 히트와 같은 content 의 position ± n 청크를 같은 SQL(LATERAL 조인)로 가져와
+  겹치는 창을 병합한 "context" 를 붙인다. (src/processing/tools/context_window.py)
+- query_embed_search_page: (cosine distance, chunk_id) keyset 커서 페이지네이션 (OFFSET 없음)
+- query_embed_search_batch: 여러 질의 × 여러 path prefix 를 한 번의 forward pass + 단일 SQL(unnest + LATERAL top-k)로 검색
+- rerank=True 이면 top_k × RERANK_CANDIDATE_MULTIPLIER 개 후보를 가져와 cross-encoder 로 재순위화한 뒤 top_k 를 반환
+  (src.processing.embedding.reranker, 요청별 지연 예산 RERANK_BUDGET_MS)
+- EMBED_BACKEND=onnx 이면 질의 임베딩도 int8 ONNX Runtime 세션으로 계산 (전처리와 동일 백엔드)
 """
 
 from __future__ import annotations
@@ -34,6 +45,13 @@ _SRC_DIR = Path(__file__).resolve().parents[2]  # .../src
 _SCHEMA_DIR = _SRC_DIR / "schema"
 if str(_SCHEMA_DIR) not in sys.path:
     sys.path.append(str(_SCHEMA_DIR))
+_TOOLS_DIR = Path(__file__).resolve().parent
+if str(_TOOLS_DIR) not in sys.path:
+    sys.path.append(str(_TOOLS_DIR))
+# src.processing.embedding 패키지 import 경로 보정 (sidecar 루트)
+_APP_DIR = _SRC_DIR.parent
+if str(_APP_DIR) not in sys.path:
+    sys.path.append(str(_APP_DIR))
 
 from document_schema import (  # type: ignore[import]
     Document,
@@ -43,9 +61,111 @@ from document_schema import (  # type: ignore[import]
 # 사용하지 않더라도 스키마 의존성을 명시적으로 유지하기 위해 참조
 _ = (Document, DocumentContent, DocumentChunk)
 
+from context_window import merge_context_windows, split_hit_rows, wrap_with_neighbors  # type: ignore[import]
+from markdown_cache import materialize_chunk_texts  # type: ignore[import]
+from pagination import decode_cursor, encode_cursor, request_fingerprint  # type: ignore[import]
+from src.processing.embedding.query_cache import (
+    get_or_compute_query_embedding,
+    get_or_compute_query_embeddings,
+)
+from src.processing.storage.model_store import load_model, load_tokenizer
+from src.processing.tools.phase_timer import phase
+
 # Snowflake Arctic Embed Model 설정 (전처리 파이프라인과 동일하게 유지)
 EMBED_MODEL_ID = "Snowflake/snowflake-arctic-embed-m-v2.0"
 MATRYOSHKA_DIM = 256
+# 임베딩 추론 백엔드 ("torch" | "onnx")
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").strip().lower() or "torch"
+
+# Hamming 후보 수 = top_k × EMBED_SEARCH_OVERSAMPLE (코사인 재정렬 대상)
+EMBED_SEARCH_OVERSAMPLE = int(os.getenv("EMBED_SEARCH_OVERSAMPLE", "10"))
+# 검색 방식 ("flat" | "hierarchical") / 계층 검색에서 고를 문서 수
+EMBED_SEARCH_MODE = os.getenv("EMBED_SEARCH_MODE", "flat").strip().lower() or "flat"
+EMBED_SEARCH_DOC_K = int(os.getenv("EMBED_SEARCH_DOC_K", "20"))
+# rerank 기본 사용 여부 / 후보 배수(top_k × N 개를 cross-encoder 로 채점) / 요청별 지연 예산(ms)
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").strip().lower() in ("1", "true", "yes")
+RERANK_CANDIDATE_MULTIPLIER = int(os.getenv("RERANK_CANDIDATE_MULTIPLIER", "4"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "300"))
+# HNSW 탐색 후보 수 하한 / 상한 (pgvector hnsw.ef_search 허용 범위: 1 ~ 1000)
+_MIN_EF_SEARCH = 40
+_MAX_EF_SEARCH = 1000
+
+# 1단계 후보 CTE (flat): bit(256) HNSW 인덱스(is_live 부분 인덱스)로 Hamming 거리(<~>) 후보 추출
+# - 필터는 document_chunk 의 비정규화 컬럼(user_id / document_path / is_live)만 사용 (조인 없음)
+# - 기본적으로 사용자 문서들의 latest_content_id 집합(1회 계산)에 속한 청크만 남긴다
+_FLAT_CANDIDATES_SQL = """
+        candidates AS (
+            SELECT {chunk_columns}
+            FROM document_chunk AS dc
+            WHERE
+                dc.user_id = :user_id
+                AND dc.is_live
+                AND (:path_prefix IS NULL OR dc.document_path <@ CAST(:path_prefix AS ltree))
+                AND (
+                    CAST(:include_history AS boolean)
+                    OR dc.document_content_id IN (
+                        SELECT d_latest.latest_content_id
+                        FROM document AS d_latest
+                        WHERE d_latest.user_id = :user_id
+                          AND d_latest.deleted_at IS NULL
+                    )
+                )
+                {keyset_filter}
+            ORDER BY
+                (binary_quantize(dc.chunk_embedding)::bit(256))
+                <~> (binary_quantize(CAST(:query_embedding AS halfvec(256)))::bit(256))
+            LIMIT :candidate_limit
+        )
+"""
+
+# 1단계 후보 CTE (hierarchical):
+# - top_docs: 문서 단위 벡터(content_embedding) 코사인 거리로 상위 :doc_k 개 content 선택
+#   (ORDER BY 에 질의 벡터를 상수식으로 두어야 document_content_embedding_hnsw_idx 를 탄다 — q CROSS JOIN 금지)
+# - candidates: 선택된 content 의 live 청크만 (user_id, document_content_id) 부분 인덱스로 읽어 정확한 코사인 KNN
+_HIERARCHICAL_CANDIDATES_SQL = """
+        top_docs AS (
+            SELECT dct.document_content_id
+            FROM document AS d
+            JOIN document_content AS dct
+                ON dct.document_id = d.document_id
+            WHERE
+                d.user_id = :user_id
+                AND d.deleted_at IS NULL
+                AND dct.deleted_at IS NULL
+                AND dct.content_embedding IS NOT NULL
+                AND (:path_prefix IS NULL OR d.path <@ CAST(:path_prefix AS ltree))
+                AND (CAST(:include_history AS boolean) OR dct.document_content_id = d.latest_content_id)
+            ORDER BY dct.content_embedding <=> CAST(:query_embedding AS halfvec(256))
+            LIMIT :doc_k
+        ),
+        candidates AS (
+            SELECT {chunk_columns}
+            FROM document_chunk AS dc
+            CROSS JOIN q
+            WHERE
+                dc.user_id = :user_id
+                AND dc.is_live
+                AND dc.document_content_id IN (SELECT document_content_id FROM top_docs)
+                AND (:path_prefix IS NULL OR dc.document_path <@ CAST(:path_prefix AS ltree))
+            ORDER BY dc.chunk_embedding <=> q.embedding
+            LIMIT :candidate_limit
+        )
+"""
+
+_CHUNK_COLUMNS = """
+                dc.document_content_id AS document_content_id,
+                dc.document_chunk_id AS document_chunk_id,
+                dc.position AS position,
+                dc.chunk_content AS chunk_content,
+                dc.chunk_start AS chunk_start,
+                dc.chunk_end AS chunk_end,
+                dc.chunk_preview AS chunk_preview,
+                dc.page_start AS page_start,
+                dc.page_end AS page_end,
+                dc.block_ids AS block_ids,
+                dc.token_count AS token_count,
+                dc.bboxes AS bboxes,
+                dc.chunk_embedding AS chunk_embedding"""
 
 _tokenizer: AutoTokenizer | None = None
 _model: AutoModel | None = None
@@ -90,10 +210,9 @@ def _load_embed_model(model_id: str = EMBED_MODEL_ID):
     if torch.cuda.is_available():
         device = "cuda"
 
-    tokenizer = AutoTokenizer.from_pretrained(model_id, trust_remote_code=True)
-    model = AutoModel.from_pretrained(
+    tokenizer = load_tokenizer(model_id)
+    model = load_model(
         model_id,
-        trust_remote_code=True,
         add_pooling_layer=False,
         use_memory_efficient_attention=False,
         unpad_inputs=False,
@@ -115,15 +234,59 @@ def embed_query_to_vector(
 ) -> List[float]:
     """
     단일 질의 문자열을 Arctic Embed v2.0으로 임베딩해 256차원 정규화 벡터로 반환.
+
+    - 정규화된 질의 텍스트 기준으로 LRU + TTL 캐시를 거친다. (src.processing.embedding.query_cache)
     """
-    if not query or not isinstance(query, str):
+    if not query or not isinstance(query, str) or not query.strip():
         raise ValueError("query는 비어 있지 않은 문자열이어야 합니다.")
 
+    return get_or_compute_query_embedding(
+        query,
+        model_id=model_id,
+        backend=EMBED_BACKEND,
+        dim=dim,
+        compute=lambda normalized: _compute_query_vector(normalized, model_id, dim),
+    )
+
+
+def embed_queries_to_vectors(
+    queries: Sequence[str],
+    model_id: str = EMBED_MODEL_ID,
+    dim: int = MATRYOSHKA_DIM,
+) -> List[List[float]]:
+    """
+    여러 질의를 한 번에 임베딩한다. (캐시 미스 질의만 단일 forward pass 로 계산)
+    """
+    if not queries or any(not q or not isinstance(q, str) or not q.strip() for q in queries):
+        raise ValueError("queries는 비어 있지 않은 문자열 목록이어야 합니다.")
+
+    return get_or_compute_query_embeddings(
+        list(queries),
+        model_id=model_id,
+        backend=EMBED_BACKEND,
+        dim=dim,
+        compute_batch=lambda normalized: _compute_query_vectors(normalized, model_id, dim),
+    )
+
+
+def _compute_query_vector(query: str, model_id: str, dim: int) -> List[float]:
+    """캐시 미스 시 실제 forward pass 로 질의 임베딩을 계산한다."""
+    return _compute_query_vectors([query], model_id, dim)[0]
+
+
+def _compute_query_vectors(queries: List[str], model_id: str, dim: int) -> List[List[float]]:
+    """질의 목록을 한 배치(forward pass 1회)로 임베딩한다."""
+    if EMBED_BACKEND == "onnx":
+        from src.processing.embedding.onnx_backend import load_onnx_embedder
+
+        _, encode_batch = load_onnx_embedder(model_id, dim)
+        return encode_batch(queries)
+
     tokenizer, model, device = _load_embed_model(model_id)
 
     with torch.no_grad():
         inputs = tokenizer(
-            [query],
+            queries,
             padding=True,
             truncation=True,
             return_tensors="pt",
@@ -135,8 +298,8 @@ def embed_query_to_vector(
         compressed_embeddings = full_embeddings[:, :dim]
         compressed_embeddings = F.normalize(compressed_embeddings, p=2, dim=1)
 
-    vec: List[float] = compressed_embeddings[0].tolist()
-    return vec
+    vectors: List[List[float]] = compressed_embeddings.tolist()
+    return vectors
 
 
 @dataclass
@@ -149,6 +312,13 @@ class ChunkSearchResult:
     position: int | None
     chunk_content: str
     similarity: float
+    rerank_score: float | None = None
+    page_start: int | None = None
+    page_end: int | None = None
+    block_ids: List[str] | None = None
+    bboxes: List[Dict[str, Any]] | None = None
+    token_count: int | None = None
+    context: Dict[str, Any] | None = None
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -160,6 +330,13 @@ class ChunkSearchResult:
             "position": self.position,
             "chunk_content": self.chunk_content,
             "similarity": float(self.similarity),
+            "rerank_score": self.rerank_score,
+            "page_start": self.page_start,
+            "page_end": self.page_end,
+            "block_ids": self.block_ids,
+            "bboxes": self.bboxes,
+            "token_count": self.token_count,
+            "context": self.context,
         }
 
 
@@ -176,6 +353,14 @@ def query_embed_search(
     query: str,
     top_k: int = 5,
     path_prefix: str | None = None,
+    oversample: int | None = None,
+    include_history: bool = False,
+    rerank: bool | None = None,
+    rerank_multiplier: int | None = None,
+    rerank_budget_ms: float | None = None,
+    mode: str | None = None,
+    doc_k: int | None = None,
+    context_window: int = 0,
 ) -> List[Dict[str, Any]]:
     """
     임베딩 기반으로 DocumentChunk를 검색한다.
@@ -183,64 +368,137 @@ def query_embed_search(
     - user_id: 해당 사용자의 문서만 대상으로 검색
     - query: 자연어 질의
     - top_k: 상위 N개 결과
+    - oversample: Hamming 후보 배수 (None 이면 EMBED_SEARCH_OVERSAMPLE)
+    - include_history: True 이면 최신 버전(document.latest_content_id)이 아닌 과거 content 버전 청크도 포함
+    - rerank: True 이면 cross-encoder 재순위화 (None 이면 RERANK_ENABLED)
+    - rerank_multiplier: 재순위화 후보 배수 (None 이면 RERANK_CANDIDATE_MULTIPLIER)
+    - rerank_budget_ms: 재순위화 지연 예산(ms). 초과 시 점수를 받지 못한 후보는 벡터 순서대로 뒤에 붙는다.
+    - mode: "flat" | "hierarchical" (None 이면 EMBED_SEARCH_MODE)
+    - doc_k: hierarchical 모드에서 먼저 고를 문서 수 (None 이면 EMBED_SEARCH_DOC_K)
+    - context_window: 0 보다 크면 히트 주변 position ± context_window 청크를 병합한 "context" 를 붙인다.
+      같은 content 에서 창이 겹치는 히트는 순위가 높은 결과 하나로 합쳐지므로 결과 수가 top_k 보다 적을 수 있다.
     """
-    if not query or not isinstance(query, str):
+    # 공백뿐인 질의는 임베딩하지 않는다 (embed_query_to_vector 는 ValueError)
+    if not query or not isinstance(query, str) or not query.strip():
         return []
     if top_k <= 0:
         return []
 
+    search_mode = (mode or EMBED_SEARCH_MODE).strip().lower()
+    if search_mode not in ("flat", "hierarchical"):
+        raise ValueError(f"지원하지 않는 mode 입니다: {search_mode} (flat | hierarchical)")
+
     normalized_user_id = _normalize_user_id(user_id)
-    query_vec = embed_query_to_vector(query)
+    with phase("embed"):
+        query_vec = embed_query_to_vector(query)
 
     engine = _get_db_engine()
     SessionLocal = sessionmaker(bind=engine)
 
-    # pgvector cosine 거리 연산자를 직접 사용 (<=>)
-    stmt = text(
+    use_rerank = RERANK_ENABLED if rerank is None else rerank
+    # rerank 시에는 cross-encoder 후보까지 포함해 벡터 검색에서 더 많이 가져온다
+    fetch_k = top_k * max(1, rerank_multiplier or RERANK_CANDIDATE_MULTIPLIER) if use_rerank else top_k
+    resolved_doc_k = max(1, doc_k or EMBED_SEARCH_DOC_K)
+    if search_mode == "hierarchical":
+        # 후보가 이미 정확한 코사인 순서이므로 oversample 이 필요 없다
+        candidates_sql = _HIERARCHICAL_CANDIDATES_SQL
+        candidate_limit = fetch_k
+        ef_search = min(max(resolved_doc_k, _MIN_EF_SEARCH), _MAX_EF_SEARCH)
+    else:
+        candidates_sql = _FLAT_CANDIDATES_SQL
+        candidate_limit = fetch_k * max(1, oversample or EMBED_SEARCH_OVERSAMPLE)
+        ef_search = min(max(candidate_limit, _MIN_EF_SEARCH), _MAX_EF_SEARCH)
+
+    # 1) 모드별 후보 CTE (flat: bit HNSW Hamming 후보 / hierarchical: 상위 문서 내 청크 KNN)
+    # 2) 후보만 halfvec 코사인 거리(<=>)로 재정렬 후 문서 메타데이터 조인
+    hits_sql = (
+        """
+        WITH q AS (
+            SELECT CAST(:query_embedding AS halfvec(256)) AS embedding
+        ),
         """
+        + candidates_sql.format(chunk_columns=_CHUNK_COLUMNS, keyset_filter="")
+        + """
         SELECT
             d.document_id AS document_id,
             d.name AS document_name,
             d.path AS document_path,
-            dc.document_content_id AS document_content_id,
-            dc.document_chunk_id AS document_chunk_id,
-            dc.position AS position,
-            dc.chunk_content AS chunk_content,
-            (1 - (dc.chunk_embedding <=> CAST(:query_embedding AS vector))) AS similarity
-        FROM document_chunk AS dc
+            c.document_content_id,
+            c.document_chunk_id,
+            c.position,
+            c.chunk_content,
+            c.chunk_start,
+            c.chunk_end,
+            c.chunk_preview,
+            c.page_start,
+            c.page_end,
+            c.block_ids,
+            c.token_count,
+            c.bboxes,
+            (1 - (c.chunk_embedding <=> q.embedding)) AS similarity,
+            ROW_NUMBER() OVER (ORDER BY c.chunk_embedding <=> q.embedding) AS hit_rank
+        FROM candidates AS c
+        CROSS JOIN q
         JOIN document_content AS dct
-            ON dc.document_content_id = dct.document_content_id
+            ON c.document_content_id = dct.document_content_id
         JOIN document AS d
             ON dct.document_id = d.document_id
-        WHERE
-            d.user_id = :user_id
-            AND d.deleted_at IS NULL
-            AND dct.deleted_at IS NULL
-            AND dc.deleted_at IS NULL
-            AND (:path_prefix IS NULL OR d.path <@ CAST(:path_prefix AS ltree))
-        ORDER BY dc.chunk_embedding <=> CAST(:query_embedding AS vector)
+        ORDER BY c.chunk_embedding <=> q.embedding
         LIMIT :limit
         """
     )
+    # 3) (선택) 히트별 이웃 청크를 LATERAL 조인으로 함께 조회
+    stmt = text(wrap_with_neighbors(hits_sql) if context_window > 0 else hits_sql)
 
     results: List[ChunkSearchResult] = []
 
-    with SessionLocal() as session:
+    with phase("db"), SessionLocal() as session:
+        # 트랜잭션 범위 HNSW 설정: 후보 수만큼 탐색하고, 필터로 후보가 모자라면 인덱스를 계속 스캔
+        # (hnsw.iterative_scan 은 pgvector 0.8 이상)
+        session.execute(
+            text(
+                "SELECT set_config('hnsw.ef_search', :ef_search, true), "
+                "set_config('hnsw.iterative_scan', 'relaxed_order', true)"
+            ),
+            {"ef_search": str(ef_search)},
+        )
         rows = (
             session.execute(
                 stmt,
                 {
                     "user_id": normalized_user_id,
                     "query_embedding": query_vec,
-                    "limit": top_k,
+                    "limit": fetch_k,
+                    "candidate_limit": candidate_limit,
                     "path_prefix": path_prefix,
+                    "include_history": include_history,
+                    "doc_k": resolved_doc_k,
+                    "context_window": context_window,
                 },
             )
             .mappings()
             .all()
         )
 
-    for row in rows:
+        neighbors_by_hit: Dict[str, List[Dict[str, Any]]] = {}
+        if context_window > 0:
+            rows, neighbors_by_hit = split_hit_rows(session, rows)
+
+        # 오프셋 저장 청크는 content markdown 캐시에서 본문을 복원
+        chunk_texts = materialize_chunk_texts(session, rows)
+
+    rerank_scores_by_pos: List[float | None] = [None] * len(rows)
+    if use_rerank and rows:
+        from src.processing.embedding.reranker import rerank_scores
+
+        with phase("rerank"):
+            rerank_scores_by_pos, _ = rerank_scores(
+                query,
+                list(chunk_texts),
+                budget_ms=RERANK_BUDGET_MS if rerank_budget_ms is None else rerank_budget_ms,
+            )
+
+    for row, chunk_text, rerank_score in zip(rows, chunk_texts, rerank_scores_by_pos):
         results.append(
             ChunkSearchResult(
                 document_id=row["document_id"],
@@ -249,20 +507,349 @@ def query_embed_search(
                 document_path=row["document_path"],
                 document_chunk_id=row["document_chunk_id"],
                 position=row.get("position"),
-                chunk_content=row["chunk_content"],
+                chunk_content=chunk_text,
                 similarity=_sanitize_float(row.get("similarity")),
+                rerank_score=None if rerank_score is None else _sanitize_float(rerank_score),
+                page_start=row.get("page_start"),
+                page_end=row.get("page_end"),
+                block_ids=row.get("block_ids"),
+                token_count=row.get("token_count"),
+                bboxes=row.get("bboxes"),
             )
         )
 
-    return [r.to_dict() for r in results]
+    if use_rerank:
+        # 점수를 받은 후보를 점수 내림차순으로, 예산 초과로 남은 후보는 기존 벡터 순서대로 뒤에 둔다 (안정 정렬)
+        results.sort(key=lambda r: (r.rerank_score is None, -(r.rerank_score or 0.0)))
+
+    output = [r.to_dict() for r in results[:top_k]]
+    if context_window > 0:
+        output = merge_context_windows(output, neighbors_by_hit)
+    return output
+
+
+# keyset 조건: 직전 페이지 마지막 (distance, chunk_id) 이후만 후보로 남긴다.
+# HNSW iterative scan 이 필터를 통과한 후보가 LIMIT 만큼 찰 때까지 인덱스를 계속 읽는다.
+_EMBED_KEYSET_FILTER = """AND (
+                    CAST(:after_distance AS double precision) IS NULL
+                    OR (dc.chunk_embedding <=> CAST(:query_embedding AS halfvec(256)), dc.document_chunk_id)
+                       > (CAST(:after_distance AS double precision), CAST(:after_chunk_id AS uuid))
+                )"""
+
+
+def query_embed_search_page(
+    user_id: uuid.UUID | str,
+    query: str,
+    page_size: int = 20,
+    path_prefix: str | None = None,
+    include_history: bool = False,
+    cursor: str | None = None,
+    oversample: int | None = None,
+) -> Dict[str, Any]:
+    """
+    임베딩 검색 결과를 keyset 커서로 페이지 단위 조회한다.
+
+    - 정렬: (cosine distance, document_chunk_id) 오름차순
+    - cursor: 직전 응답의 next_cursor (None 이면 첫 페이지). 다른 조건의 커서는 ValueError
+    - 반환값: {"items": [ChunkSearchResult.to_dict(), ...], "next_cursor": str | None}
+    """
+    if not query or not isinstance(query, str) or not query.strip() or page_size <= 0:
+        return {"items": [], "next_cursor": None}
+
+    normalized_user_id = _normalize_user_id(user_id)
+    fingerprint = request_fingerprint(
+        tool="embed",
+        user_id=str(normalized_user_id),
+        query=query,
+        path_prefix=path_prefix,
+        include_history=include_history,
+    )
+    after = decode_cursor(cursor, "embed", fingerprint) or {}
+    query_vec = embed_query_to_vector(query)
+
+    engine = _get_db_engine()
+    SessionLocal = sessionmaker(bind=engine)
+
+    # 다음 페이지 존재 여부 확인용으로 1건 더 조회
+    fetch_k = page_size + 1
+    candidate_limit = fetch_k * max(1, oversample or EMBED_SEARCH_OVERSAMPLE)
+    ef_search = min(max(candidate_limit, _MIN_EF_SEARCH), _MAX_EF_SEARCH)
+
+    stmt = text(
+        """
+        WITH q AS (
+            SELECT CAST(:query_embedding AS halfvec(256)) AS embedding
+        ),
+        """
+        + _FLAT_CANDIDATES_SQL.format(chunk_columns=_CHUNK_COLUMNS, keyset_filter=_EMBED_KEYSET_FILTER)
+        + """
+        SELECT
+            d.document_id AS document_id,
+            d.name AS document_name,
+            d.path AS document_path,
+            c.document_content_id,
+            c.document_chunk_id,
+            c.position,
+            c.chunk_content,
+            c.chunk_start,
+            c.chunk_end,
+            c.chunk_preview,
+            c.page_start,
+            c.page_end,
+            c.block_ids,
+            c.token_count,
+            c.bboxes,
+            (c.chunk_embedding <=> q.embedding) AS distance
+        FROM candidates AS c
+        CROSS JOIN q
+        JOIN document_content AS dct
+            ON c.document_content_id = dct.document_content_id
+        JOIN document AS d
+            ON dct.document_id = d.document_id
+        ORDER BY c.chunk_embedding <=> q.embedding, c.document_chunk_id
+        LIMIT :limit
+        """
+    )
+
+    with SessionLocal() as session:
+        session.execute(
+            text(
+                "SELECT set_config('hnsw.ef_search', :ef_search, true), "
+                "set_config('hnsw.iterative_scan', 'relaxed_order', true)"
+            ),
+            {"ef_search": str(ef_search)},
+        )
+        rows = (
+            session.execute(
+                stmt,
+                {
+                    "user_id": normalized_user_id,
+                    "query_embedding": query_vec,
+                    "limit": fetch_k,
+                    "candidate_limit": candidate_limit,
+                    "path_prefix": path_prefix,
+                    "include_history": include_history,
+                    "after_distance": after.get("distance"),
+                    "after_chunk_id": after.get("chunk_id"),
+                },
+            )
+            .mappings()
+            .all()
+        )
+        page_rows = rows[:page_size]
+        chunk_texts = materialize_chunk_texts(session, page_rows)
+
+    items: List[Dict[str, Any]] = []
+    for row, chunk_text in zip(page_rows, chunk_texts):
+        items.append(
+            ChunkSearchResult(
+                document_id=row["document_id"],
+                document_content_id=row["document_content_id"],
+                document_name=row.get("document_name"),
+                document_path=row["document_path"],
+                document_chunk_id=row["document_chunk_id"],
+                position=row.get("position"),
+                chunk_content=chunk_text,
+                similarity=_sanitize_float(1 - _sanitize_float(row.get("distance"), 1.0)),
+                page_start=row.get("page_start"),
+                page_end=row.get("page_end"),
+                block_ids=row.get("block_ids"),
+                token_count=row.get("token_count"),
+                bboxes=row.get("bboxes"),
+            ).to_dict()
+        )
+
+    next_cursor = None
+    if len(rows) > page_size:
+        last = page_rows[-1]
+        next_cursor = encode_cursor(
+            "embed",
+            fingerprint,
+            # distance 는 DB 값을 그대로(float8) 보관해야 keyset 비교가 정확하다
+            {"distance": float(last["distance"]), "chunk_id": str(last["document_chunk_id"])},
+        )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _vector_literal(vec: Sequence[float]) -> str:
+    """pgvector 텍스트 표현 ('[x1,x2,...]')."""
+    return "[" + ",".join(repr(float(v)) for v in vec) + "]"
+
+
+def query_embed_search_batch(
+    user_id: uuid.UUID | str,
+    queries: Sequence[str],
+    top_k: int = 5,
+    path_prefixes: Sequence[str] | None = None,
+    oversample: int | None = None,
+    include_history: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    여러 질의를 한 번에 임베딩 검색한다.
+
+    - queries: 질의 목록 (한 번의 forward pass 로 임베딩, 캐시 히트 질의는 제외)
+    - path_prefixes: ltree prefix 목록. 비어 있으면 전체, 있으면 어느 하나의 하위 문서 (`document_path <@ ltree[]`)
+    - 질의별 top_k 는 unnest(질의 벡터) + LATERAL 서브쿼리로 단일 SQL 에서 계산한다.
+    - 반환값: [{"query": str, "results": [ChunkSearchResult.to_dict(), ...]}, ...] (queries 순서)
+    """
+    # 비어 있거나(공백뿐 포함) 문자열이 아닌 질의는 제외
+    query_list = [q for q in queries if q and isinstance(q, str) and q.strip()]
+    if not query_list or top_k <= 0:
+        return [{"query": q, "results": []} for q in query_list]
+
+    normalized_user_id = _normalize_user_id(user_id)
+    query_vecs = embed_queries_to_vectors(query_list)
+
+    engine = _get_db_engine()
+    SessionLocal = sessionmaker(bind=engine)
+
+    candidate_limit = top_k * max(1, oversample or EMBED_SEARCH_OVERSAMPLE)
+    ef_search = min(max(candidate_limit, _MIN_EF_SEARCH), _MAX_EF_SEARCH)
+
+    # 1) qs: 질의 벡터 배열을 unnest (WITH ORDINALITY 로 질의 순번 유지)
+    # 2) 질의마다 LATERAL 로 bit HNSW Hamming 후보 → halfvec 코사인 재정렬 top_k
+    # 3) 최종 hit 에만 문서 메타데이터 조인
+    stmt = text(
+        """
+        WITH qs AS (
+            SELECT
+                t.query_idx,
+                CAST(t.embedding AS halfvec(256)) AS embedding
+            FROM unnest(CAST(:query_embeddings AS text[])) WITH ORDINALITY AS t(embedding, query_idx)
+        ),
+        latest AS (
+            SELECT d_latest.latest_content_id
+            FROM document AS d_latest
+            WHERE d_latest.user_id = :user_id
+              AND d_latest.deleted_at IS NULL
+        )
+        SELECT
+            qs.query_idx AS query_idx,
+            d.document_id AS document_id,
+            d.name AS document_name,
+            d.path AS document_path,
+            hit.document_content_id,
+            hit.document_chunk_id,
+            hit.position,
+            hit.chunk_content,
+            hit.chunk_start,
+            hit.chunk_end,
+            hit.chunk_preview,
+            hit.page_start,
+            hit.page_end,
+            hit.block_ids,
+            hit.token_count,
+            hit.bboxes,
+            hit.similarity
+        FROM qs
+        CROSS JOIN LATERAL (
+            SELECT
+                c.*,
+                (1 - (c.chunk_embedding <=> qs.embedding)) AS similarity
+            FROM (
+                SELECT
+                    dc.document_content_id,
+                    dc.document_chunk_id,
+                    dc.position,
+                    dc.chunk_content,
+                    dc.chunk_start,
+                    dc.chunk_end,
+                    dc.chunk_preview,
+                    dc.page_start,
+                    dc.page_end,
+                    dc.block_ids,
+                    dc.token_count,
+                    dc.bboxes,
+                    dc.chunk_embedding
+                FROM document_chunk AS dc
+                WHERE
+                    dc.user_id = :user_id
+                    AND dc.is_live
+                    AND (
+                        cardinality(CAST(:path_prefixes AS ltree[])) = 0
+                        OR dc.document_path <@ CAST(:path_prefixes AS ltree[])
+                    )
+                    AND (
+                        CAST(:include_history AS boolean)
+                        OR dc.document_content_id IN (SELECT latest_content_id FROM latest)
+                    )
+                ORDER BY
+                    (binary_quantize(dc.chunk_embedding)::bit(256))
+                    <~> (binary_quantize(qs.embedding)::bit(256))
+                LIMIT :candidate_limit
+            ) AS c
+            ORDER BY c.chunk_embedding <=> qs.embedding
+            LIMIT :limit
+        ) AS hit
+        JOIN document_content AS dct
+            ON hit.document_content_id = dct.document_content_id
+        JOIN document AS d
+            ON dct.document_id = d.document_id
+        ORDER BY qs.query_idx, hit.similarity DESC
+        """
+    )
+
+    with SessionLocal() as session:
+        session.execute(
+            text(
+                "SELECT set_config('hnsw.ef_search', :ef_search, true), "
+                "set_config('hnsw.iterative_scan', 'relaxed_order', true)"
+            ),
+            {"ef_search": str(ef_search)},
+        )
+        rows = (
+            session.execute(
+                stmt,
+                {
+                    "user_id": normalized_user_id,
+                    "query_embeddings": [_vector_literal(vec) for vec in query_vecs],
+                    "path_prefixes": list(path_prefixes or []),
+                    "include_history": include_history,
+                    "candidate_limit": candidate_limit,
+                    "limit": top_k,
+                },
+            )
+            .mappings()
+            .all()
+        )
+        chunk_texts = materialize_chunk_texts(session, rows)
+
+    grouped: List[List[Dict[str, Any]]] = [[] for _ in query_list]
+    for row, chunk_text in zip(rows, chunk_texts):
+        grouped[int(row["query_idx"]) - 1].append(
+            ChunkSearchResult(
+                document_id=row["document_id"],
+                document_content_id=row["document_content_id"],
+                document_name=row.get("document_name"),
+                document_path=row["document_path"],
+                document_chunk_id=row["document_chunk_id"],
+                position=row.get("position"),
+                chunk_content=chunk_text,
+                similarity=_sanitize_float(row.get("similarity")),
+                page_start=row.get("page_start"),
+                page_end=row.get("page_end"),
+                block_ids=row.get("block_ids"),
+                token_count=row.get("token_count"),
+                bboxes=row.get("bboxes"),
+            ).to_dict()
+        )
+
+    return [{"query": q, "results": results} for q, results in zip(query_list, grouped)]
 
 
 def _format_results_for_cli(results: Sequence[Dict[str, Any]]) -> str:
     lines: List[str] = []
     for idx, r in enumerate(results, start=1):
         header = f"[{idx}] doc={r['document_id']} content={r['document_content_id']} pos={r['position']} score={r['similarity']:.4f}"
+        if r.get("rerank_score") is not None:
+            header += f" rerank={r['rerank_score']:.4f}"
         lines.append(header)
-        lines.append(r["chunk_content"])
+        context = r.get("context")
+        if context:
+            lines.append(f"(context pos {context['position_start']}~{context['position_end']})")
+            lines.append(context["content"])
+        else:
+            lines.append(r["chunk_content"])
         lines.append("-" * 80)
     return "\n".join(lines)
 
@@ -279,6 +866,44 @@ if __name__ == "__main__":
         help="ltree 기반 Document.path prefix (예: 'root.some_folder') 로 문서 범위 필터링",
         default=None,
     )
+    parser.add_argument(
+        "--oversample",
+        type=int,
+        default=None,
+        help="Hamming 후보 배수 (기본: EMBED_SEARCH_OVERSAMPLE)",
+    )
+    parser.add_argument(
+        "--include-history",
+        action="store_true",
+        help="과거 content 버전의 청크도 검색 대상에 포함",
+    )
+
+    parser.add_argument(
+        "--mode",
+        choices=["flat", "hierarchical"],
+        default=None,
+        help="검색 방식 (기본: EMBED_SEARCH_MODE)",
+    )
+    parser.add_argument("--doc-k", type=int, default=None, help="hierarchical 모드 문서 수 (기본: EMBED_SEARCH_DOC_K)")
+    parser.add_argument(
+        "--context-window",
+        type=int,
+        default=0,
+        help="히트 주변 position ± n 청크를 함께 반환",
+    )
+    parser.add_argument("--rerank", action="store_true", help="cross-encoder 재순위화 사용")
+    parser.add_argument(
+        "--rerank-multiplier",
+        type=int,
+        default=None,
+        help="재순위화 후보 배수 (기본: RERANK_CANDIDATE_MULTIPLIER)",
+    )
+    parser.add_argument(
+        "--rerank-budget-ms",
+        type=float,
+        default=None,
+        help="재순위화 지연 예산 ms (기본: RERANK_BUDGET_MS)",
+    )
 
     args = parser.parse_args()
 
@@ -288,6 +913,14 @@ if __name__ == "__main__":
         args.query,
         top_k=args.top_k,
         path_prefix=args.path_prefix,
+        oversample=args.oversample,
+        include_history=args.include_history,
+        rerank=args.rerank or None,
+        rerank_multiplier=args.rerank_multiplier,
+        rerank_budget_ms=args.rerank_budget_ms,
+        mode=args.mode,
+        doc_k=args.doc_k,
+        context_window=args.context_window,
     )
 
     if not search_results:
@@ -8,8 +8,12 @@
   - 관련 텍스트를 포함하는 청크 목록(list[dict])
 
 내부 규칙:
-- 검색 대상은 DocumentChunk.chunk_content 기준
-- PostgreSQL full-text search (plainto_tsquery + to_tsvector) 기반 랭킹
+- 검색 대상은 DocumentChunk.chunk_tsv 기준 (chunk_content 또는 오프셋이 가리키는 markdown 구간)
+- PostgreSQL full-text search (plainto_tsquery + 트리거로 유지되는 chunk_tsv GIN 인덱스) 기반 랭킹
+- query_text_search_page: (rank, chunk_id) keyset 커서 페이지네이션 (OFFSET 없음)
+- query_text_search_batch: 여러 질의 × 여러 path prefix 를 단일 SQL(unnest + LATERAL top-k)로 검색
+- context_window=n 이면 각 히트와 같은 content 의 position ± n 청크를 같은 SQL(LATERAL 조인)로 가져와
+  겹치는 창을 병합한 "context" 를 붙인다. (src/processing/tools/context_window.py)
 """
 
 from __future__ import annotations
@@ -22,7 +26,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Sequence
 
-from sqlalchemy import Integer, bindparam, create_engine, text
+from sqlalchemy import Integer, Text, bindparam, create_engine, text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
@@ -31,6 +36,13 @@ _SRC_DIR = Path(__file__).resolve().parents[2]  # .../src
 _SCHEMA_DIR = _SRC_DIR / "schema"
 if str(_SCHEMA_DIR) not in sys.path:
     sys.path.append(str(_SCHEMA_DIR))
+_TOOLS_DIR = Path(__file__).resolve().parent
+if str(_TOOLS_DIR) not in sys.path:
+    sys.path.append(str(_TOOLS_DIR))
+# src.processing.tools.phase_timer import 경로 보정 (sidecar 루트)
+_APP_DIR = _SRC_DIR.parent
+if str(_APP_DIR) not in sys.path:
+    sys.path.append(str(_APP_DIR))
 
 from document_schema import (  # type: ignore[import]
     Document,
@@ -40,6 +52,11 @@ from document_schema import (  # type: ignore[import]
 
 _ = (Document, DocumentContent, DocumentChunk)
 
+from context_window import merge_context_windows, split_hit_rows, wrap_with_neighbors  # type: ignore[import]
+from markdown_cache import materialize_chunk_texts  # type: ignore[import]
+from pagination import decode_cursor, encode_cursor, request_fingerprint  # type: ignore[import]
+from src.processing.tools.phase_timer import phase
+
 
 def _sanitize_float(value: Any, default: float = 0.0) -> float:
   """
@@ -78,6 +95,12 @@ class TextSearchResult:
     position: int | None
     chunk_content: str
     rank: float
+    page_start: int | None = None
+    page_end: int | None = None
+    block_ids: List[str] | None = None
+    bboxes: List[Dict[str, Any]] | None = None
+    token_count: int | None = None
+    context: Dict[str, Any] | None = None
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -89,6 +112,12 @@ class TextSearchResult:
             "position": self.position,
             "chunk_content": self.chunk_content,
             "rank": float(self.rank),
+            "page_start": self.page_start,
+            "page_end": self.page_end,
+            "block_ids": self.block_ids,
+            "bboxes": self.bboxes,
+            "token_count": self.token_count,
+            "context": self.context,
         }
 
 
@@ -105,6 +134,8 @@ def query_text_search(
     query: str,
     top_k: int = 5,
     path_prefix: str | None = None,
+    include_history: bool = False,
+    context_window: int = 0,
 ) -> List[Dict[str, Any]]:
     """
     텍스트 매칭(full-text search) 기반으로 DocumentChunk를 검색한다.
@@ -112,6 +143,9 @@ def query_text_search(
     - user_id: 해당 사용자의 문서만 대상으로 검색
     - query: 자연어 질의
     - top_k: 상위 N개 결과
+    - include_history: True 이면 최신 버전(document.latest_content_id)이 아닌 과거 content 버전 청크도 포함
+    - context_window: 0 보다 크면 히트 주변 position ± context_window 청크를 병합한 "context" 를 붙인다.
+      같은 content 에서 창이 겹치는 히트는 순위가 높은 결과 하나로 합쳐지므로 결과 수가 top_k 보다 적을 수 있다.
     """
     if not query or not isinstance(query, str):
         return []
@@ -124,8 +158,10 @@ def query_text_search(
     SessionLocal = sessionmaker(bind=engine)
 
     # PostgreSQL full-text search (simple configuration) 사용
-    stmt = text(
-        """
+    # - 필터는 document_chunk 의 비정규화 컬럼(user_id / document_path / is_live)만 사용하고,
+    #   조인은 결과 메타데이터(문서 이름, content 생성 시각) 조회에만 쓴다.
+    # - 기본적으로 문서의 최신 버전(document.latest_content_id) 청크만 남긴다.
+    hits_sql = """
         WITH q AS (
             SELECT plainto_tsquery('simple', :query) AS ts_query
         )
@@ -137,10 +173,18 @@ def query_text_search(
             dc.document_chunk_id AS document_chunk_id,
             dc.position AS position,
             dc.chunk_content AS chunk_content,
-            ts_rank(
-                to_tsvector('simple', coalesce(dc.chunk_content, '')),
-                q.ts_query
-            ) AS rank
+            dc.chunk_start AS chunk_start,
+            dc.chunk_end AS chunk_end,
+            dc.chunk_preview AS chunk_preview,
+            dc.page_start AS page_start,
+            dc.page_end AS page_end,
+            dc.block_ids AS block_ids,
+            dc.token_count AS token_count,
+            dc.bboxes AS bboxes,
+            ts_rank(dc.chunk_tsv, q.ts_query) AS rank,
+            ROW_NUMBER() OVER (
+                ORDER BY ts_rank(dc.chunk_tsv, q.ts_query) DESC, dct.created_at DESC, dc.position NULLS FIRST
+            ) AS hit_rank
         FROM q,
             document_chunk AS dc
         JOIN document_content AS dct
@@ -148,28 +192,38 @@ def query_text_search(
         JOIN document AS d
             ON dct.document_id = d.document_id
         WHERE
-            d.user_id = :user_id
-            AND d.deleted_at IS NULL
-            AND dct.deleted_at IS NULL
-            AND dc.deleted_at IS NULL
-            AND q.ts_query @@ to_tsvector('simple', coalesce(dc.chunk_content, ''))
-            AND (:path_prefix IS NULL OR d.path <@ CAST(:path_prefix AS ltree))
+            dc.user_id = :user_id
+            AND dc.is_live
+            AND dc.chunk_tsv @@ q.ts_query
+            AND (:path_prefix IS NULL OR dc.document_path <@ CAST(:path_prefix AS ltree))
+            AND (CAST(:include_history AS boolean) OR d.latest_content_id = dc.document_content_id)
         ORDER BY rank DESC, dct.created_at DESC, dc.position NULLS FIRST
         LIMIT :limit
         """
-    ).bindparams(
+    # (선택) 히트별 이웃 청크를 LATERAL 조인으로 함께 조회
+    stmt = text(wrap_with_neighbors(hits_sql) if context_window > 0 else hits_sql).bindparams(
         bindparam("user_id", value=normalized_user_id),
         bindparam("query", value=query),
         bindparam("limit", value=top_k, type_=Integer),
         bindparam("path_prefix", value=path_prefix),
+        bindparam("include_history", value=include_history),
     )
+    if context_window > 0:
+        stmt = stmt.bindparams(bindparam("context_window", value=context_window, type_=Integer))
 
     results: List[TextSearchResult] = []
 
-    with SessionLocal() as session:
+    with phase("db"), SessionLocal() as session:
         rows = session.execute(stmt).mappings().all()
 
-    for row in rows:
+        neighbors_by_hit: Dict[str, List[Dict[str, Any]]] = {}
+        if context_window > 0:
+            rows, neighbors_by_hit = split_hit_rows(session, rows)
+
+        # 오프셋 저장 청크는 content markdown 캐시에서 본문을 복원
+        chunk_texts = materialize_chunk_texts(session, rows)
+
+    for row, chunk_text in zip(rows, chunk_texts):
         results.append(
             TextSearchResult(
                 document_id=row["document_id"],
@@ -178,12 +232,251 @@ def query_text_search(
                 document_path=row["document_path"],
                 document_chunk_id=row["document_chunk_id"],
                 position=row.get("position"),
-                chunk_content=row["chunk_content"],
+                chunk_content=chunk_text,
                 rank=_sanitize_float(row.get("rank")),
+                page_start=row.get("page_start"),
+                page_end=row.get("page_end"),
+                block_ids=row.get("block_ids"),
+                token_count=row.get("token_count"),
+                bboxes=row.get("bboxes"),
             )
         )
 
-    return [r.to_dict() for r in results]
+    output = [r.to_dict() for r in results]
+    if context_window > 0:
+        output = merge_context_windows(output, neighbors_by_hit)
+    return output
+
+
+def query_text_search_page(
+    user_id: uuid.UUID | str,
+    query: str,
+    page_size: int = 20,
+    path_prefix: str | None = None,
+    include_history: bool = False,
+    cursor: str | None = None,
+) -> Dict[str, Any]:
+    """
+    텍스트 검색 결과를 keyset 커서로 페이지 단위 조회한다.
+
+    - 정렬: ts_rank 내림차순, document_chunk_id 오름차순
+    - cursor: 직전 응답의 next_cursor (None 이면 첫 페이지). 다른 조건의 커서는 ValueError
+    - 반환값: {"items": [TextSearchResult.to_dict(), ...], "next_cursor": str | None}
+    """
+    if not query or not isinstance(query, str) or page_size <= 0:
+        return {"items": [], "next_cursor": None}
+
+    normalized_user_id = _normalize_user_id(user_id)
+    fingerprint = request_fingerprint(
+        tool="text",
+        user_id=str(normalized_user_id),
+        query=query,
+        path_prefix=path_prefix,
+        include_history=include_history,
+    )
+    after = decode_cursor(cursor, "text", fingerprint) or {}
+
+    engine = _get_db_engine()
+    SessionLocal = sessionmaker(bind=engine)
+
+    # ts_rank 는 real(float4) 이므로 커서 값도 real 로 맞춰 비교한다.
+    stmt = text(
+        """
+        WITH q AS (
+            SELECT plainto_tsquery('simple', :query) AS ts_query
+        )
+        SELECT
+            d.document_id AS document_id,
+            d.name AS document_name,
+            d.path AS document_path,
+            dc.document_content_id AS document_content_id,
+            dc.document_chunk_id AS document_chunk_id,
+            dc.position AS position,
+            dc.chunk_content AS chunk_content,
+            dc.chunk_start AS chunk_start,
+            dc.chunk_end AS chunk_end,
+            dc.chunk_preview AS chunk_preview,
+            dc.page_start AS page_start,
+            dc.page_end AS page_end,
+            dc.block_ids AS block_ids,
+            dc.token_count AS token_count,
+            dc.bboxes AS bboxes,
+            ts_rank(dc.chunk_tsv, q.ts_query) AS rank
+        FROM q,
+            document_chunk AS dc
+        JOIN document_content AS dct
+            ON dc.document_content_id = dct.document_content_id
+        JOIN document AS d
+            ON dct.document_id = d.document_id
+        WHERE
+            dc.user_id = :user_id
+            AND dc.is_live
+            AND dc.chunk_tsv @@ q.ts_query
+            AND (:path_prefix IS NULL OR dc.document_path <@ CAST(:path_prefix AS ltree))
+            AND (CAST(:include_history AS boolean) OR d.latest_content_id = dc.document_content_id)
+            AND (
+                CAST(:after_rank AS real) IS NULL
+                OR ts_rank(dc.chunk_tsv, q.ts_query) < CAST(:after_rank AS real)
+                OR (
+                    ts_rank(dc.chunk_tsv, q.ts_query) = CAST(:after_rank AS real)
+                    AND dc.document_chunk_id > CAST(:after_chunk_id AS uuid)
+                )
+            )
+        ORDER BY rank DESC, dc.document_chunk_id
+        LIMIT :limit
+        """
+    ).bindparams(
+        bindparam("user_id", value=normalized_user_id),
+        bindparam("query", value=query),
+        bindparam("limit", value=page_size + 1, type_=Integer),
+        bindparam("path_prefix", value=path_prefix),
+        bindparam("include_history", value=include_history),
+        bindparam("after_rank", value=after.get("rank")),
+        bindparam("after_chunk_id", value=after.get("chunk_id")),
+    )
+
+    with SessionLocal() as session:
+        rows = session.execute(stmt).mappings().all()
+        page_rows = rows[:page_size]
+        chunk_texts = materialize_chunk_texts(session, page_rows)
+
+    items: List[Dict[str, Any]] = []
+    for row, chunk_text in zip(page_rows, chunk_texts):
+        items.append(
+            TextSearchResult(
+                document_id=row["document_id"],
+                document_content_id=row["document_content_id"],
+                document_name=row.get("document_name"),
+                document_path=row["document_path"],
+                document_chunk_id=row["document_chunk_id"],
+                position=row.get("position"),
+                chunk_content=chunk_text,
+                rank=_sanitize_float(row.get("rank")),
+                page_start=row.get("page_start"),
+                page_end=row.get("page_end"),
+                block_ids=row.get("block_ids"),
+                token_count=row.get("token_count"),
+                bboxes=row.get("bboxes"),
+            ).to_dict()
+        )
+
+    next_cursor = None
+    if len(rows) > page_size:
+        last = page_rows[-1]
+        next_cursor = encode_cursor(
+            "text",
+            fingerprint,
+            {"rank": float(last["rank"]), "chunk_id": str(last["document_chunk_id"])},
+        )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def query_text_search_batch(
+    user_id: uuid.UUID | str,
+    queries: Sequence[str],
+    top_k: int = 5,
+    path_prefixes: Sequence[str] | None = None,
+    include_history: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    여러 질의를 한 번에 full-text 검색한다.
+
+    - path_prefixes: ltree prefix 목록. 비어 있으면 전체, 있으면 어느 하나의 하위 문서 (`document_path <@ ltree[]`)
+    - 질의별 top_k 는 unnest(질의 배열) + LATERAL 서브쿼리로 단일 SQL 에서 계산한다.
+    - 반환값: [{"query": str, "results": [TextSearchResult.to_dict(), ...]}, ...] (queries 순서)
+    """
+    # 비어 있거나(공백뿐 포함) 문자열이 아닌 질의는 제외
+    query_list = [q for q in queries if q and isinstance(q, str) and q.strip()]
+    if not query_list or top_k <= 0:
+        return [{"query": q, "results": []} for q in query_list]
+
+    normalized_user_id = _normalize_user_id(user_id)
+
+    engine = _get_db_engine()
+    SessionLocal = sessionmaker(bind=engine)
+
+    stmt = text(
+        """
+        WITH qs AS (
+            SELECT
+                t.query_idx,
+                plainto_tsquery('simple', t.query) AS ts_query
+            FROM unnest(CAST(:queries AS text[])) WITH ORDINALITY AS t(query, query_idx)
+        )
+        SELECT
+            qs.query_idx AS query_idx,
+            hit.*
+        FROM qs
+        CROSS JOIN LATERAL (
+            SELECT
+                d.document_id AS document_id,
+                d.name AS document_name,
+                d.path AS document_path,
+                dc.document_content_id AS document_content_id,
+                dc.document_chunk_id AS document_chunk_id,
+                dc.position AS position,
+                dc.chunk_content AS chunk_content,
+                dc.chunk_start AS chunk_start,
+                dc.chunk_end AS chunk_end,
+                dc.chunk_preview AS chunk_preview,
+                dc.page_start AS page_start,
+                dc.page_end AS page_end,
+                dc.block_ids AS block_ids,
+                dc.token_count AS token_count,
+                dc.bboxes AS bboxes,
+                ts_rank(dc.chunk_tsv, qs.ts_query) AS rank
+            FROM document_chunk AS dc
+            JOIN document_content AS dct
+                ON dc.document_content_id = dct.document_content_id
+            JOIN document AS d
+                ON dct.document_id = d.document_id
+            WHERE
+                dc.user_id = :user_id
+                AND dc.is_live
+                AND dc.chunk_tsv @@ qs.ts_query
+                AND (
+                    cardinality(CAST(:path_prefixes AS ltree[])) = 0
+                    OR dc.document_path <@ CAST(:path_prefixes AS ltree[])
+                )
+                AND (CAST(:include_history AS boolean) OR d.latest_content_id = dc.document_content_id)
+            ORDER BY rank DESC, dct.created_at DESC, dc.position NULLS FIRST
+            LIMIT :limit
+        ) AS hit
+        ORDER BY qs.query_idx, hit.rank DESC
+        """
+    ).bindparams(
+        bindparam("user_id", value=normalized_user_id),
+        bindparam("queries", value=query_list, type_=ARRAY(Text)),
+        bindparam("path_prefixes", value=list(path_prefixes or []), type_=ARRAY(Text)),
+        bindparam("include_history", value=include_history),
+        bindparam("limit", value=top_k, type_=Integer),
+    )
+
+    with SessionLocal() as session:
+        rows = session.execute(stmt).mappings().all()
+        chunk_texts = materialize_chunk_texts(session, rows)
+
+    grouped: List[List[Dict[str, Any]]] = [[] for _ in query_list]
+    for row, chunk_text in zip(rows, chunk_texts):
+        grouped[int(row["query_idx"]) - 1].append(
+            TextSearchResult(
+                document_id=row["document_id"],
+                document_content_id=row["document_content_id"],
+                document_name=row.get("document_name"),
+                document_path=row["document_path"],
+                document_chunk_id=row["document_chunk_id"],
+                position=row.get("position"),
+                chunk_content=chunk_text,
+                rank=_sanitize_float(row.get("rank")),
+                page_start=row.get("page_start"),
+                page_end=row.get("page_end"),
+                block_ids=row.get("block_ids"),
+                token_count=row.get("token_count"),
+                bboxes=row.get("bboxes"),
+            ).to_dict()
+        )
+
+    return [{"query": q, "results": results} for q, results in zip(query_list, grouped)]
 
 
 def _format_results_for_cli(results: Sequence[Dict[str, Any]]) -> str:
@@ -191,7 +484,12 @@ def _format_results_for_cli(results: Sequence[Dict[str, Any]]) -> str:
     for idx, r in enumerate(results, start=1):
         header = f"[{idx}] doc={r['document_id']} content={r['document_content_id']} pos={r['position']} rank={r['rank']:.4f}"
         lines.append(header)
-        lines.append(r["chunk_content"])
+        context = r.get("context")
+        if context:
+            lines.append(f"(context pos {context['position_start']}~{context['position_end']})")
+            lines.append(context["content"])
+        else:
+            lines.append(r["chunk_content"])
         lines.append("-" * 80)
     return "\n".join(lines)
 
@@ -208,6 +506,17 @@ if __name__ == "__main__":
         help="ltree 기반 Document.path prefix (예: 'root.some_folder') 로 문서 범위 필터링",
         default=None,
     )
+    parser.add_argument(
+        "--include-history",
+        action="store_true",
+        help="과거 content 버전의 청크도 검색 대상에 포함",
+    )
+    parser.add_argument(
+        "--context-window",
+        type=int,
+        default=0,
+        help="히트 주변 position ± n 청크를 함께 반환",
+    )
 
     args = parser.parse_args()
 
@@ -217,6 +526,8 @@ if __name__ == "__main__":
         args.query,
         top_k=args.top_k,
         path_prefix=args.path_prefix,
+        include_history=args.include_history,
+        context_window=args.context_window,
     )
 
     if not search_results:
@@ -7,19 +7,36 @@
   - max_depth (root_path 기준으로 얼마나 깊이까지 내려갈지)
 - 출력:
   - 평탄한 document 리스트 (CLI에서는 들여쓰기 형태 트리로 출력)
+- query_tree_list_page: ltree path keyset 커서 페이지네이션 (OFFSET 없음)
+- query_tree_children: 한 단계(직속 자식)만 path keyset 페이지로 조회하고,
+  자식마다 child_count(직속 자식 수) / descendant_count(전체 하위 문서 수)를 단일 GROUP BY ltree 쿼리로 함께 계산
+- query_tree_list / query_tree_children 은 tree_cache(LISTEN/NOTIFY 무효화 사용자 트리 캐시)를 먼저 확인하고,
+  캐시를 쓸 수 없을 때만 Postgres 를 조회한다.
 """
 
 from __future__ import annotations
 
 import os
+import sys
 import uuid
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Any, Dict, List, Sequence
 
 from sqlalchemy import Integer, create_engine, text
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
+_TOOLS_DIR = Path(__file__).resolve().parent
+if str(_TOOLS_DIR) not in sys.path:
+    sys.path.append(str(_TOOLS_DIR))
+# src.processing.tools.tree_cache import 경로 보정 (sidecar 루트)
+_APP_DIR = _TOOLS_DIR.parents[2]
+if str(_APP_DIR) not in sys.path:
+    sys.path.append(str(_APP_DIR))
+
+from pagination import decode_cursor, encode_cursor, request_fingerprint  # type: ignore[import]
+
 
 def _get_db_engine() -> Engine:
     """환경변수 기반 PostgreSQL 엔진 생성."""
@@ -76,7 +93,11 @@ def query_tree_list(
         raise ValueError("max_depth는 0 이상의 정수여야 합니다.")
 
     normalized_user_id = _normalize_user_id(user_id)
-    
+
+    cached = list_tree_cached(normalized_user_id, root_path, max_depth)
+    if cached is not None:
+        return cached
+
     # root_path가 None이거나 빈 문자열이면 모든 문서 조회
     if not root_path or root_path.strip() == "":
         engine = _get_db_engine()
@@ -185,6 +206,239 @@ def query_tree_list(
     return [r.to_dict() for r in results]
 
 
+def query_tree_list_page(
+    user_id: uuid.UUID | str,
+    root_path: str | None = None,
+    max_depth: int = 4,
+    page_size: int = 200,
+    cursor: str | None = None,
+) -> Dict[str, Any]:
+    """
+    query_tree_list 와 같은 조건의 트리를 path 순 keyset 커서로 페이지 단위 조회한다.
+
+    - keyset: 직전 페이지 마지막 path 이후 (d.path > :after_path), ORDER BY d.path
+    - cursor: 직전 응답의 next_cursor (None 이면 첫 페이지). 다른 조건의 커서는 ValueError
+    - 반환값: {"items": [DocumentTreeItem.to_dict(), ...], "next_cursor": str | None}
+    """
+    if not isinstance(max_depth, int) or max_depth < 0:
+        raise ValueError("max_depth는 0 이상의 정수여야 합니다.")
+    if page_size <= 0:
+        return {"items": [], "next_cursor": None}
+
+    normalized_user_id = _normalize_user_id(user_id)
+    normalized_root = root_path.strip() if root_path and root_path.strip() else None
+    fingerprint = request_fingerprint(
+        tool="tree",
+        user_id=str(normalized_user_id),
+        root_path=normalized_root,
+        max_depth=max_depth,
+    )
+    after = decode_cursor(cursor, "tree", fingerprint) or {}
+
+    engine = _get_db_engine()
+    SessionLocal = sessionmaker(bind=engine)
+
+    # root_path 가 없으면 전체 트리 (relative_path = path, 깊이 기준은 루트 0)
+    stmt = text(
+        """
+        WITH root AS (
+            SELECT CAST(:root_path AS ltree) AS root_path
+        )
+        SELECT
+            d.document_id AS document_id,
+            d.name AS name,
+            d.path::text AS path,
+            d.kind::text AS kind,
+            nlevel(d.path) AS level,
+            CASE
+                WHEN root.root_path IS NULL THEN d.path::text
+                ELSE subpath(d.path, nlevel(root.root_path))::text
+            END AS relative_path
+        FROM document AS d, root
+        WHERE
+            d.user_id = :user_id
+            AND d.deleted_at IS NULL
+            AND (root.root_path IS NULL OR d.path <@ root.root_path)
+            AND nlevel(d.path) <= COALESCE(nlevel(root.root_path), 0) + :max_depth
+            AND (CAST(:after_path AS ltree) IS NULL OR d.path > CAST(:after_path AS ltree))
+        ORDER BY d.path
+        LIMIT :limit
+        """
+    )
+
+    with SessionLocal() as session:
+        rows = (
+            session.execute(
+                stmt,
+                {
+                    "user_id": normalized_user_id,
+                    "root_path": normalized_root,
+                    "max_depth": max_depth,
+                    "after_path": after.get("path"),
+                    "limit": page_size + 1,
+                },
+            )
+            .mappings()
+            .all()
+        )
+
+    page_rows = rows[:page_size]
+    items = [
+        DocumentTreeItem(
+            document_id=row["document_id"],
+            name=row.get("name"),
+            path=row["path"],
+            kind=row["kind"],
+            level=row["level"],
+            relative_path=row["relative_path"],
+        ).to_dict()
+        for row in page_rows
+    ]
+
+    next_cursor = None
+    if len(rows) > page_size:
+        next_cursor = encode_cursor("tree", fingerprint, {"path": page_rows[-1]["path"]})
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@dataclass
+class DocumentTreeChild:
+    document_id: uuid.UUID
+    name: str | None
+    path: str
+    kind: str
+    level: int
+    child_count: int
+    descendant_count: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "document_id": str(self.document_id),
+            "name": self.name,
+            "path": self.path,
+            "kind": self.kind,
+            "level": int(self.level),
+            "child_count": int(self.child_count),
+            "descendant_count": int(self.descendant_count),
+        }
+
+
+def query_tree_children(
+    user_id: uuid.UUID | str,
+    parent_path: str | None = None,
+    page_size: int = 100,
+    cursor: str | None = None,
+) -> Dict[str, Any]:
+    """
+    parent_path 의 직속 자식만 path 순 keyset 커서로 페이지 단위 조회한다. (트리 지연 펼침용)
+
+    - parent_path: None 이거나 빈 문자열이면 최상위(nlevel = 1) 문서
+    - 각 자식의 child_count / descendant_count 는 페이지의 자식들에 대해서만 한 번의 GROUP BY 로 계산
+    - cursor: 직전 응답의 next_cursor (None 이면 첫 페이지). 다른 조건의 커서는 ValueError
+    - 반환값: {"parent_path": str | None, "items": [DocumentTreeChild.to_dict(), ...], "next_cursor": str | None}
+    """
+    normalized_user_id = _normalize_user_id(user_id)
+    normalized_parent = parent_path.strip() if parent_path and parent_path.strip() else None
+    if page_size <= 0:
+        return {"parent_path": normalized_parent, "items": [], "next_cursor": None}
+
+    fingerprint = request_fingerprint(
+        tool="tree-children",
+        user_id=str(normalized_user_id),
+        parent_path=normalized_parent,
+    )
+    after_path = (decode_cursor(cursor, "tree-children", fingerprint) or {}).get("path")
+
+    rows = list_children_cached(normalized_user_id, normalized_parent, after_path, page_size)
+    if rows is None:
+        engine = _get_db_engine()
+        SessionLocal = sessionmaker(bind=engine)
+
+        # children: 이번 페이지의 직속 자식 (limit+1 로 다음 페이지 존재 확인)
+        # counts  : 페이지 자식들의 하위 문서를 자식 path 로 묶어 한 번에 집계 (path GiST 인덱스 <@ 조인)
+        stmt = text(
+            """
+            WITH parent AS (
+                SELECT CAST(:parent_path AS ltree) AS parent_path
+            ),
+            children AS (
+                SELECT
+                    d.document_id AS document_id,
+                    d.name AS name,
+                    d.path AS path,
+                    d.kind::text AS kind
+                FROM document AS d, parent
+                WHERE
+                    d.user_id = :user_id
+                    AND d.deleted_at IS NULL
+                    AND (parent.parent_path IS NULL OR d.path <@ parent.parent_path)
+                    AND nlevel(d.path) = COALESCE(nlevel(parent.parent_path), 0) + 1
+                    AND (CAST(:after_path AS ltree) IS NULL OR d.path > CAST(:after_path AS ltree))
+                ORDER BY d.path
+                LIMIT :limit
+            ),
+            counts AS (
+                SELECT
+                    c.path AS path,
+                    count(*) FILTER (WHERE nlevel(x.path) = nlevel(c.path) + 1) AS child_count,
+                    count(*) AS descendant_count
+                FROM children AS c
+                JOIN document AS x
+                    ON x.user_id = :user_id
+                    AND x.deleted_at IS NULL
+                    AND x.path <@ c.path
+                    AND x.path <> c.path
+                GROUP BY c.path
+            )
+            SELECT
+                c.document_id AS document_id,
+                c.name AS name,
+                c.path::text AS path,
+                c.kind AS kind,
+                nlevel(c.path) AS level,
+                COALESCE(counts.child_count, 0) AS child_count,
+                COALESCE(counts.descendant_count, 0) AS descendant_count
+            FROM children AS c
+            LEFT JOIN counts ON counts.path = c.path
+            ORDER BY c.path
+            """
+        )
+
+        with SessionLocal() as session:
+            rows = (
+                session.execute(
+                    stmt,
+                    {
+                        "user_id": normalized_user_id,
+                        "parent_path": normalized_parent,
+                        "after_path": after_path,
+                        "limit": page_size + 1,
+                    },
+                )
+                .mappings()
+                .all()
+            )
+
+    page_rows = rows[:page_size]
+    items = [
+        DocumentTreeChild(
+            document_id=row["document_id"],
+            name=row.get("name"),
+            path=row["path"],
+            kind=row["kind"],
+            level=row["level"],
+            child_count=row["child_count"],
+            descendant_count=row["descendant_count"],
+        ).to_dict()
+        for row in page_rows
+    ]
+
+    next_cursor = None
+    if len(rows) > page_size:
+        next_cursor = encode_cursor("tree-children", fingerprint, {"path": page_rows[-1]["path"]})
+    return {"parent_path": normalized_parent, "items": items, "next_cursor": next_cursor}
+
+
 def _format_tree_for_cli(items: Sequence[Dict[str, Any]]) -> str:
     if not items:
         return "문서가 없습니다."
@@ -0,0 +1,336 @@
+"""
+사용자별 문서 트리 캐시 (LISTEN/NOTIFY 무효화).
+
+- query_tree_list 는 에이전트가 거의 매 턴 호출하지만 트리는 드물게 바뀐다.
+- 사용자 트리 전체를 1회 조회해 ltree 순서로 정렬된 배열(라벨 튜플 / level / 행)로 보관하고,
+  이후 요청은 Postgres 를 거치지 않고 이진 탐색 + 슬라이스로 응답한다.
+- 무효화: document 테이블 트리거(document_tree_notify)가 생성/이동/이름 변경/soft delete 시
+  `document_tree_changed` 채널로 user_id 를 NOTIFY → 리스너 스레드가 해당 사용자 캐시만 제거
+  - 리스너 연결이 끊겨 있는 동안에는 알림을 놓칠 수 있으므로 캐시를 쓰지 않고, 재연결 시 전체 캐시를 비운다.
+  - LISTEN 은 트랜잭션 풀링 pgbouncer 를 거치면 알림이 오지 않으므로(연결은 성공한다) Postgres 직접 연결
+    TREE_CACHE_LISTEN_URL 이 있어야만 캐시를 켠다. 풀링 URL(DATABASE_URL)로 대체하지 않는다.
+- 안전장치: TREE_CACHE_TTL_SECONDS 가 지나면 다시 조회, 문서 수가 TREE_CACHE_MAX_DOCS 를 넘는 사용자는 캐시하지 않는다.
+
+주요 함수:
+- list_tree_cached(user_id, root_path, max_depth) -> list[dict] | None  (None 이면 캐시 사용 불가 → DB 조회)
+- list_children_cached(user_id, parent_path, after_path, limit) -> list[dict] | None  (직속 자식 + 자식/하위 문서 수)
+- start_tree_cache_listener() -> threading.Thread | None
+- get_tree_cache_stats() -> dict
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+import os
+import select
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from src.schema.db import engine
+
+logger = logging.getLogger(__name__)
+
+# LISTEN 전용 Postgres 직접 연결 URL (pgbouncer 경유 금지). 비어 있으면 캐시를 끈다.
+TREE_CACHE_LISTEN_URL = os.getenv("TREE_CACHE_LISTEN_URL", "").strip()
+TREE_CACHE_ENABLED = (
+    os.getenv("TREE_CACHE_ENABLED", "true").strip().lower() in ("1", "true", "yes") and bool(TREE_CACHE_LISTEN_URL)
+)
+TREE_CACHE_MAX_USERS = int(os.getenv("TREE_CACHE_MAX_USERS", "1024"))
+TREE_CACHE_MAX_DOCS = int(os.getenv("TREE_CACHE_MAX_DOCS", "50000"))
+TREE_CACHE_TTL_SECONDS = float(os.getenv("TREE_CACHE_TTL_SECONDS", "600"))
+
+TREE_CHANNEL = "document_tree_changed"
+# 리스너 poll 주기(초) / 재연결 대기 상한(초)
+_POLL_SECONDS = 5.0
+_MAX_BACKOFF_SECONDS = 30.0
+
+# ltree 라벨은 [A-Za-z0-9_-] 이므로 이 문자열보다 큰 라벨은 없다. (서브트리 끝 탐색용)
+_LABEL_SENTINEL = "\U0010ffff"
+
+_TREE_SQL = text(
+    """
+    SELECT
+        d.document_id AS document_id,
+        d.name AS name,
+        d.path::text AS path,
+        d.kind::text AS kind
+    FROM document AS d
+    WHERE
+        d.user_id = :user_id
+        AND d.deleted_at IS NULL
+    ORDER BY d.path
+    LIMIT :limit
+    """
+)
+
+
+@dataclass
+class _UserTree:
+    """ltree 순서로 정렬된 사용자 트리. keys[i] 는 path 라벨 튜플 (튜플 비교 순서 = ltree 비교 순서)."""
+
+    keys: List[Tuple[str, ...]]
+    rows: List[Tuple[uuid.UUID, Optional[str], str, str]]
+    loaded_at: float = field(default_factory=time.monotonic)
+
+
+_cache: "OrderedDict[str, _UserTree]" = OrderedDict()
+# 사용자별 무효화 세대. 조회 도중 무효화가 오면 조회 결과를 캐시에 넣지 않는다.
+_generations: Dict[str, int] = {}
+_lock = threading.Lock()
+_listener_connected = threading.Event()
+_stats: Dict[str, int] = {
+    "hits": 0,
+    "misses": 0,
+    "bypass": 0,
+    "invalidations": 0,
+    "uncacheable": 0,
+}
+
+
+def _bump(name: str) -> None:
+    with _lock:
+        _stats[name] += 1
+
+
+def invalidate_user(user_id: str) -> None:
+    """사용자 트리 캐시를 제거한다. (NOTIFY 수신 시 호출)"""
+    with _lock:
+        _cache.pop(user_id, None)
+        _generations[user_id] = _generations.get(user_id, 0) + 1
+        _stats["invalidations"] += 1
+
+
+def clear_tree_cache() -> None:
+    """전체 트리 캐시를 비운다. (리스너 재연결 시 등)"""
+    with _lock:
+        _cache.clear()
+        for user_id in list(_generations):
+            _generations[user_id] += 1
+
+
+def _load_user_tree(user_id: str) -> Optional[_UserTree]:
+    """사용자 트리 전체를 1회 조회한다. 문서 수가 상한을 넘으면 None."""
+    with engine.connect() as conn:
+        rows = conn.execute(_TREE_SQL, {"user_id": user_id, "limit": TREE_CACHE_MAX_DOCS + 1}).all()
+    if len(rows) > TREE_CACHE_MAX_DOCS:
+        return None
+    return _UserTree(
+        keys=[tuple(row.path.split(".")) for row in rows],
+        rows=[(row.document_id, row.name, row.path, row.kind) for row in rows],
+    )
+
+
+def _get_user_tree(user_id: str) -> Optional[_UserTree]:
+    now = time.monotonic()
+    with _lock:
+        tree = _cache.get(user_id)
+        if tree is not None and now - tree.loaded_at <= TREE_CACHE_TTL_SECONDS:
+            _cache.move_to_end(user_id)
+            _stats["hits"] += 1
+            return tree
+        _cache.pop(user_id, None)
+        generation = _generations.get(user_id, 0)
+        _stats["misses"] += 1
+
+    tree = _load_user_tree(user_id)
+    if tree is None:
+        _bump("uncacheable")
+        return None
+
+    with _lock:
+        # 조회 중 무효화가 왔으면 이번 결과는 응답에만 쓰고 캐시에 넣지 않는다.
+        if _generations.get(user_id, 0) == generation and _listener_connected.is_set():
+            _cache[user_id] = tree
+            _cache.move_to_end(user_id)
+            while len(_cache) > TREE_CACHE_MAX_USERS:
+                _cache.popitem(last=False)
+    return tree
+
+
+def list_tree_cached(
+    user_id: uuid.UUID,
+    root_path: Optional[str],
+    max_depth: int,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    캐시된 사용자 트리로 query_tree_list 와 같은 결과를 만든다.
+
+    - 캐시를 쓸 수 없으면(비활성화, 리스너 미연결, 문서 수 초과) None 을 반환한다.
+    """
+    if not TREE_CACHE_ENABLED or not _listener_connected.is_set():
+        _bump("bypass")
+        return None
+
+    tree = _get_user_tree(str(user_id))
+    if tree is None:
+        return None
+
+    if root_path and root_path.strip():
+        root_key = tuple(root_path.split("."))
+        lo = bisect.bisect_left(tree.keys, root_key)
+        hi = bisect.bisect_left(tree.keys, root_key + (_LABEL_SENTINEL,))
+        base_level = len(root_key)
+    else:
+        root_key = ()
+        lo, hi = 0, len(tree.keys)
+        base_level = 0
+
+    results: List[Dict[str, Any]] = []
+    for key, (document_id, name, path, kind) in zip(tree.keys[lo:hi], tree.rows[lo:hi]):
+        level = len(key)
+        if level > base_level + max_depth:
+            continue
+        results.append(
+            {
+                "document_id": str(document_id),
+                "name": name,
+                "path": path,
+                "kind": kind,
+                "level": level,
+                "relative_path": ".".join(key[base_level:]) if root_key else path,
+            }
+        )
+    return results
+
+
+def list_children_cached(
+    user_id: uuid.UUID,
+    parent_path: Optional[str],
+    after_path: Optional[str],
+    limit: int,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    캐시된 사용자 트리로 query_tree_children 와 같은 결과(직속 자식 최대 limit 개 + child_count/descendant_count)를 만든다.
+
+    - after_path: 이 path 의 서브트리 이후 자식부터 (keyset)
+    - 캐시를 쓸 수 없으면 None 을 반환한다.
+    """
+    if not TREE_CACHE_ENABLED or not _listener_connected.is_set():
+        _bump("bypass")
+        return None
+
+    tree = _get_user_tree(str(user_id))
+    if tree is None:
+        return None
+
+    parent_key: Tuple[str, ...] = tuple(parent_path.split(".")) if parent_path else ()
+    hi = bisect.bisect_left(tree.keys, parent_key + (_LABEL_SENTINEL,)) if parent_key else len(tree.keys)
+    if after_path:
+        lo = bisect.bisect_left(tree.keys, tuple(after_path.split(".")) + (_LABEL_SENTINEL,))
+    else:
+        lo = bisect.bisect_right(tree.keys, parent_key) if parent_key else 0
+    child_level = len(parent_key) + 1
+
+    results: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    current_key: Tuple[str, ...] = ()
+    for idx in range(lo, hi):
+        key = tree.keys[idx]
+        if len(key) == child_level:
+            if len(results) >= limit:
+                # limit+1 번째 자식은 "다음 페이지 있음" 표시용으로 존재만 알리면 된다.
+                results.append({"path": tree.rows[idx][2]})
+                break
+            document_id, name, path, kind = tree.rows[idx]
+            current = {
+                "document_id": str(document_id),
+                "name": name,
+                "path": path,
+                "kind": kind,
+                "level": child_level,
+                "child_count": 0,
+                "descendant_count": 0,
+            }
+            current_key = key
+            results.append(current)
+        elif current is not None and key[:child_level] == current_key:
+            # 정렬 순서상 직전 자식의 하위 문서 (중간 폴더 문서가 없는 고아 경로는 제외)
+            current["descendant_count"] += 1
+            if len(key) == child_level + 1:
+                current["child_count"] += 1
+    return results
+
+
+def _listen_connect_args() -> Dict[str, Any]:
+    url = make_url(TREE_CACHE_LISTEN_URL)
+    return url.translate_connect_args(username="user", database="dbname")
+
+
+def _listen_forever(stop_event: threading.Event) -> None:
+    import psycopg2
+    import psycopg2.extensions
+
+    backoff = 1.0
+    while not stop_event.is_set():
+        conn = None
+        try:
+            conn = psycopg2.connect(**_listen_connect_args())
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {TREE_CHANNEL}")
+            # 연결이 끊겨 있던 동안의 변경은 알 수 없으므로 전체를 비우고 시작
+            clear_tree_cache()
+            _listener_connected.set()
+            backoff = 1.0
+            logger.info(f"[tree_cache] LISTEN {TREE_CHANNEL} 시작")
+
+            while not stop_event.is_set():
+                if select.select([conn], [], [], _POLL_SECONDS) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    invalidate_user(conn.notifies.pop(0).payload)
+        except Exception as exc:  # pragma: no cover
+            logger.warning(f"[tree_cache] 리스너 오류, {backoff:.0f}s 후 재연결: {exc}")
+        finally:
+            _listener_connected.clear()
+            clear_tree_cache()
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:  # pragma: no cover
+                    pass
+        stop_event.wait(backoff)
+        backoff = min(backoff * 2, _MAX_BACKOFF_SECONDS)
+
+
+def start_tree_cache_listener(stop_event: Optional[threading.Event] = None) -> Optional[threading.Thread]:
+    """
+    NOTIFY 리스너 데몬 스레드를 시작한다.
+
+    - TREE_CACHE_ENABLED=false 이거나 TREE_CACHE_LISTEN_URL 이 없으면 아무것도 하지 않고 None 을 반환한다.
+    """
+    if not TREE_CACHE_ENABLED:
+        if not TREE_CACHE_LISTEN_URL:
+            logger.info("[tree_cache] TREE_CACHE_LISTEN_URL 이 없어 트리 캐시를 사용하지 않습니다. (항상 DB 조회)")
+        return None
+
+    thread = threading.Thread(
+        target=_listen_forever,
+        args=(stop_event or threading.Event(),),
+        name="tree-cache-listener",
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+def get_tree_cache_stats() -> Dict[str, Any]:
+    """트리 캐시 지표 (현재 워커 프로세스 기준)."""
+    with _lock:
+        stats: Dict[str, Any] = dict(_stats)
+        stats["users"] = len(_cache)
+        stats["documents"] = sum(len(tree.rows) for tree in _cache.values())
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    stats["enabled"] = TREE_CACHE_ENABLED
+    stats["listener_connected"] = _listener_connected.is_set()
+    return stats
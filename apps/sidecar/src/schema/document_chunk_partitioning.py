@@ -0,0 +1,350 @@
+"""
+document_chunk user_id HASH 파티션 전환 도구 (온라인).
+
+migration 0007_chunk_user_hash_partitions 가 만든 (빈) shadow 테이블(document_chunk_partitioned, 16개 파티션)을
+전제로, 배포 후 아래 순서로 진행한다.
+
+1) backfill : 동기화 트리거(document_chunk_partition_sync_trg)를 설치한 뒤
+              기존 document_chunk 를 document_chunk_id keyset 배치로 shadow 테이블에 복사
+              - 트리거 설치 시점부터 swap 까지 모든 청크 쓰기와 인덱스 유지가 두 배가 되므로 swap 까지 이어서 진행한다.
+              - 배치 행은 FOR SHARE 로 잠가 복사 중 동시 UPDATE/DELETE 가 동기화 트리거와 엇갈리지 않게 한다.
+              - 배치마다 커밋하므로 서비스 중에도 실행할 수 있다.
+2) swap     : ACCESS EXCLUSIVE 락(lock_timeout) 아래에서 행 수를 검증/보정한 뒤 테이블/인덱스 이름을 교체하고
+              tsv / 비정규화 트리거를 새 테이블로 옮긴다. 기존 테이블은 document_chunk_legacy 로 남는다.
+              - 새 비정규화 트리거는 파티션 키(user_id)를 채우지 않고, 소유 문서와 다르면 INSERT/UPDATE 를 거부한다.
+3) drop-legacy : 검증 후 document_chunk_legacy 와 동기화 함수를 삭제
+
+conversion_state() 는 진행 단계를 돌려주며, 인덱스 점검(src.schema.index_verifier)이 이를 헬스 체크에 포함해
+중간 단계(backfilling / legacy_pending)에 멈춘 전환을 degraded 로 드러낸다.
+
+CLI:
+    python -m src.schema.document_chunk_partitioning status
+    python -m src.schema.document_chunk_partitioning backfill --batch-size 5000
+    python -m src.schema.document_chunk_partitioning swap --lock-timeout 5s
+    python -m src.schema.document_chunk_partitioning drop-legacy
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+
+from src.schema.db import engine
+
+logger = logging.getLogger(__name__)
+
+TABLE = "document_chunk"
+SHADOW_TABLE = "document_chunk_partitioned"
+LEGACY_TABLE = "document_chunk_legacy"
+
+_SHADOW_INDEX_SUFFIX = "_part"
+_LEGACY_INDEX_SUFFIX = "_legacy"
+_SHADOW_PK = "document_chunk_partitioned_document_chunk_id_user_id_pk"
+_CANONICAL_PK = "document_chunk_document_chunk_id_user_id_pk"
+
+_ZERO_UUID = "00000000-0000-0000-0000-000000000000"
+
+_SYNC_TRIGGER = "document_chunk_partition_sync_trg"
+
+# backfill / swap 동안 기존 테이블의 변경을 shadow 테이블에 반영한다. (backfill 이 설치, swap 이 제거)
+_SYNC_FUNCTION = """
+CREATE OR REPLACE FUNCTION document_chunk_partition_sync() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    DELETE FROM document_chunk_partitioned
+     WHERE document_chunk_id = OLD.document_chunk_id
+       AND user_id = OLD.user_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO document_chunk_partitioned SELECT NEW.*;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# 파티션 테이블용 비정규화 채움 함수.
+# BEFORE ROW 트리거에서 파티션 키(user_id)를 바꾸면 "moving row to another partition during a BEFORE FOR EACH ROW
+# trigger" 오류가 나므로 migration 0006 의 document_chunk_denorm_fill() 과 달리 document_path / is_live 만 채우고,
+# user_id 는 쓰는 쪽이 넣은 값을 소유 문서의 user_id 와 대조만 한다.
+_PARTITIONED_DENORM_FILL_FUNCTION = """
+CREATE OR REPLACE FUNCTION document_chunk_partitioned_denorm_fill() RETURNS trigger AS $$
+DECLARE
+  owner_id uuid;
+BEGIN
+  SELECT d.user_id,
+         d.path,
+         (d.deleted_at IS NULL AND dct.deleted_at IS NULL AND NEW.deleted_at IS NULL)
+    INTO owner_id, NEW.document_path, NEW.is_live
+    FROM document_content AS dct
+    JOIN document AS d ON d.document_id = dct.document_id
+   WHERE dct.document_content_id = NEW.document_content_id;
+  IF NEW.user_id IS DISTINCT FROM owner_id THEN
+    RAISE EXCEPTION 'document_chunk.user_id % does not match owning document user_id %', NEW.user_id, owner_id
+      USING ERRCODE = 'check_violation';
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# swap 후 새 테이블에 다시 만들 트리거
+# - tsv: migration 0004 와 동일 정의
+# - 비정규화: migration 0006 과 같은 이벤트지만 함수는 _PARTITIONED_DENORM_FILL_FUNCTION
+_TABLE_TRIGGERS = {
+    "document_chunk_tsv_refresh_trg": (
+        'BEFORE INSERT OR UPDATE OF "chunk_content", "chunk_start", "chunk_end", "document_content_id" '
+        'ON "document_chunk" FOR EACH ROW EXECUTE FUNCTION document_chunk_tsv_refresh()'
+    ),
+    "document_chunk_denorm_fill_trg": (
+        'BEFORE INSERT OR UPDATE OF "document_content_id", "deleted_at" '
+        'ON "document_chunk" FOR EACH ROW EXECUTE FUNCTION document_chunk_partitioned_denorm_fill()'
+    ),
+}
+
+
+def _table_kind(conn: Any, table: str) -> str | None:
+    """pg_class.relkind ('r' 일반 / 'p' 파티션 부모) 또는 None(없음)."""
+    return conn.execute(
+        text("SELECT c.relkind FROM pg_class AS c WHERE c.oid = to_regclass(:name)"),
+        {"name": f"public.{table}"},
+    ).scalar()
+
+
+def _index_names(conn: Any, table: str) -> List[str]:
+    rows = conn.execute(
+        text("SELECT indexname FROM pg_indexes WHERE schemaname = 'public' AND tablename = :table"),
+        {"table": table},
+    ).scalars()
+    return list(rows)
+
+
+def _sync_trigger_installed(conn: Any) -> bool:
+    return bool(
+        conn.execute(
+            text("SELECT EXISTS (SELECT 1 FROM pg_trigger WHERE tgrelid = to_regclass(:table) AND tgname = :name)"),
+            {"table": f"public.{TABLE}", "name": _SYNC_TRIGGER},
+        ).scalar()
+    )
+
+
+# 멈춰 있으면 안 되는 중간 단계 (헬스 체크에서 degraded)
+UNFINISHED_STATES = ("backfilling", "legacy_pending")
+
+
+def conversion_state(conn: Any) -> str:
+    """
+    전환 진행 단계.
+
+    - "absent"         : shadow 테이블 없음 (migration 0007 이전)
+    - "not_started"    : shadow 테이블만 있음 (동기화 트리거 없음, 추가 쓰기 비용 없음)
+    - "backfilling"    : 동기화 트리거 설치됨 → swap 전까지 청크 쓰기/인덱스 유지가 두 배
+    - "legacy_pending" : swap 완료, document_chunk_legacy 가 남아 있음
+    - "done"           : 전환 완료
+    """
+    if _table_kind(conn, TABLE) == "p":
+        return "legacy_pending" if _table_kind(conn, LEGACY_TABLE) is not None else "done"
+    if _table_kind(conn, SHADOW_TABLE) is None:
+        return "absent"
+    return "backfilling" if _sync_trigger_installed(conn) else "not_started"
+
+
+def partition_status() -> Dict[str, Any]:
+    """전환 진행 상태를 반환한다."""
+    with engine.connect() as conn:
+        status: Dict[str, Any] = {
+            "state": conversion_state(conn),
+            "sync_trigger_installed": _sync_trigger_installed(conn),
+            "document_chunk_partitioned": _table_kind(conn, TABLE) == "p",
+            "shadow_exists": _table_kind(conn, SHADOW_TABLE) is not None,
+            "legacy_exists": _table_kind(conn, LEGACY_TABLE) is not None,
+        }
+        for key, table in (("rows", TABLE), ("shadow_rows", SHADOW_TABLE), ("legacy_rows", LEGACY_TABLE)):
+            if _table_kind(conn, table) is not None:
+                status[key] = conn.execute(text(f'SELECT count(*) FROM "{table}"')).scalar()
+        return status
+
+
+def backfill(batch_size: int = 5000, pause_seconds: float = 0.0, lock_timeout: str = "5s") -> Dict[str, int]:
+    """
+    동기화 트리거를 설치하고 기존 document_chunk 행을 shadow 테이블로 복사한다. (재실행 가능)
+
+    - 트리거는 복사 전에 설치하므로 복사 중 들어온 변경도 shadow 에 반영된다.
+      (CREATE TRIGGER 의 테이블 락은 lock_timeout 안에 얻지 못하면 실패)
+    - 이미 복사된 행(동기화 트리거가 넣은 행 포함)은 ON CONFLICT DO NOTHING 으로 건너뛴다.
+    - pause_seconds: 배치 사이 대기 시간 (DB 부하 조절)
+    """
+    stmt = text(
+        f"""
+        WITH batch AS MATERIALIZED (
+            SELECT *
+            FROM "{TABLE}"
+            WHERE document_chunk_id > CAST(:after AS uuid)
+            ORDER BY document_chunk_id
+            LIMIT :batch_size
+            FOR SHARE
+        ),
+        inserted AS (
+            INSERT INTO "{SHADOW_TABLE}"
+            SELECT * FROM batch
+            ON CONFLICT DO NOTHING
+            RETURNING 1
+        )
+        SELECT
+            (SELECT count(*) FROM batch) AS scanned,
+            (SELECT count(*) FROM inserted) AS inserted,
+            (SELECT document_chunk_id FROM batch ORDER BY document_chunk_id DESC LIMIT 1) AS last_id
+        """
+    )
+
+    with engine.begin() as conn:
+        if _table_kind(conn, TABLE) == "p":
+            raise RuntimeError("document_chunk 는 이미 파티션 테이블입니다.")
+        if _table_kind(conn, SHADOW_TABLE) is None:
+            raise RuntimeError(f"{SHADOW_TABLE} 가 없습니다. migration 0007 을 먼저 적용하세요.")
+        if not _sync_trigger_installed(conn):
+            conn.execute(text("SELECT set_config('lock_timeout', :timeout, true)"), {"timeout": lock_timeout})
+            conn.execute(text(_SYNC_FUNCTION))
+            conn.execute(
+                text(
+                    f'CREATE TRIGGER "{_SYNC_TRIGGER}" AFTER INSERT OR UPDATE OR DELETE ON "{TABLE}" '
+                    "FOR EACH ROW EXECUTE FUNCTION document_chunk_partition_sync()"
+                )
+            )
+            logger.info(f"[partition] 동기화 트리거 설치: {_SYNC_TRIGGER}")
+
+    totals = {"scanned": 0, "inserted": 0, "batches": 0}
+    after = _ZERO_UUID
+    while True:
+        with engine.begin() as conn:
+            row = conn.execute(stmt, {"after": after, "batch_size": batch_size}).mappings().one()
+        totals["scanned"] += row["scanned"]
+        totals["inserted"] += row["inserted"]
+        totals["batches"] += 1
+        if row["last_id"] is None or row["scanned"] < batch_size:
+            break
+        after = str(row["last_id"])
+        if totals["batches"] % 20 == 0:
+            logger.info(f"[partition] backfill 진행: {totals}")
+        if pause_seconds > 0:
+            time.sleep(pause_seconds)
+
+    logger.info(f"[partition] backfill 완료: {totals}")
+    return totals
+
+
+def swap(lock_timeout: str = "5s") -> Dict[str, Any]:
+    """
+    shadow 테이블을 document_chunk 로 교체한다. (단일 트랜잭션)
+
+    - lock_timeout 안에 ACCESS EXCLUSIVE 락을 얻지 못하면 아무것도 바꾸지 않고 실패한다.
+    - 행 수가 다르면 누락/잔여 행을 보정한 뒤 교체한다.
+    """
+    report: Dict[str, Any] = {"repaired_missing": 0, "repaired_extra": 0}
+
+    with engine.begin() as conn:
+        if _table_kind(conn, TABLE) == "p":
+            raise RuntimeError("document_chunk 는 이미 파티션 테이블입니다.")
+
+        conn.execute(text("SELECT set_config('lock_timeout', :timeout, true)"), {"timeout": lock_timeout})
+        conn.execute(text(f'LOCK TABLE "{TABLE}", "{SHADOW_TABLE}" IN ACCESS EXCLUSIVE MODE'))
+
+        source_rows = conn.execute(text(f'SELECT count(*) FROM "{TABLE}"')).scalar()
+        shadow_rows = conn.execute(text(f'SELECT count(*) FROM "{SHADOW_TABLE}"')).scalar()
+        if source_rows != shadow_rows:
+            report["repaired_missing"] = conn.execute(
+                text(
+                    f"""
+                    INSERT INTO "{SHADOW_TABLE}"
+                    SELECT dc.* FROM "{TABLE}" AS dc
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM "{SHADOW_TABLE}" AS p
+                        WHERE p.document_chunk_id = dc.document_chunk_id AND p.user_id = dc.user_id
+                    )
+                    """
+                )
+            ).rowcount
+            report["repaired_extra"] = conn.execute(
+                text(
+                    f"""
+                    DELETE FROM "{SHADOW_TABLE}" AS p
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM "{TABLE}" AS dc
+                        WHERE dc.document_chunk_id = p.document_chunk_id AND dc.user_id = p.user_id
+                    )
+                    """
+                )
+            ).rowcount
+        report["rows"] = source_rows
+
+        # 1) 기존 테이블: 트리거 제거 후 legacy 로 이름 변경 (인덱스 이름도 비워 준다)
+        conn.execute(text(f'DROP TRIGGER IF EXISTS "{_SYNC_TRIGGER}" ON "{TABLE}"'))
+        for trigger_name in _TABLE_TRIGGERS:
+            conn.execute(text(f'DROP TRIGGER IF EXISTS "{trigger_name}" ON "{TABLE}"'))
+        conn.execute(text(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY_TABLE}"'))
+        for index_name in _index_names(conn, LEGACY_TABLE):
+            legacy_name = (index_name[: 63 - len(_LEGACY_INDEX_SUFFIX)]) + _LEGACY_INDEX_SUFFIX
+            conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{legacy_name}"'))
+
+        # 2) shadow 테이블을 document_chunk 로 승격하고 인덱스/PK 이름을 정식 이름으로 변경
+        conn.execute(text(f'ALTER TABLE "{SHADOW_TABLE}" RENAME TO "{TABLE}"'))
+        conn.execute(text(f'ALTER TABLE "{TABLE}" RENAME CONSTRAINT "{_SHADOW_PK}" TO "{_CANONICAL_PK}"'))
+        for index_name in _index_names(conn, TABLE):
+            if index_name.endswith(_SHADOW_INDEX_SUFFIX):
+                conn.execute(
+                    text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name[: -len(_SHADOW_INDEX_SUFFIX)]}"')
+                )
+
+        # 3) 행 단위 트리거를 새 테이블에 다시 생성 (파티션 부모의 BEFORE ROW 트리거는 PG13+)
+        conn.execute(text(_PARTITIONED_DENORM_FILL_FUNCTION))
+        for trigger_name, definition in _TABLE_TRIGGERS.items():
+            conn.execute(text(f'CREATE TRIGGER "{trigger_name}" {definition}'))
+
+    logger.info(f"[partition] swap 완료: {report}")
+    return report
+
+
+def drop_legacy() -> None:
+    """swap 이후 남은 document_chunk_legacy 테이블과 동기화 함수를 삭제한다."""
+    with engine.begin() as conn:
+        if _table_kind(conn, TABLE) != "p":
+            raise RuntimeError("swap 이 완료되지 않았습니다. (document_chunk 가 파티션 테이블이 아님)")
+        conn.execute(text(f'DROP TABLE IF EXISTS "{LEGACY_TABLE}"'))
+        conn.execute(text("DROP FUNCTION IF EXISTS document_chunk_partition_sync()"))
+    logger.info("[partition] legacy 테이블 삭제 완료")
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="document_chunk user_id HASH 파티션 전환 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("status", help="전환 상태 조회")
+
+    p_backfill = sub.add_parser("backfill", help="기존 행을 shadow 파티션 테이블로 복사")
+    p_backfill.add_argument("--batch-size", type=int, default=5000)
+    p_backfill.add_argument("--pause", type=float, default=0.0, help="배치 사이 대기(초)")
+    p_backfill.add_argument("--lock-timeout", default="5s", help="동기화 트리거 설치 시 락 대기 한도")
+
+    p_swap = sub.add_parser("swap", help="shadow 테이블을 document_chunk 로 교체")
+    p_swap.add_argument("--lock-timeout", default="5s")
+
+    sub.add_parser("drop-legacy", help="document_chunk_legacy 삭제")
+
+    args = parser.parse_args()
+
+    if args.command == "status":
+        print(json.dumps(partition_status(), ensure_ascii=False, indent=2))
+    elif args.command == "backfill":
+        print(json.dumps(backfill(args.batch_size, args.pause, args.lock_timeout), ensure_ascii=False))
+    elif args.command == "swap":
+        print(json.dumps(swap(args.lock_timeout), ensure_ascii=False))
+    elif args.command == "drop-legacy":
+        drop_legacy()
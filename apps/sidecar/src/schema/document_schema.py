@@ -9,9 +9,9 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
-from pgvector.sqlalchemy import Vector
-from sqlalchemy import BigInteger, ForeignKey, Index, Integer, Text, func, text
-from sqlalchemy.dialects.postgresql import JSONB, TIMESTAMP, UUID, ENUM as PGEnum
+from pgvector.sqlalchemy import HALFVEC
+from sqlalchemy import BigInteger, Boolean, CheckConstraint, ForeignKey, Index, Integer, Text, func, text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TIMESTAMP, TSVECTOR, UUID, ENUM as PGEnum
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.types import TypeDecorator
 
@@ -218,9 +218,8 @@ class Document(Base):
             unique=True,
             postgresql_where=text("deleted_at IS NULL"),
         ),
-        # subtree queries on path (ltree) - created manually via DDL
-        # Note: GIST index for ltree must be created with explicit operator class
-        # CREATE INDEX document_path_gist_idx ON document USING gist (path gist_ltree_ops);
+        # subtree queries on path (ltree) - created by the Drizzle migration (document_path_gist_idx);
+        # presence/validity is checked at startup by src.schema.index_verifier (bootstrap creates it if missing)
     )
 
 
@@ -256,6 +255,12 @@ class DocumentContent(Base):
     # monotonically increasing version per document (1, 2, 3, ...)
     version: Mapped[int] = mapped_column(Integer, nullable=False)
 
+    # document-level vector (L2-normalized mean of chunk embeddings) for document-then-chunk search
+    content_embedding: Mapped[Optional[list[float]]] = mapped_column(
+        HALFVEC(256),
+        nullable=True,
+    )
+
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True),
         nullable=False,
@@ -292,6 +297,14 @@ class DocumentContent(Base):
             unique=True,
             postgresql_where=text("deleted_at IS NULL"),
         ),
+        # coarse stage of hierarchical search: top documents by cosine distance
+        Index(
+            "document_content_embedding_hnsw_idx",
+            "content_embedding",
+            postgresql_using="hnsw",
+            postgresql_ops={"content_embedding": "halfvec_cosine_ops"},
+            postgresql_where=text("content_embedding IS NOT NULL"),
+        ),
     )
 
 
@@ -369,7 +382,13 @@ class DocumentRelation(Base):
 
 
 class DocumentChunk(Base):
-    """Document chunk table for storing document chunks with vector embeddings."""
+    """
+    Document chunk table for storing document chunks with vector embeddings.
+
+    Migration 0007 adds a hash-partitioned shadow table (document_chunk_partitioned,
+    PK (document_chunk_id, user_id)); it is managed by src/schema/document_chunk_partitioning.py
+    and only replaces this table after its swap step.
+    """
 
     __tablename__ = "document_chunk"
 
@@ -387,14 +406,43 @@ class DocumentChunk(Base):
         index=True,
     )
 
+    # denormalised search filters, synced from document / document_content by triggers:
+    # owner user_id, owning document path, and "not soft-deleted at any level" flag
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    document_path: Mapped[str] = mapped_column(Ltree, nullable=False)
+    is_live: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("true"))
+
     # optional position of the chunk within the original content
     position: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
 
-    chunk_content: Mapped[str] = mapped_column(Text, nullable=False)
+    # full chunk text; NULL when the chunk is stored as offsets into the content markdown
+    chunk_content: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # [chunk_start, chunk_end) character offsets into document_content.contents->>'markdown'
+    chunk_start: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    chunk_end: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+    # short preview kept for offset-stored chunks (chunk_content IS NULL)
+    chunk_preview: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # full-text search vector; maintained by the document_chunk_tsv_refresh trigger
+    # (from chunk_content, or from the markdown slice for offset-stored chunks)
+    chunk_tsv: Mapped[Optional[str]] = mapped_column(TSVECTOR, nullable=True)
+
+    # token count of chunk_content measured by the chunking tokenizer (nullable for legacy rows)
+    token_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+    # layout-aware chunking: source page range (layout pageId, 1-based) and block ids
+    page_start: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    page_end: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    block_ids: Mapped[Optional[list[str]]] = mapped_column(ARRAY(Text), nullable=True)
 
-    # pgvector column for semantic search (configure dimensions as needed)
+    # [{"page": int, "bbox": [x0, y0, x1, y1]}] aligned with block_ids (citation highlight)
+    bboxes: Mapped[Optional[list]] = mapped_column(JSONB, nullable=True)
+
+    # pgvector column for semantic search; half precision storage (configure dimensions as needed)
     chunk_embedding: Mapped[list[float]] = mapped_column(
-        Vector(256),
+        HALFVEC(256),
         nullable=False,
     )
 
@@ -421,13 +469,52 @@ class DocumentChunk(Base):
     )
 
     __table_args__ = (
-        # vector similarity index; requires pgvector extension
+        # coarse vector search: HNSW over the binary-quantized embedding (Hamming distance);
+        # candidates are reranked by exact cosine distance on chunk_embedding.
+        # requires pgvector >= 0.8 (search sets hnsw.iterative_scan; binary_quantize alone needs 0.7)
+        Index(
+            "document_chunk_embedding_bq_hnsw_idx",
+            text("(binary_quantize(chunk_embedding)::bit(256)) bit_hamming_ops"),
+            postgresql_using="hnsw",
+            postgresql_where=text("is_live"),
+        ),
+        # hot search path: per-user live chunks
         Index(
-            "document_chunk_embedding_ivfflat_idx",
-            "chunk_embedding",
-            postgresql_using="ivfflat",
-            postgresql_ops={"chunk_embedding": "vector_cosine_ops"},
-            postgresql_with={"lists": 100},
+            "document_chunk_user_live_idx",
+            "user_id",
+            "document_content_id",
+            postgresql_where=text("is_live"),
+        ),
+        # subtree (path prefix) filters on live chunks
+        Index(
+            "document_chunk_path_live_gist_idx",
+            "document_path",
+            postgresql_using="gist",
+            postgresql_where=text("is_live"),
+        ),
+        # chunk -> page lookups within a content version (citations / viewer)
+        Index(
+            "document_chunk_content_page_idx",
+            "document_content_id",
+            "page_start",
+            "page_end",
+        ),
+        # chunk lookup by layout block id
+        Index(
+            "document_chunk_block_ids_gin_idx",
+            "block_ids",
+            postgresql_using="gin",
+        ),
+        # full-text search over chunk_tsv
+        Index(
+            "document_chunk_tsv_gin_idx",
+            "chunk_tsv",
+            postgresql_using="gin",
+        ),
+        # every chunk keeps either its text or offsets into the content markdown
+        CheckConstraint(
+            "chunk_content IS NOT NULL OR (chunk_start IS NOT NULL AND chunk_end IS NOT NULL)",
+            name="document_chunk_text_or_offsets_check",
         ),
     )
 
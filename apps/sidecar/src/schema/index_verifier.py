@@ -0,0 +1,323 @@
+"""
+검색 핫패스 인덱스 점검/생성 도구.
+
+- 인덱스가 빠지거나(수동 DDL 누락, 마이그레이션 일부 실패) CREATE INDEX CONCURRENTLY 실패로 INVALID 상태가 되면
+  검색 쿼리가 오류 없이 순차 스캔으로 바뀌므로, pg_indexes / pg_index 를 조회해 기대 인덱스 상태를 점검한다.
+  - "ok" / "missing" / "invalid"(indisvalid=false) / "table_missing"
+  - 필요한 확장(ltree, vector)의 설치 여부/버전도 함께 보고한다.
+  - document_chunk 파티션 전환이 중간 단계(backfilling / legacy_pending)에 머물러 있으면 비정상으로 보고한다.
+    (src.schema.document_chunk_partitioning.conversion_state)
+- bootstrap: 누락 인덱스를 CREATE INDEX CONCURRENTLY 로 생성하고, invalid 인덱스는 DROP INDEX CONCURRENTLY 후 다시 만든다.
+  - 파티션 부모 테이블(document_chunk HASH 파티션)은 CONCURRENTLY 를 쓸 수 없으므로
+    부모에 ON ONLY 인덱스를 만든 뒤 파티션마다 CONCURRENTLY 로 만든 인덱스를 ATTACH PARTITION 한다.
+- 사이드카 시작 시 백그라운드로 한 번 점검하고(INDEX_VERIFY_ON_STARTUP), 결과는 헬스 체크 응답에 포함된다.
+
+주요 함수:
+- verify_indexes() -> dict
+- bootstrap_indexes(rebuild_invalid) -> dict
+- get_index_status() -> dict | None  (마지막 점검 결과)
+- start_index_verifier() -> threading.Thread | None
+
+CLI:
+    python -m src.schema.index_verifier verify
+    python -m src.schema.index_verifier bootstrap --rebuild-invalid
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from src.schema.db import engine
+from src.schema.document_chunk_partitioning import UNFINISHED_STATES, conversion_state
+
+logger = logging.getLogger(__name__)
+
+# 사이드카 시작 시 인덱스 점검 여부 / 누락 인덱스 자동 생성 여부
+INDEX_VERIFY_ON_STARTUP = os.getenv("INDEX_VERIFY_ON_STARTUP", "true").strip().lower() in ("1", "true", "yes")
+INDEX_BOOTSTRAP_ON_STARTUP = os.getenv("INDEX_BOOTSTRAP_ON_STARTUP", "false").strip().lower() in ("1", "true", "yes")
+
+REQUIRED_EXTENSIONS = ("ltree", "vector")
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """기대 인덱스 정의. body 는 `ON "<table>"` 뒤에 오는 절 (USING ... (...) [WHERE ...])."""
+
+    name: str
+    table: str
+    body: str
+    unique: bool = False
+
+
+# Drizzle 스키마(document-drizzle.ts) / document_schema.py 와 같은 정의
+EXPECTED_INDEXES: tuple[IndexSpec, ...] = (
+    IndexSpec(
+        "document_user_id_path_deleted_null_idx",
+        "document",
+        'USING btree ("user_id", "path") WHERE deleted_at IS NULL',
+        unique=True,
+    ),
+    IndexSpec("document_path_gist_idx", "document", 'USING gist ("path")'),
+    IndexSpec(
+        "document_content_embedding_hnsw_idx",
+        "document_content",
+        'USING hnsw ("content_embedding" halfvec_cosine_ops) WHERE content_embedding IS NOT NULL',
+    ),
+    IndexSpec(
+        "document_chunk_embedding_bq_hnsw_idx",
+        "document_chunk",
+        'USING hnsw ((binary_quantize("chunk_embedding")::bit(256)) bit_hamming_ops) WHERE is_live',
+    ),
+    IndexSpec(
+        "document_chunk_user_live_idx",
+        "document_chunk",
+        'USING btree ("user_id", "document_content_id") WHERE is_live',
+    ),
+    IndexSpec(
+        "document_chunk_path_live_gist_idx",
+        "document_chunk",
+        'USING gist ("document_path") WHERE is_live',
+    ),
+    IndexSpec("document_chunk_tsv_gin_idx", "document_chunk", 'USING gin ("chunk_tsv")'),
+    IndexSpec(
+        "document_chunk_content_page_idx",
+        "document_chunk",
+        'USING btree ("document_content_id", "page_start", "page_end")',
+    ),
+)
+
+_INDEX_STATE_SQL = text(
+    """
+    SELECT
+        pi.indexname AS name,
+        ix.indisvalid AS is_valid,
+        ix.indisready AS is_ready
+    FROM pg_indexes AS pi
+    JOIN pg_class AS ic
+        ON ic.oid = to_regclass(quote_ident(pi.schemaname) || '.' || quote_ident(pi.indexname))
+    JOIN pg_index AS ix
+        ON ix.indexrelid = ic.oid
+    WHERE
+        pi.schemaname = 'public'
+        AND pi.indexname = ANY(:names)
+    """
+)
+
+_TABLE_KIND_SQL = text(
+    """
+    SELECT c.relname AS name, c.relkind::text AS kind
+    FROM pg_class AS c
+    JOIN pg_namespace AS n
+        ON n.oid = c.relnamespace
+    WHERE n.nspname = 'public' AND c.relname = ANY(:names)
+    """
+)
+
+_PARTITIONS_SQL = text(
+    """
+    SELECT child.relname AS name
+    FROM pg_inherits AS inh
+    JOIN pg_class AS child
+        ON child.oid = inh.inhrelid
+    WHERE inh.inhparent = to_regclass(:table)
+    ORDER BY child.relname
+    """
+)
+
+_last_report: Optional[Dict[str, Any]] = None
+_report_lock = threading.Lock()
+
+
+def _set_last_report(report: Dict[str, Any]) -> None:
+    global _last_report
+    with _report_lock:
+        _last_report = report
+
+
+def get_index_status() -> Optional[Dict[str, Any]]:
+    """마지막 점검 결과 (아직 점검하지 않았으면 None)."""
+    with _report_lock:
+        return _last_report
+
+
+def verify_indexes() -> Dict[str, Any]:
+    """
+    기대 인덱스/확장 상태를 점검한다.
+
+    - 반환값: {"healthy", "checked_at", "extensions": {name: version | None},
+              "indexes": [{"name", "table", "status"}], "missing": [...], "invalid": [...],
+              "partitioning": {"state", "unfinished"}}
+    """
+    names = [spec.name for spec in EXPECTED_INDEXES]
+    tables = sorted({spec.table for spec in EXPECTED_INDEXES})
+
+    with engine.connect() as conn:
+        states = {row.name: row for row in conn.execute(_INDEX_STATE_SQL, {"names": names})}
+        table_kinds = {row.name: row.kind for row in conn.execute(_TABLE_KIND_SQL, {"names": tables})}
+        extensions = {
+            row.extname: row.extversion
+            for row in conn.execute(
+                text("SELECT extname, extversion FROM pg_extension WHERE extname = ANY(:names)"),
+                {"names": list(REQUIRED_EXTENSIONS)},
+            )
+        }
+        partition_state = conversion_state(conn)
+
+    indexes: List[Dict[str, Any]] = []
+    for spec in EXPECTED_INDEXES:
+        state = states.get(spec.name)
+        if spec.table not in table_kinds:
+            status = "table_missing"
+        elif state is None:
+            status = "missing"
+        elif not (state.is_valid and state.is_ready):
+            status = "invalid"
+        else:
+            status = "ok"
+        indexes.append({"name": spec.name, "table": spec.table, "status": status})
+
+    report: Dict[str, Any] = {
+        "checked_at": datetime.now(timezone.utc).isoformat(),
+        "extensions": {name: extensions.get(name) for name in REQUIRED_EXTENSIONS},
+        "indexes": indexes,
+        "missing": [i["name"] for i in indexes if i["status"] in ("missing", "table_missing")],
+        "invalid": [i["name"] for i in indexes if i["status"] == "invalid"],
+        "partitioning": {"state": partition_state, "unfinished": partition_state in UNFINISHED_STATES},
+    }
+    report["healthy"] = (
+        not report["missing"]
+        and not report["invalid"]
+        and not report["partitioning"]["unfinished"]
+        and all(version is not None for version in report["extensions"].values())
+    )
+    _set_last_report(report)
+    return report
+
+
+def _partition_index_name(name: str, partition: str, parent: str) -> str:
+    """파티션 인덱스 이름: <인덱스명>_<파티션 접미사> (63자 제한 안에서)."""
+    suffix = partition[len(parent) + 1:] if partition.startswith(parent + "_") else partition
+    return name[: 63 - len(suffix) - 1] + "_" + suffix
+
+
+def _create_index(conn: Any, spec: IndexSpec, table_kind: str) -> None:
+    unique = "UNIQUE " if spec.unique else ""
+    if table_kind != "p":
+        conn.execute(text(f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS "{spec.name}" ON "{spec.table}" {spec.body}'))
+        return
+
+    # 파티션 부모: ON ONLY 로 (invalid 상태) 부모 인덱스를 만들고 파티션 인덱스를 붙이면 valid 가 된다.
+    conn.execute(text(f'CREATE {unique}INDEX IF NOT EXISTS "{spec.name}" ON ONLY "{spec.table}" {spec.body}'))
+    partitions = list(conn.execute(_PARTITIONS_SQL, {"table": f"public.{spec.table}"}).scalars())
+    for partition in partitions:
+        part_index = _partition_index_name(spec.name, partition, spec.table)
+        conn.execute(text(f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS "{part_index}" ON "{partition}" {spec.body}'))
+        try:
+            conn.execute(text(f'ALTER INDEX "{spec.name}" ATTACH PARTITION "{part_index}"'))
+        except Exception as exc:
+            # 이미 다른 인덱스가 붙어 있는 파티션
+            logger.info(f"[index] {part_index} attach 건너뜀: {exc}")
+
+
+def bootstrap_indexes(rebuild_invalid: bool = False) -> Dict[str, Any]:
+    """
+    누락 인덱스를 CREATE INDEX CONCURRENTLY 로 생성한다. (rebuild_invalid=True 이면 invalid 인덱스도 재생성)
+
+    - CONCURRENTLY 는 트랜잭션 밖에서만 실행되므로 AUTOCOMMIT 연결을 사용한다.
+    - 테이블 자체가 없는 경우(마이그레이션 미적용)는 만들지 않는다.
+    - 반환값: {"created": [...], "rebuilt": [...], "failed": {name: error}, "report": verify_indexes()}
+    """
+    before = verify_indexes()
+    statuses = {i["name"]: i["status"] for i in before["indexes"]}
+    result: Dict[str, Any] = {"created": [], "rebuilt": [], "failed": {}}
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        table_kinds = {
+            row.name: row.kind
+            for row in conn.execute(_TABLE_KIND_SQL, {"names": sorted({s.table for s in EXPECTED_INDEXES})})
+        }
+        for spec in EXPECTED_INDEXES:
+            status = statuses.get(spec.name)
+            if status not in ("missing", "invalid") or (status == "invalid" and not rebuild_invalid):
+                continue
+            try:
+                if status == "invalid":
+                    # 파티션 부모 인덱스는 CONCURRENTLY 로 삭제할 수 없다.
+                    concurrently = "" if table_kinds.get(spec.table) == "p" else "CONCURRENTLY "
+                    conn.execute(text(f'DROP INDEX {concurrently}IF EXISTS "{spec.name}"'))
+                logger.info(f"[index] 생성 시작: {spec.name} ON {spec.table}")
+                _create_index(conn, spec, table_kinds.get(spec.table, "r"))
+                result["rebuilt" if status == "invalid" else "created"].append(spec.name)
+            except Exception as exc:
+                logger.error(f"[index] 생성 실패: {spec.name}: {exc}")
+                result["failed"][spec.name] = str(exc)
+
+    result["report"] = verify_indexes()
+    return result
+
+
+def _verify_in_background(bootstrap: bool) -> None:
+    try:
+        report = bootstrap_indexes()["report"] if bootstrap else verify_indexes()
+    except Exception as exc:  # pragma: no cover
+        logger.error(f"[index] 점검 실패: {exc}", exc_info=True)
+        return
+    if report["healthy"]:
+        logger.info("[index] 인덱스/확장 점검 정상")
+    else:
+        logger.warning(
+            f"[index] 인덱스 점검 이상: missing={report['missing']}, invalid={report['invalid']}, "
+            f"extensions={report['extensions']}, partitioning={report['partitioning']}"
+        )
+
+
+def start_index_verifier(
+    verify: bool = INDEX_VERIFY_ON_STARTUP,
+    bootstrap: bool = INDEX_BOOTSTRAP_ON_STARTUP,
+) -> Optional[threading.Thread]:
+    """
+    인덱스 점검(및 선택적으로 누락 인덱스 생성)을 백그라운드 스레드로 한 번 실행한다.
+
+    - verify=False 이면 아무것도 하지 않고 None 을 반환한다.
+    - CREATE INDEX CONCURRENTLY 는 오래 걸릴 수 있으므로 서버 시작을 막지 않는다.
+    """
+    if not verify:
+        return None
+
+    thread = threading.Thread(
+        target=_verify_in_background,
+        args=(bootstrap,),
+        name="index-verifier",
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="검색 인덱스 점검/생성 도구")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("verify", help="기대 인덱스/확장 상태 점검")
+
+    p_bootstrap = sub.add_parser("bootstrap", help="누락 인덱스를 CREATE INDEX CONCURRENTLY 로 생성")
+    p_bootstrap.add_argument("--rebuild-invalid", action="store_true", help="invalid 인덱스도 삭제 후 재생성")
+
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        print(json.dumps(verify_indexes(), ensure_ascii=False, indent=2))
+    elif args.command == "bootstrap":
+        print(json.dumps(bootstrap_indexes(args.rebuild_invalid), ensure_ascii=False, indent=2))